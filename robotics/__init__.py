@@ -8,10 +8,22 @@ By Ben Kolligs
 The purpose of this package is to provide easy to use robotics prototyping functions
 
 """
+
 from .transform import Transform
+from .transform_array import TransformArray
+from .transform_buffer import TransformBuffer
+from .spatial import KDTree
 from .rigid_collection import RigidCollection
+from .rigid_collection_array import RigidCollectionArray
 from .pointcloud import PointCloud
-from .kinematic_tree import KinematicTree
+from .pointcloud_io import load_pointcloud, load_frames, PointCloudWriter
+from .joint import Joint
+from .kinematic_tree import KinematicTree, KinematicSnapshot, RootedFrames
+from .kinematic_topology import KinematicTopology
+from .inverse_kinematics import InverseKinematics
+from .robot_description import load_urdf
+from .registration import icp
+from .pipeline import Pipeline
 from .quaternion import Quaternion
 
 # subpackages
@@ -0,0 +1,180 @@
+import numpy as np
+from .transform import Transform
+from .transform_array import TransformArray
+
+
+def _rotation_error(target, current):
+    """
+    Batched rotation vector taking (B, 3, 3) current rotations to target rotations, expressed in the root frame
+    """
+    delta = target @ current.transpose(0, 2, 1)
+    vee = 0.5 * np.stack(
+        (
+            delta[:, 2, 1] - delta[:, 1, 2],
+            delta[:, 0, 2] - delta[:, 2, 0],
+            delta[:, 1, 0] - delta[:, 0, 1],
+        ),
+        axis=1,
+    )
+    cos_angle = np.clip((np.trace(delta, axis1=1, axis2=2) - 1.0) / 2.0, -1.0, 1.0)
+    angle = np.arccos(cos_angle)
+    sin_angle = np.linalg.norm(vee, axis=1)
+
+    # angle / sin(angle) tends to one for small rotations
+    scale = np.ones_like(angle)
+    regular = sin_angle > 1e-8
+    scale[regular] = angle[regular] / sin_angle[regular]
+    error = vee * scale[:, None]
+
+    # close to pi the skew part vanishes, recover the axis from the symmetric part instead
+    flipped = (sin_angle <= 1e-8) & (cos_angle < 0.0)
+    if np.any(flipped):
+        symmetric = (delta[flipped] + np.eye(3)) / 2.0
+        column = np.argmax(np.diagonal(symmetric, axis1=1, axis2=2), axis=1)
+        axis = symmetric[np.arange(len(column)), :, column]
+        axis /= np.linalg.norm(axis, axis=1, keepdims=True)
+        error[flipped] = axis * angle[flipped, None]
+
+    return error
+
+
+class InverseKinematics:
+    """
+    Damped least squares inverse kinematics for one frame of a KinematicTree. Many targets or seeds are solved together as a vectorized batch, each lane stops as soon as it converges
+
+    Args:
+
+            tree - KinematicTree with Joint edges
+            frame - frame that should reach the targets
+            damping - damping factor of the least squares step
+            tolerance - norm of the 6D pose error at which a lane has converged
+            max_iterations - iteration limit for each solve
+            max_step - largest joint step norm taken in one iteration
+            orientation_weight - weight of the orientation error against the position error
+    """
+
+    def __init__(
+        self,
+        tree,
+        frame,
+        damping=0.05,
+        tolerance=1e-6,
+        max_iterations=100,
+        max_step=0.5,
+        orientation_weight=1.0,
+    ):
+        self.tree = tree
+        self.frame = frame
+        self.damping = damping
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.max_step = max_step
+        self.orientation_weight = orientation_weight
+
+        self.__frame_index = tree.frames.index(frame)
+        # last solution, used to warm start the next solve
+        self.solution = None
+        self.iterations = None
+
+    @staticmethod
+    def __target_array(targets):
+        """
+        Collects the targets into a (B, 4, 4) array
+        """
+        if isinstance(targets, Transform):
+            return targets.transform.reshape(1, 4, 4)
+        elif isinstance(targets, TransformArray):
+            return targets.transforms
+        elif isinstance(targets, (list, tuple)):
+            return TransformArray(list(targets)).transforms
+
+        return np.asarray(targets, dtype=float).reshape(-1, 4, 4)
+
+    def __seeds(self, seeds, batch, n_joints):
+        """
+        Picks the initial joint values, warm starting from the previous solution when none are given
+        """
+        if seeds is None:
+            if self.solution is not None and len(self.solution) in (1, batch):
+                seeds = self.solution
+            else:
+                seeds = np.zeros(n_joints)
+
+        seeds = np.asarray(seeds, dtype=float)
+        return np.array(np.broadcast_to(seeds, (batch, n_joints)))
+
+    def error(self, targets, q):
+        """
+        (B, 6) position and rotation vector errors of the frame at q against the targets, in the root frame
+        """
+        target = self.__target_array(targets)
+        current = self.tree.forward(np.atleast_2d(q))[:, self.__frame_index]
+        return np.hstack(
+            (
+                target[:, :3, 3] - current[:, :3, 3],
+                _rotation_error(target[:, :3, :3], current[:, :3, :3]),
+            )
+        )
+
+    def solve(self, targets, seeds=None):
+        """
+        Solves for joint values reaching the targets, which are given in the root frame as a Transform, list of Transforms, TransformArray or (B, 4, 4) array. Returns (B, n_joints) joint values and a (B,) mask of converged lanes, or a single row and flag for a single Transform
+        """
+        single = isinstance(targets, Transform)
+        target = self.__target_array(targets)
+        n_joints = len(self.tree.joints)
+        batch = max(len(target), 1 if seeds is None else np.atleast_2d(seeds).shape[0])
+        target = np.array(np.broadcast_to(target, (batch, 4, 4)))
+
+        q = self.__seeds(seeds, batch, n_joints)
+        limits = self.tree.joint_limits
+        np.clip(q, limits[:, 0], limits[:, 1], out=q)
+
+        weights = np.array([1.0] * 3 + [self.orientation_weight] * 3)
+        damping = self.damping**2 * np.eye(6)
+        converged = np.zeros(batch, dtype=bool)
+        iterations = np.zeros(batch, dtype=int)
+
+        # indices of the lanes still iterating
+        active = np.arange(batch)
+        for iteration in range(self.max_iterations + 1):
+            poses = self.tree.forward(q[active])
+            current = poses[:, self.__frame_index]
+            error = np.hstack(
+                (
+                    target[active, :3, 3] - current[:, :3, 3],
+                    _rotation_error(target[active, :3, :3], current[:, :3, :3]),
+                )
+            )
+            error *= weights
+
+            # early exit per lane
+            done = np.linalg.norm(error, axis=1) < self.tolerance
+            converged[active[done]] = True
+            keep = ~done
+            active, error, poses = active[keep], error[keep], poses[keep]
+            if active.size == 0 or iteration == self.max_iterations:
+                break
+
+            jacobian = self.tree.jacobian(q[active], self.frame, poses=poses)
+            jacobian *= weights[:, None]
+
+            # dq = J^T (J J^T + lambda^2 I)^-1 e for every lane at once, the damping fades
+            # out close to the solution so the last iterations converge quickly
+            fade = np.minimum(1.0, np.linalg.norm(error, axis=1))[:, None, None]
+            jjt = jacobian @ jacobian.transpose(0, 2, 1) + fade * damping
+            step = jacobian.transpose(0, 2, 1) @ np.linalg.solve(jjt, error[:, :, None])
+            step = step[:, :, 0]
+
+            # limit the step so far away targets do not overshoot
+            norm = np.linalg.norm(step, axis=1, keepdims=True)
+            step *= np.minimum(1.0, self.max_step / np.maximum(norm, 1e-12))
+
+            q[active] = np.clip(q[active] + step, limits[:, 0], limits[:, 1])
+            iterations[active] += 1
+
+        self.solution = q
+        self.iterations = iterations
+        if single:
+            return q[0], converged[0]
+        return q, converged
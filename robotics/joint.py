@@ -0,0 +1,112 @@
+import numpy as np
+from .transform import Transform
+
+# joint type codes used by the compiled kinematic arrays
+FIXED, REVOLUTE, PRISMATIC = 0, 1, 2
+JOINT_TYPES = {"fixed": FIXED, "revolute": REVOLUTE, "prismatic": PRISMATIC}
+
+
+def joint_transforms(joint_types, axes, positions):
+    """
+    Vectorized joint motion, (m,) joint types and (m, 3) unit axes with (..., m) positions gives (..., m, 4, 4) transforms
+    """
+    joint_types = np.asarray(joint_types)
+    axes = np.asarray(axes, dtype=float)
+    positions = np.asarray(positions, dtype=float)
+
+    # rotations about the axis for revolute joints, translations along it for prismatic joints
+    angle = np.where(joint_types == REVOLUTE, positions, 0.0)
+    offset = np.where(joint_types == PRISMATIC, positions, 0.0)
+
+    c, s = np.cos(angle), np.sin(angle)
+    v = 1.0 - c
+    kx, ky, kz = axes[:, 0], axes[:, 1], axes[:, 2]
+
+    # Rodrigues' formula written out per element
+    out = np.zeros(positions.shape + (4, 4))
+    out[..., 0, 0] = c + kx * kx * v
+    out[..., 0, 1] = kx * ky * v - kz * s
+    out[..., 0, 2] = kx * kz * v + ky * s
+    out[..., 1, 0] = ky * kx * v + kz * s
+    out[..., 1, 1] = c + ky * ky * v
+    out[..., 1, 2] = ky * kz * v - kx * s
+    out[..., 2, 0] = kz * kx * v - ky * s
+    out[..., 2, 1] = kz * ky * v + kx * s
+    out[..., 2, 2] = c + kz * kz * v
+    out[..., :3, 3] = offset[..., None] * axes
+    out[..., 3, 3] = 1.0
+    return out
+
+
+class Joint(Transform):
+    """
+    A Transform edge driven by a joint variable. The fixed offset (x, y, z, theta, phi, psi or a 4x4 offset) is followed by a rotation about the axis for revolute joints or a translation along it for prismatic joints
+
+    Args:
+
+            joint_type - "revolute" or "prismatic"
+            axis - joint axis expressed in the frame after the offset
+            position - initial joint value, radians or meters
+            limits - optional (lower, upper) bounds on the position
+    """
+
+    __slots__ = ("joint_type", "axis", "offset", "position", "limits")
+
+    def __repr__(self):
+        return "Joint(joint_type='{0}', axis={1}, position={2}, parent='{3}', child='{4}', name='{5}')".format(
+            self.joint_type,
+            list(self.axis),
+            self.position,
+            self.parent,
+            self.child,
+            self.name,
+        )
+
+    def __init__(
+        self,
+        joint_type="revolute",
+        axis=(0, 0, 1),
+        x=0,
+        y=0,
+        z=0,
+        theta=0,
+        phi=0,
+        psi=0,
+        child=None,
+        parent=None,
+        name=None,
+        offset=None,
+        position=0.0,
+        limits=None,
+    ):
+        if joint_type not in ("revolute", "prismatic"):
+            raise ValueError("Unknown joint type '{0}'!".format(joint_type))
+
+        super().__init__(
+            x,
+            y,
+            z,
+            theta,
+            phi,
+            psi,
+            child=child,
+            parent=parent,
+            name=name,
+            transform=offset,
+        )
+        self.joint_type = joint_type
+        axis = np.asarray(axis, dtype=float)
+        self.axis = axis / np.linalg.norm(axis)
+        self.offset = self.transform
+        self.limits = (-np.inf, np.inf) if limits is None else tuple(limits)
+        self.set_position(position)
+
+    def set_position(self, position):
+        """
+        Moves the joint, the transform becomes offset @ motion(position)
+        """
+        self.position = position
+        motion = joint_transforms(
+            [JOINT_TYPES[self.joint_type]], self.axis.reshape(1, 3), [position]
+        )
+        self.update_matrix(self.offset @ motion[0])
@@ -0,0 +1,266 @@
+from collections import deque
+
+import numpy as np
+from .joint import Joint, JOINT_TYPES, FIXED, REVOLUTE, joint_transforms
+
+
+def _frozen(array):
+    """
+    Marks an array read only so a shared topology cannot be changed by accident
+    """
+    array.flags.writeable = False
+    return array
+
+
+class KinematicTopology:
+    """
+    Immutable, compiled structure of a kinematic tree. It holds no edge poses, so one topology is shared by every tree with the same frames and joints, and whole fleets of edge poses can be rooted in one vectorized pass
+
+    Frames are ordered parents first with the root at index 0, row i of an edge pose array is the transform from the parent of frame i to frame i
+
+    Args:
+
+            frames - frame names, parents first
+            parent_index - index of each frame's parent, -1 for the root
+            edge_names - name of the edge ending at each frame, None for the root
+            joint_types - joint type code of each frame's edge, FIXED for fixed edges
+            joint_axes - (n_frames, 3) joint axes, ignored for fixed edges
+            joint_limits - (n_frames, 2) joint limits, ignored for fixed edges
+    """
+
+    def __init__(
+        self,
+        frames,
+        parent_index,
+        edge_names=None,
+        joint_types=None,
+        joint_axes=None,
+        joint_limits=None,
+    ):
+        n_frames = len(frames)
+        self.frames = tuple(str(frame) for frame in frames)
+        self.root_name = self.frames[0]
+        self.index = {frame: i for i, frame in enumerate(self.frames)}
+        self.parent_index = _frozen(np.array(parent_index, dtype=int))
+
+        if edge_names is None:
+            edge_names = [None] * n_frames
+        self.edge_names = tuple(edge_names)
+        self.edge_index = {
+            name: i for i, name in enumerate(self.edge_names) if name is not None
+        }
+
+        if joint_types is None:
+            joint_types = np.full(n_frames, FIXED)
+        joint_types = np.asarray(joint_types, dtype=int)
+        self.joint_frames = _frozen(np.flatnonzero(joint_types != FIXED))
+        self.joint_names = tuple(self.edge_names[i] for i in self.joint_frames)
+        self.joint_types = _frozen(joint_types[self.joint_frames])
+        if joint_axes is None:
+            joint_axes = np.zeros((n_frames, 3))
+        # unit axes as Joint keeps them, so the motion is a rotation or a unit translation
+        joint_axes = np.asarray(joint_axes, dtype=float)[self.joint_frames]
+        lengths = np.linalg.norm(joint_axes, axis=1)
+        if np.any(lengths == 0):
+            raise ValueError(
+                "Joint '{0}' has a zero length axis!".format(
+                    self.joint_names[np.flatnonzero(lengths == 0)[0]]
+                )
+            )
+        self.joint_axes = _frozen(joint_axes / lengths[:, None])
+        if joint_limits is None:
+            joint_limits = np.tile([-np.inf, np.inf], (n_frames, 1))
+        self.joint_limits = _frozen(
+            np.asarray(joint_limits, dtype=float)[self.joint_frames]
+        )
+        # column of q driving each frame, -1 for fixed edges
+        joint_column = np.full(n_frames, -1)
+        joint_column[self.joint_frames] = np.arange(len(self.joint_frames))
+        self.joint_column = _frozen(joint_column)
+
+        depth = np.zeros(n_frames, dtype=int)
+        children = [[] for _ in range(n_frames)]
+        for i in range(1, n_frames):
+            parent = self.parent_index[i]
+            assert 0 <= parent < i, "Frames must be ordered parents first!"
+            depth[i] = depth[parent] + 1
+            children[parent].append(i)
+        self.depth = _frozen(depth)
+        self.children = tuple(tuple(c) for c in children)
+
+        # every depth is one vectorized step when rooting
+        self.levels = []
+        for d in range(1, depth.max() + 1 if n_frames else 1):
+            frames_at_depth = _frozen(np.flatnonzero(depth == d))
+            self.levels.append(
+                (frames_at_depth, _frozen(self.parent_index[frames_at_depth]))
+            )
+
+        self.__subtrees = {}
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __repr__(self):
+        return "KinematicTopology(root='{0}', frames={1}, joints={2})".format(
+            self.root_name, len(self.frames), len(self.joint_names)
+        )
+
+    @classmethod
+    def from_edges(cls, edges, root_name="base_link"):
+        """
+        Compiles the edges reachable from the root. Returns the topology, the (n_frames, 4, 4) fixed offsets of the edges and the current joint positions
+        """
+        # edges pointing away from each frame
+        forward_edges = {}
+        for edge in edges:
+            if edge.parent is not None and edge.child is not None:
+                forward_edges.setdefault(edge.parent, []).append(edge)
+
+        frames, parent_index, tree_edges = [root_name], [-1], [None]
+        seen = {root_name}
+        open_nodes = deque([0])
+        while open_nodes:
+            current = open_nodes.popleft()
+            for edge in forward_edges.get(frames[current], []):
+                if edge.child not in seen:
+                    seen.add(edge.child)
+                    open_nodes.append(len(frames))
+                    frames.append(edge.child)
+                    parent_index.append(current)
+                    tree_edges.append(edge)
+
+        n_frames = len(frames)
+        offsets = np.tile(np.eye(4), (n_frames, 1, 1))
+        joint_types = np.full(n_frames, FIXED)
+        joint_axes = np.zeros((n_frames, 3))
+        joint_limits = np.tile([-np.inf, np.inf], (n_frames, 1))
+        positions = []
+        for i in range(1, n_frames):
+            edge = tree_edges[i]
+            if isinstance(edge, Joint):
+                offsets[i] = edge.offset
+                joint_types[i] = JOINT_TYPES[edge.joint_type]
+                joint_axes[i] = edge.axis
+                joint_limits[i] = edge.limits
+                positions.append(edge.position)
+            else:
+                offsets[i] = edge.transform
+
+        topology = cls(
+            frames,
+            parent_index,
+            edge_names=[None] + [edge.name for edge in tree_edges[1:]],
+            joint_types=joint_types,
+            joint_axes=joint_axes,
+            joint_limits=joint_limits,
+        )
+        return topology, offsets, np.array(positions, dtype=float)
+
+    def subtree(self, index):
+        """
+        Indices of a frame and all frames below it, in increasing order
+        """
+        subtree = self.__subtrees.get(index)
+        if subtree is None:
+            found = []
+            open_nodes = [index]
+            while open_nodes:
+                current = open_nodes.pop()
+                found.append(current)
+                open_nodes.extend(self.children[current])
+            subtree = self.__subtrees[index] = _frozen(np.sort(found))
+        return subtree
+
+    def frame_index(self, frame):
+        """
+        Position of a frame in KinematicTopology.frames
+        """
+        try:
+            return self.index[frame]
+        except KeyError:
+            raise KeyError("{0} is not in the KinematicTree!".format(frame))
+
+    def local_transforms(self, offsets, q=None):
+        """
+        Edge poses from (..., n_frames, 4, 4) offsets and (..., n_joints) joint values, broadcasting over the leading dimensions
+        """
+        offsets = np.asarray(offsets, dtype=float)
+        if q is None:
+            return np.array(offsets)
+
+        q = np.asarray(q, dtype=float)
+        if q.shape[-1] != len(self.joint_frames):
+            raise ValueError(
+                "Expected {0} joint values, got {1}!".format(
+                    len(self.joint_frames), q.shape[-1]
+                )
+            )
+        batch = np.broadcast_shapes(offsets.shape[:-3], q.shape[:-1])
+        local = np.array(np.broadcast_to(offsets, batch + offsets.shape[-3:]))
+        if len(self.joint_frames):
+            motion = joint_transforms(self.joint_types, self.joint_axes, q)
+            local[..., self.joint_frames, :, :] = (
+                local[..., self.joint_frames, :, :] @ motion
+            )
+        return local
+
+    def root(self, local):
+        """
+        Roots (..., n_frames, 4, 4) edge poses, for example a whole fleet of robots, returning every frame's transform from the root with the same shape
+        """
+        local = np.asarray(local, dtype=float)
+        rooted = np.empty_like(local)
+        rooted[..., 0, :, :] = local[..., 0, :, :]
+        for frames, parents in self.levels:
+            rooted[..., frames, :, :] = (
+                rooted[..., parents, :, :] @ local[..., frames, :, :]
+            )
+        return rooted
+
+    def forward(self, offsets, q):
+        """
+        Rooted transforms of every frame for (..., n_joints) joint values
+        """
+        return self.root(self.local_transforms(offsets, q))
+
+    def jacobian(self, poses, frame, reference_frame=None):
+        """
+        Geometric jacobian of a frame's origin from (B, n_frames, 4, 4) rooted poses, returns (B, 6, n_joints) with linear then angular velocity rows expressed in the orientation of reference_frame, the root by default
+        """
+        index = self.frame_index(frame)
+
+        # joints on the chain between the root and the frame
+        chain = []
+        i = index
+        while i > 0:
+            if self.joint_column[i] >= 0:
+                chain.append(i)
+            i = self.parent_index[i]
+        chain = np.array(chain, dtype=int)
+        columns = self.joint_column[chain]
+
+        batch = poses.shape[0]
+        jacobian = np.zeros((batch, 6, len(self.joint_frames)))
+        if chain.size:
+            # the joint axis is unchanged by its own motion, so the child frame gives it in the root
+            chain_poses = poses[:, chain]
+            axes = np.einsum(
+                "bkij,kj->bki",
+                chain_poses[:, :, :3, :3],
+                self.joint_axes[columns],
+            )
+            lever = poses[:, index, None, :3, 3] - chain_poses[:, :, :3, 3]
+            revolute = (self.joint_types[columns] == REVOLUTE)[None, :, None]
+            linear = np.where(revolute, np.cross(axes, lever), axes)
+            angular = np.where(revolute, axes, 0.0)
+            jacobian[:, :3, columns] = linear.transpose(0, 2, 1)
+            jacobian[:, 3:, columns] = angular.transpose(0, 2, 1)
+
+        if reference_frame is not None and reference_frame != self.root_name:
+            reference = poses[:, self.frame_index(reference_frame), :3, :3]
+            rot_t = reference.transpose(0, 2, 1)
+            jacobian[:, :3] = rot_t @ jacobian[:, :3]
+            jacobian[:, 3:] = rot_t @ jacobian[:, 3:]
+
+        return jacobian
@@ -1,31 +1,331 @@
+import operator
+import threading
+from collections import deque
+from collections.abc import Mapping
+from functools import reduce
+
 import numpy as np
 import robotics as r
+from .joint import Joint, JOINT_TYPES, joint_transforms
+from .kinematic_topology import KinematicTopology
+from .transform_array import invert_transforms
+from .spatial import KDTree
 import matplotlib.pyplot as plt
+from matplotlib.colors import BASE_COLORS, is_color_like
+from matplotlib.lines import Line2D
 from mpl_toolkits.mplot3d import Axes3D
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
+
+
+def _read_only(array):
+    """
+    Read only view of an array, the owner can still write through the array itself
+    """
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+def _relative(rooted, index, start_frame, end_frame):
+    """
+    Transform from start_frame to end_frame out of the (n_frames, 4, 4) rooted poses
+    """
+    return r.Transform(
+        transform=invert_transforms(rooted[index[start_frame]])
+        @ rooted[index[end_frame]],
+        parent=start_frame,
+        child=end_frame,
+    )
+
+
+class RootedFrames(Mapping):
+    """
+    Read only mapping from frame name to the Transform of that frame expressed in one destination frame. The transforms live in a single (n_frames, 4, 4) array and a Transform view is only created when a frame is looked up
+
+    Args:
+
+            transforms - (n_frames, 4, 4) array in the order of frames
+            frames - frame names
+            index - dictionary from frame name to row of transforms
+            destination - frame every transform is expressed in
+    """
+
+    __slots__ = ("transforms", "frames", "index", "destination")
+
+    def __init__(self, transforms, frames, index, destination):
+        self.transforms = _read_only(transforms)
+        self.frames, self.index, self.destination = frames, index, destination
+
+    def __getitem__(self, frame):
+        return r.Transform(
+            transform=self.transforms[self.index[frame]],
+            parent=self.destination,
+            child=frame,
+        )
+
+    def __iter__(self):
+        return iter(self.frames)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __contains__(self, frame):
+        return frame in self.index
+
+    def __repr__(self):
+        return "RootedFrames(destination='{0}', frames={1})".format(
+            self.destination, len(self.frames)
+        )
+
+    @property
+    def origins(self):
+        """
+        (n_frames, 3) view of the frame origins
+        """
+        return self.transforms[:, :3, 3]
+
+    @property
+    def rotations(self):
+        """
+        (n_frames, 3, 3) view of the frame rotations
+        """
+        return self.transforms[:, :3, :3]
+
+
+def _reroot(topology, rooted, destination):
+    """
+    Expresses (n_frames, 4, 4) rooted poses in the destination frame with one batched product
+    """
+    if destination is None or destination == topology.root_name:
+        destination = topology.root_name
+    else:
+        rooted = invert_transforms(rooted[topology.frame_index(destination)]) @ rooted
+    return RootedFrames(rooted, topology.frames, topology.index, destination)
+
+
+def _axes_segments(transforms, scale_factor):
+    """
+    (n_frames * 3, 2, 3) line segments from each frame origin along its x, y and z axes
+    """
+    origins = transforms[:, :3, 3]
+    axes = np.swapaxes(transforms[:, :3, :3], 1, 2)
+    axes = scale_factor * axes / np.linalg.norm(axes, axis=2, keepdims=True)
+    segments = np.empty((len(transforms), 3, 2, 3))
+    segments[:, :, 0] = origins[:, None, :]
+    segments[:, :, 1] = origins[:, None, :] + axes
+    return segments.reshape(-1, 2, 3)
+
+
+def _line_style(fmt):
+    """
+    Color and line style of a matplotlib format string such as "r--", "C1:" or "bo", or of a plain color such as "red". The axes are drawn as lines, so markers are ignored and a format without a line style draws solid lines
+    """
+    if is_color_like(fmt):
+        return fmt, "-"
+    # a full color name followed by a line style, as built for transform_colors
+    for style in ("--", "-.", ":", "-"):
+        if fmt.endswith(style) and is_color_like(fmt[: -len(style)]):
+            return fmt[: -len(style)], style
+
+    color, style, index = None, None, 0
+    while index < len(fmt):
+        if fmt[index : index + 2] in ("--", "-."):
+            style, index = fmt[index : index + 2], index + 2
+        elif fmt[index] in "-:":
+            style, index = fmt[index], index + 1
+        elif fmt[index] == "C" and fmt[index + 1 : index + 2].isdigit():
+            color, index = fmt[index : index + 2], index + 2
+        elif fmt[index] in BASE_COLORS:
+            color, index = fmt[index], index + 1
+        elif fmt[index] in Line2D.markers:
+            index += 1
+        else:
+            raise ValueError(
+                "Unrecognized character {0} in format string '{1}'!".format(
+                    fmt[index], fmt
+                )
+            )
+    return color or plt.rcParams["lines.color"], style or "-"
+
+
+class KinematicSnapshot:
+    """
+    Read only state of a KinematicTree at one instant, see KinematicTree.snapshot
+
+    Args:
+
+            topology - KinematicTopology shared with the tree
+            edge_poses - (n_frames, 4, 4) transform of the edge ending at each frame
+            rooted - (n_frames, 4, 4) transform of each frame from the root
+            positions - joint values in the order of KinematicSnapshot.joints
+            version - number of edge updates the tree had applied
+    """
+
+    __slots__ = ("topology", "edge_poses", "rooted", "positions", "version")
+
+    def __init__(self, topology, edge_poses, rooted, positions, version=0):
+        self.topology = topology
+        self.edge_poses = _read_only(edge_poses)
+        self.rooted = _read_only(rooted)
+        self.positions = _read_only(positions)
+        self.version = version
+
+    def __repr__(self):
+        return "KinematicSnapshot(root='{0}', frames={1}, version={2})".format(
+            self.topology.root_name, len(self.topology), self.version
+        )
+
+    @property
+    def frames(self):
+        """
+        Frame order of the rooted and edge pose arrays
+        """
+        return self.topology.frames
+
+    @property
+    def joints(self):
+        """
+        Joint names in the order of KinematicSnapshot.positions
+        """
+        return self.topology.joint_names
+
+    def get(self, start_frame, end_frame):
+        """
+        Retrieves the transform between two frames as it was when the snapshot was taken
+        """
+        self.topology.frame_index(start_frame)
+        self.topology.frame_index(end_frame)
+        return _relative(self.rooted, self.topology.index, start_frame, end_frame)
+
+    def root(self, destination=None):
+        """
+        Transforms all frames into the destination frame, the root by default, returned as RootedFrames
+        """
+        return _reroot(self.topology, self.rooted, destination)
 
 
 class KinematicTree:
     """
-    An ordered collection of transforms, most useful for creating a full robot
+    An ordered collection of transforms, most useful for creating a full robot. The structure is compiled into a KinematicTopology that trees with the same frames and joints can share, each tree only keeps its own arrays of edge poses
     """
 
     def __init__(self, collection, root_index=None, root_name="base_link", debug=False):
         self.debug = debug
-        self.rigid_collection = r.RigidCollection(collection)
-        self.__root_name = root_name
+        self.__rigid_collection = r.RigidCollection(collection)
+        topology, offsets, positions = KinematicTopology.from_edges(
+            self.__rigid_collection.collection, root_name=root_name
+        )
+        self.__setup(topology, offsets, positions)
+
+    @classmethod
+    def from_topology(cls, topology, offsets, positions=None, debug=False):
+        """
+        Builds a tree on an existing KinematicTopology without creating any edge objects. The (n_frames, 4, 4) fixed offsets and the joint positions are copied, so a fleet of identical robots costs one topology plus a few small arrays per robot
+        """
+        tree = cls.__new__(cls)
+        tree.debug = debug
+        # edge objects are only created if something asks for the collection
+        tree.__rigid_collection = None
+        offsets = np.array(offsets, dtype=float)
+        assert offsets.shape == (len(topology), 4, 4), "Wrong size offsets!"
+        if positions is None:
+            positions = np.zeros(len(topology.joint_frames))
+        tree.__setup(topology, offsets, positions)
+        return tree
+
+    def __setup(self, topology, offsets, positions):
+        """
+        Initializes the per tree state and roots every frame
+        """
+        self.__topology = topology
+        self.__root_name = topology.root_name
         self.__tree_rep = "incidence_list"
-        self.__assemble_tree(root_name=root_name, tree_rep=self.__tree_rep)
-        self.__root(root_name=root_name)
+        # the incidence list with inverse edges is only assembled when a search needs it
+        self.__incidence = None
+        self.__inverse_edges = {}
+
+        self.__offsets = offsets
+        self.__positions = np.array(positions, dtype=float).reshape(-1)
+        self.__local = topology.local_transforms(offsets, self.__positions)
+        self.__rooted = topology.root(self.__local)
+        # frames whose rooted transform is out of date and the range of levels holding them, empty when clean
+        self.__dirty = np.zeros(len(topology), dtype=bool)
+        self.__dirty_levels = (len(topology.levels), 0)
+
+        # guards the arrays against readers taking a snapshot mid update
+        self.__lock = threading.RLock()
+        # set while a snapshot shares the edge pose and rooted arrays
+        self.__shared = False
+        self.__version = 0
+        # KDTree over the rooted origins and the version it was built for
+        self.__spatial = (None, None)
+
+    @property
+    def topology(self):
+        """
+        The immutable KinematicTopology of the tree, safe to share between trees
+        """
+        return self.__topology
+
+    @property
+    def rigid_collection(self):
+        """
+        The RigidCollection of edges, trees built from a topology create their edge objects on first use
+        """
+        if self.__rigid_collection is None:
+            self.__rigid_collection = r.RigidCollection(self.__materialize_edges())
+        return self.__rigid_collection
+
+    def __materialize_edges(self):
+        """
+        Creates Transform and Joint edges matching the current state of the arrays
+        """
+        topology = self.__topology
+        joint_names = {code: name for name, code in JOINT_TYPES.items()}
+        edges = [r.Transform(name=topology.root_name)]
+        for i in range(1, len(topology)):
+            parent = topology.frames[topology.parent_index[i]]
+            column = topology.joint_column[i]
+            if column < 0:
+                edge = r.Transform(
+                    transform=self.__offsets[i].copy(),
+                    parent=parent,
+                    child=topology.frames[i],
+                    name=topology.edge_names[i],
+                )
+            else:
+                edge = Joint(
+                    joint_names[topology.joint_types[column]],
+                    topology.joint_axes[column],
+                    offset=self.__offsets[i].copy(),
+                    position=self.__positions[column],
+                    parent=parent,
+                    child=topology.frames[i],
+                    name=topology.edge_names[i],
+                    limits=topology.joint_limits[column],
+                )
+            edges.append(edge)
+        return edges
 
     def set_tree_rep(self, rep_type):
         self.__tree_rep = rep_type
+        self.__incidence = None
+
+    @property
+    def tree_rep(self):
+        """
+        Representation of the tree used for searching, assembled on first use
+        """
+        if self.__incidence is None:
+            self.__assemble_tree(root_name=self.__root_name, tree_rep=self.__tree_rep)
+        return self.__incidence
 
     def __assemble_tree(self, root_name, tree_rep):
         """
         Assembles the collection of transforms into a single tree representation, enabling each transform to only need their parent and child when passed to the tree object.
         """
         if tree_rep == "incidence_list":
-            self.tree_rep = self.__assemble_incidence_list(root_name)
+            self.__incidence = self.__assemble_incidence_list(root_name)
             return True
         else:
             return False
@@ -40,6 +340,8 @@ class KinematicTree:
         root = root_name
         # get the root from the name
         tree_dict[root] = []
+        # keep track of each edge's inverse so it can be refreshed when the edge changes
+        self.__inverse_edges = {}
         # traverse the edges first
         for edge in self.rigid_collection.collection:
             # if the edge's parent is in the tree dictionary, add it
@@ -56,6 +358,7 @@ class KinematicTree:
                 # set edge as a backward edge
                 edge_inv = edge.inv()
                 edge_inv.set_backward()
+                self.__inverse_edges[id(edge)] = edge_inv
                 if child in tree_dict:
                     tree_dict[child].append(edge_inv)
                 else:
@@ -118,63 +421,228 @@ class KinematicTree:
 
         return adj_matrix
 
+    def update_edge(self, name, transform=None, **pose):
+        """
+        Updates the named edge either with a new Transform / 4x4 matrix or with pose keywords (x, y, z, theta, phi, psi) that replace only the given values. Joints only take a position. Frames below the edge are recomputed lazily on the next root() or get()
+        """
+        with self.__lock:
+            self.__update_edge(name, transform, pose)
+
+    def __update_edge(self, name, transform, pose):
+        """
+        Writes an edge update into the arrays, the caller holds the lock
+        """
+        topology = self.__topology
+        index = topology.edge_index.get(name)
+        if index is None:
+            # edges that are not reachable from the root only live in the collection
+            self.__update_edge_object(name, transform, pose)
+            return
+
+        if self.__shared:
+            # a snapshot still reads the current arrays
+            self.__local = self.__local.copy()
+            self.__rooted = self.__rooted.copy()
+            self.__shared = False
+        self.__version += 1
+
+        column = topology.joint_column[index]
+        if column >= 0:
+            if transform is not None or set(pose) != {"position"}:
+                raise ValueError(
+                    "Joint '{0}' can only be updated with a position!".format(name)
+                )
+            self.__positions[column] = pose["position"]
+            motion = joint_transforms(
+                topology.joint_types[column, None],
+                topology.joint_axes[column, None],
+                self.__positions[column, None],
+            )[0]
+            self.__local[index] = self.__offsets[index] @ motion
+        else:
+            if transform is None:
+                current = dict(
+                    zip(
+                        ("x", "y", "z", "theta", "phi", "psi"),
+                        r.Transform(transform=self.__offsets[index]).pose().ravel(),
+                    )
+                )
+                current.update(pose)
+                transform = r.Transform(**current)
+            if isinstance(transform, r.Transform):
+                transform = transform.transform
+            self.__offsets[index] = transform
+            self.__local[index] = transform
+
+        # keep edge objects in step if they have been created
+        if self.__rigid_collection is not None:
+            self.__update_edge_object(name, transform, pose)
+
+        subtree = topology.subtree(index)
+        self.__dirty[subtree] = True
+        # levels[d - 1] holds the frames at depth d, the root itself is never recomputed
+        first, last = self.__dirty_levels
+        self.__dirty_levels = (
+            min(first, max(topology.depth[index] - 1, 0)),
+            max(last, topology.depth[subtree].max()),
+        )
+
+    def __update_edge_object(self, name, transform, pose):
+        """
+        Applies an update to the edge object in the collection and refreshes its backward edge
+        """
+        edge = self.rigid_collection.lookup(name)
+        if edge is None:
+            raise KeyError("{0} is not in the KinematicTree!".format(name))
+
+        if isinstance(edge, Joint):
+            if transform is not None or set(pose) != {"position"}:
+                raise ValueError(
+                    "Joint '{0}' can only be updated with a position!".format(name)
+                )
+            edge.set_position(pose["position"])
+        elif transform is not None:
+            if isinstance(transform, r.Transform):
+                transform = transform.transform
+            edge.update_matrix(np.array(transform, dtype=float))
+        else:
+            current = dict(
+                zip(("x", "y", "z", "theta", "phi", "psi"), edge.pose().ravel())
+            )
+            current.update(pose)
+            edge.update_transform(**current)
+
+        # refresh the backward edge used for searching
+        if id(edge) in self.__inverse_edges:
+            self.__inverse_edges[id(edge)].update_matrix(edge.inv().transform)
+
+    def snapshot(self):
+        """
+        Consistent, read only KinematicSnapshot of the tree. The snapshot shares the tree's arrays and the next update copies them instead of writing in place, so readers on other threads never block the writer for more than the pending refresh
+        """
+        with self.__lock:
+            self.__refresh_locked()
+            self.__shared = True
+            return KinematicSnapshot(
+                self.__topology,
+                self.__local,
+                self.__rooted,
+                self.__positions.copy(),
+                self.__version,
+            )
+
+    @property
+    def spatial_index(self):
+        """
+        KDTree over the origins of every frame in the root, in the order of KinematicTree.frames. It is rebuilt on first use after any edge update
+        """
+        with self.__lock:
+            version, spatial = self.__spatial
+            if version != self.__version:
+                self.__refresh_locked()
+                spatial = KDTree(self.__rooted[:, :3, 3].copy())
+                self.__spatial = (self.__version, spatial)
+            return spatial
+
+    def nearest(self, points, k=1):
+        """
+        Distances and frame indices of the k frames whose origins are nearest to each point given in the root, see KDTree.query
+        """
+        return self.spatial_index.query(points, k=k)
+
+    def within(self, points, radius):
+        """
+        Indices of the frames whose origins lie within radius of each point given in the root, see KDTree.query_radius
+        """
+        return self.spatial_index.query_radius(points, radius)
+
+    @property
+    def edge_poses(self):
+        """
+        (n_frames, 4, 4) copy of the current transform of the edge ending at each frame, in the order of KinematicTree.frames. Stacking these for many trees of one topology gives a fleet array that KinematicTopology.root handles in one pass
+        """
+        with self.__lock:
+            return self.__local.copy()
+
+    def __refresh_locked(self):
+        """
+        Recomputes the rooted transform of every dirty frame, parents first, visiting only the levels between the shallowest and deepest dirty frame. The caller holds the lock
+        """
+        first, last = self.__dirty_levels
+        if first >= last:
+            return
+
+        dirty = self.__dirty
+        if self.debug:
+            print("[REFRESH] {0} dirty frames".format(np.count_nonzero(dirty)))
+        rooted, local = self.__rooted, self.__local
+        for frames, parents in self.__topology.levels[first:last]:
+            mask = dirty[frames]
+            if mask.all():
+                rooted[frames] = rooted[parents] @ local[frames]
+            elif mask.any():
+                rooted[frames[mask]] = rooted[parents[mask]] @ local[frames[mask]]
+
+        dirty[:] = False
+        self.__dirty_levels = (len(self.__topology.levels), 0)
+
     def get(self, start_frame, end_frame):
         """
         Retrieves the transform between two frames on the tree
         """
-        # find a path if one exists
-        success, edges_traversed = self.__breadth_first_search(start_frame, end_frame)
-        if success:
-            # start from the goal
-            edge = edges_traversed[end_frame]
-            path_complete = False
-            path = []
-            # cycle through the back pointers to get the path
-            while not path_complete:
-                back_pointer = edge.parent
-                if back_pointer is not None:
-                    path.append(edge)
-                    if back_pointer == start_frame:
-                        path_complete = True
-                    edge = edges_traversed[back_pointer]
-
-            # reverse the path to start from the start frame
-            path.reverse()
+        index = self.__topology.index
+        if start_frame in index and end_frame in index:
+            # both frames hang off the root, so the cached root products give the answer directly
             if self.debug:
-                print("[GET]")
-                [print("\t", x.name) for x in path]
+                print(
+                    "[GET] {0} -> {1} through '{2}'".format(
+                        start_frame, end_frame, self.__root_name
+                    )
+                )
+            # refresh and read under one lock so an update can not tear the rows
+            with self.__lock:
+                self.__refresh_locked()
+                return _relative(self.__rooted, index, start_frame, end_frame)
+
+        # otherwise fall back to searching the incidence list
+        path = self.__search_path(start_frame, end_frame)
+        if self.debug:
+            print("[GET]")
+            [print("\t", x.name) for x in path]
         # return the path multiplied together
-        return np.prod(path)
+        return reduce(operator.mul, path)
 
-    def __breadth_first_search(self, start_frame, end_frame):
+    def __search_path(self, start_frame, end_frame):
         """
-        Find a path between the start and goal transform using breadth first search
+        Find the edges between the start and goal frame using breadth first search
         """
-        # define expansion function in this context
-        def expand_node_BFS(node):
-            edges = self.tree_rep[node]
-            for edge in edges:
-                if edge.child == end_frame:
-                    backpointers[edge.child] = edge
-                    return True
-                elif edge.child not in open_nodes and edge.child not in closed_nodes:
+        backpointers = {start_frame: None}
+        open_nodes = deque([start_frame])
+        while open_nodes:
+            node = open_nodes.popleft()
+            if node == end_frame:
+                break
+            for edge in self.tree_rep.get(node, []):
+                if edge.child not in backpointers:
                     backpointers[edge.child] = edge
                     open_nodes.append(edge.child)
+        else:
+            raise KeyError(
+                "No path between '{0}' and '{1}' in the KinematicTree!".format(
+                    start_frame, end_frame
+                )
+            )
 
-            return False
-
-        # utilize open and closed node lists
-        open_nodes = [start_frame]
-        closed_nodes = []
-        # dict for saving backpointers
-        backpointers = {start_frame: None}
-        while len(open_nodes) != 0:
-            node = open_nodes.pop(0)
-            closed_nodes.append(node)
+        # cycle through the back pointers to get the path
+        path = []
+        edge = backpointers[end_frame]
+        while edge is not None:
+            path.append(edge)
+            edge = backpointers[edge.parent]
 
-            if expand_node_BFS(node):
-                return True, backpointers
-        return False, backpointers
+        # reverse the path to start from the start frame
+        path.reverse()
+        return path
 
     def plot(
         self,
@@ -187,9 +655,10 @@ class KinematicTree:
         plot_frame=None,
         view_angle=None,
         transform_colors=None,
+        artist=None,
     ):
         """
-        Plots the kinematic trees with or without arrows
+        Plots the kinematic trees with or without arrows. All frame axes are drawn as one Line3DCollection, which is returned. Passing that collection back as artist moves its lines to the current poses without rebuilding the figure
         """
         # if display_arrows:
         # 	self.__plot_arrows(axes_lim=axes_lim, scale_factor=scale_factor, rgb_xyz=rgb_xyz, detached=detached, axis_obj=axis_obj)
@@ -198,7 +667,7 @@ class KinematicTree:
         # plot the tree in a certain frame
         if plot_frame is None:
             plot_frame = self.__root_name
-        self.__plot_frames(
+        return self.__plot_frames(
             axes_lim,
             scale_factor,
             rgb_xyz,
@@ -207,6 +676,7 @@ class KinematicTree:
             plot_frame,
             view_angle,
             transform_colors,
+            artist,
         )
 
     def __plot_frames(
@@ -219,16 +689,24 @@ class KinematicTree:
         plot_frame,
         view_angle,
         transform_colors,
+        artist,
     ):
         """
         Plots the tree within a certain frame. Note that RGB needs to be a dictionary with each frame name
         """
+        frames = self.root(destination=plot_frame, root_name=self.__root_name)
+        segments = _axes_segments(frames.transforms, scale_factor)
+        if artist is not None:
+            # live update, only the line positions change
+            artist.set_segments(segments)
+            return artist
+
         if not detached:
             fig = plt.figure()
             axis_obj = plt.subplot(111, projection="3d")
-        frames = self.root(destination=plot_frame, root_name=self.__root_name)
+
+        styles = []
         for frame in frames:
-            transform = frames[frame]
             # selects the given color for a transform
             # transform colors should be a dictionary since this isn't a list
             if transform_colors is not None:
@@ -236,13 +714,13 @@ class KinematicTree:
                 if isinstance(rgb_xyz, str):
                     # to not get confused, dot lines
                     rgb_xyz = [rgb_xyz, rgb_xyz + ":", rgb_xyz + "--"]
+            styles.extend(_line_style(fmt) for fmt in rgb_xyz)
 
-            transform.plot(
-                detached=True,
-                axis_obj=axis_obj,
-                scale_factor=scale_factor,
-                rgb_xyz=rgb_xyz,
-            )
+        colors, linestyles = zip(*styles) if styles else ((), ("-",))
+        artist = Line3DCollection(
+            segments, colors=list(colors), linestyles=list(linestyles)
+        )
+        axis_obj.add_collection3d(artist)
 
         axis_obj.set_xlim3d(-axes_lim, axes_lim)
         axis_obj.set_ylim3d(-axes_lim, axes_lim)
@@ -257,66 +735,71 @@ class KinematicTree:
 
         if not detached:
             plt.show()
+        return artist
 
     def root(self, destination="base_link", root_name="base_link"):
         """
-        Transforms all frames into specified frame. If destination is not root, takes O(n) time to transform
+        Transforms all frames into specified frame, returned as RootedFrames over one (n_frames, 4, 4) array. Any destination other than the root costs a single batched product
         """
-        if destination == root_name:
-            # __rooted frames is already in root
-            return self.__rooted_frames
-        else:
+        with self.__lock:
+            self.__refresh_locked()
+            if destination == root_name:
+                # the rooted array is handed out, so the next update copies it
+                self.__shared = True
+                return _reroot(self.__topology, self.__rooted, None)
+
             if self.debug:
                 print(
                     "[ROOT] Transforming frames into '{0}' from {1}".format(
                         destination, root_name
                     )
                 )
-            # obtain the transform to shift the entire tree to destination frame
-            branched_frames = {}
-            operator = self.__rooted_frames[destination].inv()
-            for t in self.__rooted_frames:
-                branched_frames[t] = operator * self.__rooted_frames[t]
-
-            return branched_frames
-
-    def __root(self, root_name="base_link"):
-        """
-        Transforms every frame into the base link
-        """
-
-        def expand(current):
-            # expands a node by adding all the valid neighbors to the stack while extracting the transform
-            edges = self.tree_rep[current]
-            for edge in reversed(edges):
-                # if we have a forward node
-                if edge.get_forward():
-                    current = edge.child
-                    parent = edge.parent
-                    if self.debug:
-                        print("\t\t", parent, "->", current)
-                    if current not in open_nodes and current not in closed_nodes:
-                        open_nodes.append(edge.child)
-                        # multiply the current node by the parent transform
-                        self.__rooted_frames[current] = (
-                            self.__rooted_frames[parent] * edge
-                        )
-
-        # initialize the rooted frames list
-        self.__rooted_frames = {
-            root_name: r.Transform(parent=root_name, child=root_name)
-        }
-        # initialize open and closed lists
-        open_nodes = [root_name]
-        closed_nodes = []
+            return _reroot(self.__topology, self.__rooted, destination)
 
-        if self.debug:
-            print("[ROOT]")
-        while open_nodes:
-            current = open_nodes.pop()
-            if self.debug:
-                print("\t", current)
-            closed_nodes.append(current)
-            expand(current)
+    @property
+    def frames(self):
+        """
+        Frames reachable from the root, parents before children. This is the frame order used by forward()
+        """
+        return self.__topology.frames
+
+    @property
+    def joints(self):
+        """
+        Names of the joint edges, in the column order of q used by forward()
+        """
+        return self.__topology.joint_names
+
+    @property
+    def joint_limits(self):
+        """
+        (n_joints, 2) lower and upper joint limits, infinite when unbounded
+        """
+        return self.__topology.joint_limits
+
+    @property
+    def positions(self):
+        """
+        Copy of the current joint values, in the order of KinematicTree.joints
+        """
+        with self.__lock:
+            return self.__positions.copy()
+
+    def forward(self, q):
+        """
+        Batched forward kinematics. q is (n_joints,) or (B, n_joints) in the order of KinematicTree.joints, returns the rooted transforms of every frame as (n_frames, 4, 4) or (B, n_frames, 4, 4) in the order of KinematicTree.frames
+        """
+        return self.__topology.forward(self.__offsets, q)
 
-        return self.__rooted_frames
+    def jacobian(self, q, frame, reference_frame=None, poses=None):
+        """
+        Geometric jacobian of a frame's origin, rows are linear then angular velocity and columns follow KinematicTree.joints. q is (n_joints,) or (B, n_joints), returns (6, n_joints) or (B, 6, n_joints) with the velocities expressed in the orientation of reference_frame, the root by default. Forward kinematics already computed for q can be passed as poses
+        """
+        q = np.asarray(q, dtype=float)
+        single = q.ndim == 1
+        if poses is None:
+            poses = self.forward(np.atleast_2d(q))
+        else:
+            poses = poses.reshape((-1,) + poses.shape[-3:])
+        jacobian = self.__topology.jacobian(poses, frame, reference_frame)
+        return jacobian[0] if single else jacobian
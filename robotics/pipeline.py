@@ -0,0 +1,142 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from .pointcloud import PointCloud
+
+
+class Pipeline:
+    """
+    Lazy processing of a sequence of PointClouds. Stages are chained with the builder methods, each returns a new Pipeline, and run() pulls one frame at a time through every stage so only the frames in flight are held in memory. A stage may return None to drop a frame
+
+    Args:
+
+            stages - functions taking and returning a PointCloud
+            workers - number of threads running frames through the stages, 0 runs them on the calling thread. NumPy releases the GIL in its kernels, so frames overlap
+    """
+
+    def __init__(self, stages=None, workers=0):
+        self.stages = tuple(stages) if stages is not None else ()
+        self.workers = workers
+
+    def __repr__(self):
+        return "Pipeline(stages={0}, workers={1})".format(
+            [getattr(stage, "__name__", repr(stage)) for stage in self.stages],
+            self.workers,
+        )
+
+    def then(self, stage):
+        """
+        Appends a stage function
+        """
+        return Pipeline(self.stages + (stage,), workers=self.workers)
+
+    def map(self, function):
+        """
+        Appends a stage function, an alias of then
+        """
+        return self.then(function)
+
+    def transform(self, tree, frame="base_link"):
+        """
+        Transforms every cloud from its own frame into frame using a KinematicTree or KinematicSnapshot
+        """
+
+        def transform(cloud):
+            if cloud.frame == frame:
+                return cloud
+            return cloud.transform(cloud.frame, frame, tree.get(frame, cloud.frame))
+
+        return self.then(transform)
+
+    def crop(self, lower, upper):
+        """
+        Keeps the points inside an axis aligned box, see PointCloud.crop
+        """
+
+        def crop(cloud):
+            return cloud.crop(lower, upper)
+
+        return self.then(crop)
+
+    def voxel_downsample(self, voxel_size, reduce="centroid"):
+        """
+        Decimates every cloud, see PointCloud.voxel_downsample
+        """
+
+        def voxel_downsample(cloud):
+            return cloud.voxel_downsample(voxel_size, reduce=reduce)
+
+        return self.then(voxel_downsample)
+
+    def __process(self, cloud):
+        """
+        Runs one frame through every stage
+        """
+        for stage in self.stages:
+            if cloud is None:
+                break
+            cloud = stage(cloud)
+        return cloud
+
+    def run(self, clouds):
+        """
+        Generator of processed clouds in input order, frames dropped by a stage are skipped
+        """
+        if self.workers <= 0:
+            for cloud in clouds:
+                cloud = self.__process(cloud)
+                if cloud is not None:
+                    yield cloud
+            return
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            # a bounded window of frames in flight keeps memory flat
+            pending = deque()
+            for cloud in clouds:
+                pending.append(pool.submit(self.__process, cloud))
+                if len(pending) >= 2 * self.workers:
+                    cloud = pending.popleft().result()
+                    if cloud is not None:
+                        yield cloud
+            while pending:
+                cloud = pending.popleft().result()
+                if cloud is not None:
+                    yield cloud
+
+    __call__ = run
+
+    def accumulate(self, clouds, voxel_size=None, flush_size=262144):
+        """
+        Fuses every processed cloud into one PointCloud. The processed clouds must all be in the same frame, add a transform stage to bring them into one. With a voxel_size the fused cloud keeps the first point per voxel and is compacted whenever flush_size new points are buffered
+        """
+        fused, buffered, count = np.zeros((0, 3)), [], 0
+        frame, first = None, True
+        for cloud in self.run(clouds):
+            if first:
+                frame, first = cloud.frame, False
+            elif cloud.frame != frame:
+                raise ValueError(
+                    "Cannot accumulate a cloud in frame '{0}' with clouds in frame '{1}'!".format(
+                        cloud.frame, frame
+                    )
+                )
+            buffered.append(cloud.cloud)
+            count += len(cloud.cloud)
+            if voxel_size is not None and count >= flush_size:
+                fused = self.__fuse(fused, buffered, voxel_size)
+                buffered, count = [], 0
+
+        fused = np.concatenate([fused] + buffered) if buffered else fused
+        result = PointCloud(fused, frame=frame)
+        if voxel_size is not None:
+            result = result.voxel_downsample(voxel_size, reduce="first")
+        return result
+
+    @staticmethod
+    def __fuse(fused, buffered, voxel_size):
+        """
+        Merges buffered points into the fused points, one point per voxel
+        """
+        merged = PointCloud(np.concatenate([fused] + buffered))
+        return merged.voxel_downsample(voxel_size, reduce="first").cloud
@@ -3,3 +3,4 @@ from .breadth import *
 from .dijkstra import *
 from .depth import *
 from .best_first import *
+from .occupancy import *
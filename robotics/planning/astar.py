@@ -66,6 +66,9 @@ class AStarSearch(GraphSearch):
 
             # in the neighbors
             for node in self.neighbors(cur.x, cur.y):
+                # cost grids mark impassable cells as infinite
+                if self.validity_check == "cost" and not self.valid(node):
+                    continue
                 # calculate the cost to reach that node
                 new_cost = cur.cost_to_come + self.edge_cost(cur, node)
                 # if we haven't already seen this node
@@ -79,8 +82,8 @@ class AStarSearch(GraphSearch):
                     open.append(node)
                     node.parent = cur
 
-                # or if we have seen it and new cost is lower
-                elif new_cost < node.cost_to_come:
+                # or if it is still open and new cost is lower, closed nodes are final with the manhattan heuristic
+                elif node not in closed and new_cost < node.cost_to_come:
                     # update the cost of the node
                     node.cost_to_come = new_cost
                     node.total_cost = new_cost + self.edge_cost(
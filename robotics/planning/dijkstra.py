@@ -58,6 +58,9 @@ class DijkstraSearch(GraphSearch):
                 path_found = True
             # in the neighbors
             for node in self.neighbors(cur.x, cur.y):
+                # cost grids mark impassable cells as infinite
+                if self.validity_check == "cost" and not self.valid(node):
+                    continue
                 # calculate the cost to reach that node
                 new_cost = cur.cost_to_come + self.edge_cost(cur, node)
                 # if we haven't already seen this node
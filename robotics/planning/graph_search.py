@@ -88,9 +88,13 @@ class GraphSearch:
     def valid(self, node: GridCell) -> bool:
         """
         Decides whether a node is valid or not, this can take multiple forms
+            "occupied" - only free cells, holding 0, are valid
+            "cost" - every cell of finite cost is valid, the weighted searches pay the cost of the cells they enter
         """
         if self.validity_check == "occupied":
             return self.grid[node.x, node.y] == 0
+        if self.validity_check == "cost":
+            return bool(np.isfinite(self.grid[node.x, node.y]))
 
     def display_path(self, path: List[GridCell]) -> None:
         """
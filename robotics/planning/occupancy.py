@@ -0,0 +1,132 @@
+import numpy as np
+from robotics.planning.graph_search import GridCell
+from robotics.pointcloud import PointCloud
+
+
+class OccupancyGrid:
+    """
+    2D / 2.5D grid rasterized from point clouds for the grid planners. Cell [i, j] covers x in origin[0] + [i, i + 1) * resolution and y in origin[1] + [j, j + 1) * resolution, the grid index order used by GridCell. Points outside the height band or the grid are ignored
+
+    Args:
+
+            shape - (rows, cols) number of cells along x and y
+            resolution - cell size
+            origin - (x, y) of the corner of cell [0, 0]
+            min_height - lowest z of the points kept
+            max_height - highest z of the points kept
+            frame - frame the clouds must be in, None accepts any cloud
+    """
+
+    def __init__(
+        self,
+        shape,
+        resolution,
+        origin=(0.0, 0.0),
+        min_height=-np.inf,
+        max_height=np.inf,
+        frame=None,
+    ) -> None:
+        self.shape = tuple(int(size) for size in shape)
+        self.resolution = resolution
+        self.origin = np.asarray(origin, dtype=float)
+        self.min_height = min_height
+        self.max_height = max_height
+        self.frame = frame
+        self.clear()
+
+    @classmethod
+    def from_pointcloud(cls, cloud, resolution, min_height=-np.inf, max_height=np.inf):
+        """
+        Grid just covering the points of a cloud in the height band, filled with that cloud
+        """
+        points = np.asarray(cloud.cloud)
+        band = (points[:, 2] >= min_height) & (points[:, 2] <= max_height)
+        low = points[band, :2].min(axis=0) if band.any() else np.zeros(2)
+        high = points[band, :2].max(axis=0) if band.any() else np.zeros(2)
+        shape = np.floor((high - low) / resolution).astype(int) + 1
+        grid = cls(shape, resolution, low, min_height, max_height, cloud.frame)
+        grid.insert(cloud)
+        return grid
+
+    def __repr__(self) -> str:
+        return "OccupancyGrid(shape={0}, resolution={1}, origin={2})".format(
+            self.shape, self.resolution, self.origin.tolist()
+        )
+
+    def clear(self) -> None:
+        """
+        Empties every cell
+        """
+        self.counts = np.zeros(self.shape, dtype=np.int64)
+        self.heights = np.full(self.shape, -np.inf)
+
+    def cells(self, points):
+        """
+        (N, 2) integer [i, j] cells of (N, 2) or (N, 3) points, they may lie outside the grid
+        """
+        points = np.asarray(points, dtype=float)
+        return np.floor((points[..., :2] - self.origin) / self.resolution).astype(int)
+
+    def cell(self, x, y) -> GridCell:
+        """
+        GridCell containing a position, for the start and goal of a search
+        """
+        i, j = self.cells([x, y])
+        return GridCell(int(i), int(j))
+
+    def position(self, i, j):
+        """
+        (x, y) of the centre of a cell
+        """
+        return self.origin + (np.array([i, j]) + 0.5) * self.resolution
+
+    def insert(self, cloud) -> None:
+        """
+        Adds the points of a PointCloud or (N, 3) array to the hit counts and the maximum height of their cells
+        """
+        if isinstance(cloud, PointCloud):
+            if self.frame is not None and cloud.frame is not None:
+                assert (
+                    cloud.frame == self.frame
+                ), "Cloud frame '{0}' does not match the grid frame '{1}'!".format(
+                    cloud.frame, self.frame
+                )
+            cloud = cloud.cloud
+        points = np.asarray(cloud)
+        assert points.ndim == 2 and points.shape[1] == 3, "Expected an (N, 3) array!"
+
+        height = points[:, 2]
+        cells = self.cells(points)
+        keep = (
+            (height >= self.min_height)
+            & (height <= self.max_height)
+            & np.all((cells >= 0) & (cells < self.shape), axis=1)
+        )
+        flat = np.ravel_multi_index(cells[keep].T, self.shape)
+
+        size = self.counts.size
+        self.counts += np.bincount(flat, minlength=size).reshape(self.shape)
+        np.maximum.at(self.heights.reshape(-1), flat, height[keep])
+
+    def occupancy(self, min_points=1):
+        """
+        Grid of 1 for cells holding at least min_points points and 0 for free cells, the "occupied" validity check of GraphSearch
+        """
+        return (self.counts >= min_points).astype(np.uint8)
+
+    def costs(self, max_cost=None, lethal=None):
+        """
+        Grid of hit counts, optionally clipped to max_cost, as traversal costs for DijkstraSearch and AStarSearch with validity_check="cost" and the "grid" metric, where entering a cell costs its value plus 1. Free cells cost 0 and cells holding at least lethal points are impassable
+        """
+        costs = self.counts.astype(float)
+        if max_cost is not None:
+            costs = np.minimum(costs, max_cost)
+        if lethal is not None:
+            costs[self.counts >= lethal] = np.inf
+        return costs
+
+    def height_map(self, empty=np.nan):
+        """
+        2.5D grid of the highest point in every cell, empty cells hold empty
+        """
+        return np.where(self.counts > 0, self.heights, empty)
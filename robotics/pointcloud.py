@@ -3,6 +3,44 @@ import numpy as np
 from mpl_toolkits.mplot3d import Axes3D
 
 import robotics
+from .spatial import KDTree, grid_neighbours, grid_nearest
+
+
+def _voxel_keys(voxels):
+    """
+    Packs (N, 3) integer voxel coordinates into one int64 key per point, falling back to row bytes when the grid is too large to pack
+    """
+    if len(voxels) == 0:
+        return np.zeros(0, dtype=np.int64)
+    low = voxels.min(axis=0)
+    span = voxels.max(axis=0) - low + 1
+    if np.prod(span.astype(float)) < 2**62:
+        shifted = voxels - low
+        keys = shifted[:, 0]
+        for axis in range(1, voxels.shape[1]):
+            keys = keys * span[axis] + shifted[:, axis]
+        return keys
+    return (
+        np.ascontiguousarray(voxels)
+        .view(np.dtype((np.void, voxels.dtype.itemsize * voxels.shape[1])))
+        .ravel()
+    )
+
+
+def _plane_normals(offsets, mask=None):
+    """
+    Unit normals of the planes through (M, K, 3) neighbour offsets, only the offsets where the optional (M, K) mask is set count
+    """
+    if mask is None:
+        counts = np.full((len(offsets), 1), offsets.shape[1])
+    else:
+        offsets = offsets * mask[:, :, None]
+        counts = np.maximum(mask.sum(axis=1), 1)[:, None]
+    mean = offsets.sum(axis=1) / counts
+    second = np.einsum("nki,nkj->nij", offsets, offsets) / counts[:, :, None]
+    covariance = second - mean[:, :, None] * mean[:, None, :]
+    # eigh sorts eigenvalues in ascending order, the first vector is the normal
+    return np.linalg.eigh(covariance)[1][:, :, 0]
 
 
 class PointCloud:
@@ -16,9 +54,46 @@ class PointCloud:
     """
 
     def __init__(self, cloud=None, frame=None):
-        if cloud is not None:
-            self.cloud = cloud
-            self.frame = frame
+        self.__index = None
+        self.cloud = cloud
+        self.frame = frame
+
+    @property
+    def cloud(self):
+        """
+        Nx3 array of points, assigning a new array drops the spatial index and the normals
+        """
+        return self.__cloud
+
+    @cloud.setter
+    def cloud(self, cloud):
+        self.__cloud = cloud
+        self.__index = None
+        # (N, 3) unit normals from estimate_normals, they belong to the old points
+        self.normals = None
+
+    @property
+    def spatial_index(self):
+        """
+        KDTree over the points, built on first use and kept until cloud is reassigned or transformed in place
+        """
+        if self.__index is None:
+            self.__index = KDTree(self.__cloud)
+        return self.__index
+
+    def nearest(self, points, k=1):
+        """
+        Distances and indices of the k points of the cloud nearest to each query point, see KDTree.query
+        """
+        return self.spatial_index.query(points, k=k)
+
+    def within(self, points, radius, return_distance=False):
+        """
+        Indices of the points of the cloud within radius of each query point, see KDTree.query_radius
+        """
+        return self.spatial_index.query_radius(
+            points, radius, return_distance=return_distance
+        )
 
     def __str__(self):
         return "Frame: {0}\n".format(self.frame) + str(self.cloud)
@@ -26,38 +101,253 @@ class PointCloud:
     def __repr__(self):
         return "PointCloud({0}, {1})".format(self.cloud, self.frame)
 
-    def transform(self, frame_from, frame_to, transform):
+    def transform(
+        self,
+        frame_from,
+        frame_to,
+        transform,
+        in_place=False,
+        out=None,
+        chunk_size=65536,
+    ):
         """
-        Transforms a point cloud according to the transform matrix and updates the frame member
+        Transforms a point cloud according to the transform matrix and updates the frame member. R p + t is applied directly in blocks of chunk_size points, so no homogeneous copy is made. The result keeps the dtype of a floating point cloud, in_place writes into this cloud and out takes an (N, 3) buffer for the result
         """
         if isinstance(transform, robotics.Transform):
             operator = transform.transform
         else:
-            operator = transform
+            operator = np.asarray(transform)
+
+        cloud = self.cloud
+        if in_place:
+            out = cloud
+        elif out is None:
+            dtype = cloud.dtype if np.issubdtype(cloud.dtype, np.floating) else float
+            out = np.empty(cloud.shape, dtype=dtype)
+        assert out.shape == cloud.shape, "Output buffer must match the cloud shape!"
+        if not np.issubdtype(out.dtype, np.floating):
+            raise TypeError(
+                "Transformed points need a floating point buffer, not {0}!".format(
+                    out.dtype
+                )
+            )
+
+        rot_t = operator[:3, :3].T.astype(out.dtype)
+        tran = operator[:3, 3].astype(out.dtype)
+        for start in range(0, len(cloud), chunk_size):
+            block = out[start : start + chunk_size]
+            # numpy buffers the block internally when writing over its own input
+            np.matmul(cloud[start : start + chunk_size], rot_t, out=block)
+            block += tran
+
+        normals = self.normals
+        if normals is not None:
+            normals = normals @ operator[:3, :3].T.astype(normals.dtype)
+
+        if in_place:
+            # the points moved, so the spatial index is dropped
+            self.cloud = out
+            self.normals = normals
+            self.frame = frame_to
+            return self
+        moved = PointCloud(cloud=out, frame=frame_to)
+        moved.normals = normals
+        return moved
+
+    def __voxelize(self, voxel_size):
+        """
+        Integer voxel of every point, the first point of each occupied voxel, the voxel of every point as an index into the occupied voxels and the points per occupied voxel
+        """
+        if not voxel_size > 0:
+            raise ValueError("Voxel size must be positive, not {0}!".format(voxel_size))
+        voxels = np.floor(self.cloud / voxel_size).astype(np.int64)
+        _, first, inverse, counts = np.unique(
+            _voxel_keys(voxels),
+            return_index=True,
+            return_inverse=True,
+            return_counts=True,
+        )
+        return voxels, first, inverse.ravel(), counts
+
+    def voxel_downsample(self, voxel_size, reduce="centroid"):
+        """
+        Keeps one point per occupied voxel of an axis aligned grid with cells of voxel_size. reduce picks the point: "centroid" averages the points in each voxel and "first" keeps the first point in cloud order
+        """
+        if reduce not in ("centroid", "first"):
+            raise ValueError("Unknown reduction '{0}'!".format(reduce))
+
+        cloud = self.cloud
+        _, first, inverse, counts = self.__voxelize(voxel_size)
+        if reduce == "first":
+            return PointCloud(cloud[first], frame=self.frame)
+
+        centroids = np.empty(
+            (len(first), cloud.shape[1]), dtype=np.result_type(cloud, np.float32)
+        )
+        for axis in range(cloud.shape[1]):
+            centroids[:, axis] = (
+                np.bincount(inverse, weights=cloud[:, axis], minlength=len(first))
+                / counts
+            )
+        return PointCloud(centroids, frame=self.frame)
+
+    def voxel_counts(self, voxel_size):
+        """
+        Centres of the occupied voxels of an axis aligned grid with cells of voxel_size as a PointCloud, and the number of points in each voxel
+        """
+        cloud = self.cloud
+        voxels, first, _, counts = self.__voxelize(voxel_size)
+        dtype = cloud.dtype if np.issubdtype(cloud.dtype, np.floating) else float
+        centres = ((voxels[first] + 0.5) * voxel_size).astype(dtype)
+        return PointCloud(centres, frame=self.frame), counts
+
+    def crop(self, lower, upper):
+        """
+        Keeps the points inside the axis aligned box from lower to upper, bounds included
+        """
+        cloud = self.cloud
+        inside = np.all(
+            (cloud >= np.asarray(lower)) & (cloud <= np.asarray(upper)), axis=1
+        )
+        cropped = PointCloud(cloud[inside], frame=self.frame)
+        if self.normals is not None:
+            cropped.normals = self.normals[inside]
+        return cropped
+
+    def __neighbour_cell(self, cloud, k):
+        """
+        Grid cell size at which a typical point shares its cell with about k points, so its k nearest neighbours lie in the 27 cells around it
+        """
+        extent = np.ptp(cloud, axis=0).max() if len(cloud) else 0.0
+        if extent == 0:
+            return 1.0
+        cell = extent / np.cbrt(len(cloud) / k)
+        for _ in range(3):
+            keys = _voxel_keys(np.floor(cloud / cell).astype(np.int64))
+            counts = np.unique(keys, return_counts=True)[1]
+            # averaged over points rather than cells, so dense regions set the size
+            typical = np.dot(counts, counts) / len(cloud)
+            # the square root settles quickly for both surfaces and volumes
+            cell *= np.sqrt(k / typical)
+        return cell
+
+    def __self_nearest(self, k, chunk_size):
+        """
+        Distances and indices of the k nearest neighbours of every point of the cloud, the point itself first. A voxel hash gathers the candidates and the KDTree only answers the points whose neighbours may reach past the hashed cells
+        """
+        cloud = np.asarray(self.cloud, dtype=float)
+        distances, indices, unsure = grid_nearest(
+            cloud, k, self.__neighbour_cell(cloud, k), max_entries=chunk_size * 64
+        )
+        if unsure.any():
+            distances[unsure], indices[unsure] = self.nearest(cloud[unsure], k=k)
+        return distances, indices
+
+    def estimate_normals(
+        self, k=16, radius=None, viewpoint=(0.0, 0.0, 0.0), chunk_size=65536
+    ):
+        """
+        Estimates a unit normal at every point from the covariance of its k nearest neighbours, or of all neighbours within radius when it is given. Normals point towards the viewpoint, they are stored in PointCloud.normals and returned
+        """
+        cloud = np.asarray(self.cloud, dtype=float)
+        normals = np.empty(cloud.shape)
+        if radius is None:
+            _, neighbours = self.__self_nearest(min(k, len(cloud)), chunk_size)
+            for start in range(0, len(cloud), chunk_size):
+                # centred on the query point to keep the sums well conditioned
+                offsets = np.take(cloud, neighbours[start : start + chunk_size], axis=0)
+                offsets -= cloud[start : start + chunk_size, None, :]
+                normals[start : start + chunk_size] = _plane_normals(offsets)
+        else:
+            covered = np.zeros(len(cloud), dtype=bool)
+            # with cells of the radius every neighbour lies in the 27 cells around a point
+            for rows, candidates, valid in grid_neighbours(
+                cloud, radius, max_entries=chunk_size * 64
+            ):
+                offsets = np.take(cloud, np.maximum(candidates, 0), axis=0)
+                offsets -= cloud[rows, None, :]
+                inside = valid & (
+                    np.einsum("ijk,ijk->ij", offsets, offsets) <= radius**2
+                )
+                normals[rows] = _plane_normals(offsets, inside)
+                covered[rows] = True
+            if not covered.all():
+                # grids too large to hash fall back to the spatial index
+                rows = np.flatnonzero(~covered)
+                found = self.within(cloud[rows], radius)
+                counts = np.array([len(f) for f in found])
+                width = max(counts.max(), 1)
+                padded = np.zeros((len(rows), width), dtype=int)
+                inside = np.arange(width) < counts[:, None]
+                padded[inside] = np.concatenate(found)
+                offsets = np.take(cloud, padded, axis=0) - cloud[rows, None, :]
+                normals[rows] = _plane_normals(offsets, inside)
 
-        # add the homogenous coord
-        print(self.cloud.shape)
-        homog = np.hstack((self.cloud, np.ones((self.cloud.shape[0], 1)))).T
-        print(homog.shape)
-        newCloud = (operator @ homog)[:-1, :].T
-        return PointCloud(cloud=newCloud, frame=frame_to)
+        facing = np.einsum("ij,ij->i", normals, np.asarray(viewpoint) - cloud) < 0
+        normals[facing] *= -1
+        self.normals = normals
+        return normals
 
-    def plot(self, color="b", axes_lim=3, global_frame=False):
+    def remove_outliers(self, k=16, std_ratio=2.0, chunk_size=65536):
         """
-        Plots the cloud for visualization in its frame
+        Statistical outlier removal, points whose mean distance to their k nearest neighbours is more than std_ratio standard deviations above the average are dropped. Returns the filtered PointCloud and the boolean mask of kept points
         """
-        fig = plt.figure()
-        ax = plt.subplot(111, projection="3d")
+        if len(self.cloud) < 2:
+            # no neighbours to compare against, every point is kept
+            keep = np.ones(len(self.cloud), dtype=bool)
+        else:
+            # the nearest neighbour of every point is itself
+            distances, _ = self.__self_nearest(min(k + 1, len(self.cloud)), chunk_size)
+            mean_distance = distances[:, 1:].mean(axis=1)
+            limit = mean_distance.mean() + std_ratio * mean_distance.std()
+            keep = mean_distance <= limit
+
+        filtered = PointCloud(self.cloud[keep], frame=self.frame)
+        if self.normals is not None:
+            filtered.normals = self.normals[keep]
+        return filtered, keep
+
+    def plot(
+        self,
+        color="b",
+        axes_lim=3,
+        global_frame=False,
+        max_points=20000,
+        voxel_size=None,
+        detached=False,
+        axis_obj=None,
+        artist=None,
+    ):
+        """
+        Plots the cloud for visualization in its frame. Large clouds are thinned for display, first to one point per voxel_size voxel when it is given and then by an even stride down to max_points (None keeps every point). Returns the scatter artist, passing it back as artist moves its points without rebuilding the figure
+        """
+        cloud = self.cloud
+        if voxel_size is not None:
+            cloud = self.voxel_downsample(voxel_size, reduce="first").cloud
+        if max_points is not None and len(cloud) > max_points:
+            cloud = cloud[:: -(-len(cloud) // max_points)]
 
         # plot the cloud
-        x = self.cloud[:, 0]
-        y = self.cloud[:, 1]
-        z = self.cloud[:, 2]
+        x = cloud[:, 0]
+        y = cloud[:, 1]
+        z = cloud[:, 2]
+
+        if artist is not None:
+            # live update of an existing scatter, x and y are the offsets and z the depth
+            artist.set_offsets(np.column_stack((x, y)))
+            artist.set_3d_properties(z, "z")
+            return artist
+
+        if not detached:
+            fig = plt.figure()
+            axis_obj = plt.subplot(111, projection="3d")
 
         # adjust adxes scaling
-        ax.set_xlim3d(-axes_lim, axes_lim)
-        ax.set_ylim3d(-axes_lim, axes_lim)
-        ax.set_zlim3d(-axes_lim, axes_lim)
+        axis_obj.set_xlim3d(-axes_lim, axes_lim)
+        axis_obj.set_ylim3d(-axes_lim, axes_lim)
+        axis_obj.set_zlim3d(-axes_lim, axes_lim)
 
-        ax.scatter(x, y, z, color=color)
-        plt.show()
+        artist = axis_obj.scatter(x, y, z, color=color)
+        if not detached:
+            plt.show()
+        return artist
@@ -0,0 +1,285 @@
+import os
+
+import numpy as np
+from numpy.lib import recfunctions
+from .pointcloud import PointCloud
+
+# PLY property types and PCD (TYPE, SIZE) pairs as numpy type codes
+PLY_TYPES = {
+    "char": "i1",
+    "int8": "i1",
+    "uchar": "u1",
+    "uint8": "u1",
+    "short": "i2",
+    "int16": "i2",
+    "ushort": "u2",
+    "uint16": "u2",
+    "int": "i4",
+    "int32": "i4",
+    "uint": "u4",
+    "uint32": "u4",
+    "float": "f4",
+    "float32": "f4",
+    "double": "f8",
+    "float64": "f8",
+}
+PCD_TYPES = {"F": "f", "I": "i", "U": "u"}
+
+# header fields patched on close are padded to this width so the header size never changes
+COUNT_WIDTH = 20
+# the (start, end) point range of every written frame is kept next to the file
+FRAMES_SUFFIX = ".frames.npy"
+
+
+def _read_header(path, terminator, limit=65536):
+    """
+    Reads the text header of a file up to and including the terminating line, returns the lines and the byte offset of the data
+    """
+    lines = []
+    offset = 0
+    with open(path, "rb") as source:
+        while offset < limit:
+            line = source.readline()
+            if not line:
+                break
+            offset += len(line)
+            text = line.decode("ascii", errors="replace").strip()
+            lines.append(text)
+            if text.startswith(terminator):
+                return lines, offset
+    raise ValueError("No '{0}' line in the header of {1}!".format(terminator, path))
+
+
+def _xyz_view(records):
+    """
+    Zero-copy (N, 3) view of the x, y, z fields of a structured array, the fields must share one type and be evenly spaced for the view to exist
+    """
+    for field in "xyz":
+        if field not in records.dtype.names:
+            raise ValueError("The point records have no '{0}' field!".format(field))
+    kinds = {records.dtype.fields[field][0] for field in "xyz"}
+    if len(kinds) != 1:
+        raise ValueError(
+            "The x, y, z fields must share one type to be viewed, not {0}!".format(
+                sorted(kind.str for kind in kinds)
+            )
+        )
+    view = recfunctions.structured_to_unstructured(records[["x", "y", "z"]], copy=False)
+    # structured_to_unstructured silently packs a copy when the fields are not evenly spaced
+    if len(records) and not np.shares_memory(view, records):
+        raise ValueError(
+            "The x, y, z fields must be evenly spaced in the records to be viewed!"
+        )
+    return view
+
+
+def load_npy(path, frame=None):
+    """
+    Memory maps an (N, 3) or wider .npy array, the cloud is a view of the first three columns
+    """
+    points = np.load(path, mmap_mode="r")
+    assert points.ndim == 2 and points.shape[1] >= 3, "Expected an (N, 3) array!"
+    return PointCloud(points[:, :3], frame=frame)
+
+
+def load_ply(path, frame=None):
+    """
+    Memory maps the vertices of a binary PLY file, the cloud is a view of the x, y, z properties
+    """
+    lines, offset = _read_header(path, "end_header")
+    if not lines or lines[0] != "ply":
+        raise ValueError("{0} is not a PLY file!".format(path))
+
+    byte_order, count, fields, element = None, 0, [], None
+    for line in lines[1:]:
+        words = line.split()
+        if not words:
+            continue
+        if words[0] == "format":
+            if words[1] == "ascii":
+                raise ValueError("Only binary PLY files can be memory mapped!")
+            byte_order = "<" if words[1] == "binary_little_endian" else ">"
+        elif words[0] == "element":
+            element = words[1]
+            if element == "vertex":
+                count = int(words[2])
+            elif not fields:
+                raise ValueError(
+                    "The vertex element must come first in {0}!".format(path)
+                )
+        elif words[0] == "property" and element == "vertex":
+            if words[1] == "list":
+                raise ValueError("List properties are not supported on vertices!")
+            fields.append((words[2], byte_order + PLY_TYPES[words[1]]))
+
+    records = np.memmap(
+        path, dtype=np.dtype(fields), mode="r", offset=offset, shape=(count,)
+    )
+    return PointCloud(_xyz_view(records), frame=frame)
+
+
+def load_pcd(path, frame=None):
+    """
+    Memory maps a binary PCD file, the cloud is a view of the x, y, z fields
+    """
+    lines, offset = _read_header(path, "DATA")
+    header = {}
+    for line in lines:
+        words = line.split()
+        if words and not words[0].startswith("#"):
+            header[words[0]] = words[1:]
+
+    if header["DATA"][0] != "binary":
+        raise ValueError(
+            "Only binary PCD files can be memory mapped, not {0}!".format(
+                header["DATA"][0]
+            )
+        )
+
+    counts = header.get("COUNT", ["1"] * len(header["FIELDS"]))
+    fields = []
+    for name, size, kind, count in zip(
+        header["FIELDS"], header["SIZE"], header["TYPE"], counts
+    ):
+        dtype = "<" + PCD_TYPES[kind] + size
+        fields.append(
+            (name, dtype) if int(count) == 1 else (name, dtype, (int(count),))
+        )
+    count = int(header["POINTS"][0])
+
+    records = np.memmap(
+        path, dtype=np.dtype(fields), mode="r", offset=offset, shape=(count,)
+    )
+    return PointCloud(_xyz_view(records), frame=frame)
+
+
+LOADERS = {".npy": load_npy, ".ply": load_ply, ".pcd": load_pcd}
+
+
+def load_pointcloud(path, frame=None):
+    """
+    Memory maps a .npy, binary .ply or binary .pcd file into a PointCloud whose cloud views the file without reading it
+    """
+    extension = os.path.splitext(os.fspath(path))[1].lower()
+    if extension not in LOADERS:
+        raise ValueError("Unsupported point cloud file '{0}'!".format(path))
+    return LOADERS[extension](path, frame=frame)
+
+
+def load_frames(path, frame=None):
+    """
+    Memory maps a file written by PointCloudWriter into one PointCloud per written cloud, each a view of its range of the file. Files without a frame index load as a single cloud
+    """
+    cloud = load_pointcloud(path, frame=frame)
+    index = os.fspath(path) + FRAMES_SUFFIX
+    if not os.path.exists(index):
+        return [cloud]
+
+    ranges = np.load(index)
+    if ranges.size and (ranges.min() < 0 or ranges.max() > len(cloud.cloud)):
+        raise ValueError(
+            "The frame index of {0} does not match its {1} points!".format(
+                path, len(cloud.cloud)
+            )
+        )
+    return [PointCloud(cloud.cloud[start:end], frame=frame) for start, end in ranges]
+
+
+class PointCloudWriter:
+    """
+    Streams point clouds into one .npy, binary .ply or binary .pcd file. Every write appends its points to the file, so only the clouds being written are held in memory, and the point count in the header is filled in on close. The point range of every write is saved to path + ".frames.npy" on close for load_frames
+
+    Args:
+
+            path - file to write, the extension selects the format
+            dtype - float32 or float64 type of the stored coordinates
+    """
+
+    def __init__(self, path, dtype=np.float32):
+        self.path = os.fspath(path)
+        self.format = os.path.splitext(self.path)[1].lower()
+        if self.format not in LOADERS:
+            raise ValueError("Unsupported point cloud file '{0}'!".format(path))
+        if np.dtype(dtype).kind != "f" or np.dtype(dtype).itemsize not in (4, 8):
+            raise ValueError(
+                "Points can only be stored as float32 or float64, not {0}!".format(
+                    np.dtype(dtype)
+                )
+            )
+        self.dtype = np.dtype(dtype).newbyteorder("<")
+        self.count = 0
+        self.frames = []
+
+        # an index left by an earlier file at this path no longer describes it
+        if os.path.exists(self.path + FRAMES_SUFFIX):
+            os.remove(self.path + FRAMES_SUFFIX)
+        self.__file = open(self.path, "wb")
+        self.__file.write(self.__header(0))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __header(self, count):
+        """
+        Header for the given number of points, always the same length
+        """
+        number = str(count).ljust(COUNT_WIDTH)
+        if self.format == ".ply":
+            kind = "float" if self.dtype.itemsize == 4 else "double"
+            return (
+                "ply\nformat binary_little_endian 1.0\n"
+                "element vertex {0}\n"
+                "property {1} x\nproperty {1} y\nproperty {1} z\n"
+                "end_header\n".format(number, kind)
+            ).encode("ascii")
+
+        if self.format == ".pcd":
+            return (
+                "# .PCD v0.7 - Point Cloud Data file format\nVERSION 0.7\n"
+                "FIELDS x y z\nSIZE {1} {1} {1}\nTYPE F F F\nCOUNT 1 1 1\n"
+                "WIDTH {0}\nHEIGHT 1\nVIEWPOINT 0 0 0 1 0 0 0\nPOINTS {0}\n"
+                "DATA binary\n".format(number, self.dtype.itemsize)
+            ).encode("ascii")
+
+        # npy version 1.0, the dictionary is padded so the data starts 64 byte aligned
+        header = (
+            "{{'descr': '{0}', 'fortran_order': False, 'shape': ({1}, 3), }}".format(
+                self.dtype.str, number
+            )
+        )
+        length = 64 * ((10 + len(header) + 1 + 63) // 64) - 10
+        header = header.ljust(length - 1) + "\n"
+        return (
+            b"\x93NUMPY\x01\x00" + np.uint16(length).tobytes() + header.encode("latin1")
+        )
+
+    def write(self, cloud):
+        """
+        Appends a PointCloud or (N, 3) array, returns the (start, end) range of its points in the file
+        """
+        if isinstance(cloud, PointCloud):
+            cloud = cloud.cloud
+        points = np.ascontiguousarray(cloud, dtype=self.dtype)
+        assert points.ndim == 2 and points.shape[1] == 3, "Expected an (N, 3) array!"
+
+        self.__file.write(points.tobytes())
+        start = self.count
+        self.count += len(points)
+        self.frames.append((start, self.count))
+        return start, self.count
+
+    def close(self):
+        """
+        Writes the final point count into the header, closes the file and saves the frame index
+        """
+        if self.__file.closed:
+            return
+        self.__file.seek(0)
+        self.__file.write(self.__header(self.count))
+        self.__file.close()
+        # np.save would append .npy to a path without it, write through a file object
+        with open(self.path + FRAMES_SUFFIX, "wb") as index:
+            np.save(index, np.array(self.frames, dtype=np.int64).reshape(-1, 2))
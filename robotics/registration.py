@@ -0,0 +1,154 @@
+import numpy as np
+from .transform import Transform
+from .joint import REVOLUTE, joint_transforms
+
+ICP_METHODS = ("point_to_point", "point_to_plane")
+
+
+def _best_fit(source, target):
+    """
+    Least squares rigid transform taking (N, 3) source points onto (N, 3) target points, Kabsch / Umeyama with the SVD
+    """
+    source_mean, target_mean = source.mean(axis=0), target.mean(axis=0)
+    covariance = (source - source_mean).T @ (target - target_mean)
+    u, _, vt = np.linalg.svd(covariance)
+    # flip the last axis if the fit would be a reflection
+    sign = np.sign(np.linalg.det(vt.T @ u.T))
+    rot = vt.T @ np.diag([1.0, 1.0, sign]) @ u.T
+
+    best = np.eye(4)
+    best[:3, :3] = rot
+    best[:3, 3] = target_mean - rot @ source_mean
+    return best
+
+
+def _plane_step(source, target, normals):
+    """
+    One linearized point to plane step, the small motion (rotation vector, translation) minimizing the distances along the target normals
+    """
+    residual = np.einsum("ij,ij->i", source - target, normals)
+    jacobian = np.hstack((np.cross(source, normals), normals))
+    hessian = jacobian.T @ jacobian
+    gradient = jacobian.T @ residual
+    try:
+        step = -np.linalg.solve(hessian, gradient)
+    except np.linalg.LinAlgError:
+        step = -np.linalg.lstsq(hessian, gradient, rcond=None)[0]
+
+    angle = np.linalg.norm(step[:3])
+    axis = step[:3] / angle if angle > 0 else np.array([0.0, 0.0, 1.0])
+    motion = joint_transforms([REVOLUTE], axis[None], [angle])[0]
+    motion[:3, 3] = step[3:]
+    return motion
+
+
+def icp(
+    source,
+    target,
+    initial=None,
+    method="point_to_point",
+    target_normals=None,
+    max_iterations=30,
+    tolerance=1e-6,
+    max_distance=np.inf,
+    voxel_sizes=None,
+):
+    """
+    Iterative closest point registration of a source PointCloud onto a target PointCloud. Returns the Transform taking source points into the target frame (parent = target frame, child = source frame) and a dictionary of statistics
+
+    Args:
+
+            initial - Transform or 4x4 guess of the source to target transform
+            method - "point_to_point" (SVD fit) or "point_to_plane" (linearized fit along target_normals)
+            target_normals - (N, 3) unit normals of the target points for point_to_plane, the target's normals or estimated ones by default
+            max_iterations - iteration limit per pyramid level
+            tolerance - stop once the RMS error changes by less than this
+            max_distance - correspondences further apart than this are ignored
+            voxel_sizes - optional coarse to fine voxel sizes of a downsampling pyramid, None for full resolution
+    """
+    if method not in ICP_METHODS:
+        raise ValueError("Unknown ICP method '{0}'!".format(method))
+    if method == "point_to_plane" and target_normals is None:
+        target_normals = target.normals
+        if target_normals is None:
+            target_normals = target.estimate_normals()
+
+    if initial is None:
+        estimate = np.eye(4)
+    elif isinstance(initial, Transform):
+        estimate = initial.transform.copy()
+    else:
+        estimate = np.array(initial, dtype=float)
+
+    if voxel_sizes is None:
+        voxel_sizes = [None]
+
+    info = {"iterations": 0, "converged": False, "rmse": np.inf, "fitness": 0.0}
+    info["levels"] = []
+    for voxel_size in voxel_sizes:
+        level_source, level_target, normals = source, target, target_normals
+        if voxel_size is not None:
+            level_source = source.voxel_downsample(voxel_size)
+            level_target = target.voxel_downsample(voxel_size)
+            if normals is not None:
+                # the full resolution normal nearest to each voxel centroid
+                normals = normals[target.nearest(level_target.cloud)[1][:, 0]]
+
+        estimate, level = _icp_level(
+            np.asarray(level_source.cloud, dtype=float),
+            level_target,
+            normals,
+            estimate,
+            method,
+            max_iterations,
+            tolerance,
+            max_distance,
+        )
+        level["voxel_size"] = voxel_size
+        info["levels"].append(level)
+        info["iterations"] += level["iterations"]
+
+    info.update(
+        {key: info["levels"][-1][key] for key in ("converged", "rmse", "fitness")}
+    )
+    return (
+        Transform(transform=estimate, parent=target.frame, child=source.frame),
+        info,
+    )
+
+
+def _icp_level(
+    points, target, normals, estimate, method, max_iterations, tolerance, max_distance
+):
+    """
+    Runs ICP at one resolution, the target's cached spatial index gives the correspondences
+    """
+    target_points = np.asarray(target.cloud, dtype=float)
+    previous = np.inf
+    level = {"iterations": 0, "converged": False, "rmse": np.inf, "fitness": 0.0}
+    for iteration in range(1, max_iterations + 1):
+        moved = points @ estimate[:3, :3].T + estimate[:3, 3]
+        distance, match = target.nearest(moved)
+        distance, match = distance[:, 0], match[:, 0]
+        inliers = distance <= max_distance
+        if np.count_nonzero(inliers) < 3:
+            break
+
+        if method == "point_to_point":
+            estimate = _best_fit(points[inliers], target_points[match[inliers]])
+        else:
+            step = _plane_step(
+                moved[inliers],
+                target_points[match[inliers]],
+                normals[match[inliers]],
+            )
+            estimate = step @ estimate
+
+        rmse = np.sqrt(np.mean(distance[inliers] ** 2))
+        level.update(iterations=iteration, rmse=rmse, fitness=np.mean(inliers).item())
+        if abs(previous - rmse) < tolerance:
+            level["converged"] = True
+            break
+        previous = rmse
+
+    return estimate, level
@@ -1,5 +1,6 @@
 import numpy as np
 from .transform import Transform
+from .spatial import KDTree
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
 
@@ -12,6 +13,7 @@ class RigidCollection:
     def __init__(self, collection=None, name=None):
         self.collection = []
         self.name = None
+        self.__assemble_collection_dict()
 
         if collection is not None:
             self.collection = collection
@@ -24,15 +26,198 @@ class RigidCollection:
         """
         Adds transforms to the collection
         """
-        for t in transforms:
-            # check to see if there's a duplicate already in the collection
-            # for example if naming a transform already added to the collection
-            if t not in self.collection:
-                self.collection.append(t)
-            # reassemble the collection dictionary
-            self.__assemble_collection_dict()
+        self.add_many(transforms)
         return self.collection
 
+    def add_many(self, transforms, dedup="equal", tolerance=1e-6):
+        """
+        Adds transforms in bulk, updating the name index incrementally. Returns the transforms that were added
+
+        dedup selects which transforms count as already present
+            "equal" - equal to a transform with the same name, parent and child, as in add
+            "name" - any transform with the same name, unnamed transforms are always added
+            "pose" - same parent and child and the same matrix once quantized to tolerance
+            None - nothing is skipped
+        """
+        if dedup not in ("equal", "name", "pose", None):
+            raise ValueError("Unknown dedup mode '{0}'!".format(dedup))
+
+        transforms = list(transforms)
+        if dedup == "pose":
+            keys = self.__pose_keys(transforms, tolerance)
+            if self.__pose_index is None or self.__pose_index[0] != tolerance:
+                existing = self.__pose_keys(self.collection, tolerance)
+                self.__pose_index = (tolerance, set(existing))
+            seen = self.__pose_index[1]
+        # stacked matrices of every bucket touched by this call, grown as transforms are added
+        stacks = {}
+
+        added = []
+        for i, t in enumerate(transforms):
+            key = (t.name, t.parent, t.child)
+            bucket = self.__buckets.setdefault(key, [])
+            if dedup == "equal":
+                # only transforms with the same name and frames can be equal
+                if key not in stacks:
+                    # transforms renamed or moved to other frames since they were added no longer match
+                    stacks[key] = self.__stack(
+                        [
+                            other
+                            for other in bucket
+                            if (other.name, other.parent, other.child) == key
+                        ]
+                    )
+                matrices, count = stacks[key]
+                # the comparison of Transform.__eq__ against the whole bucket at once
+                if (
+                    count
+                    and np.isclose(t.transform, matrices[:count]).all(axis=(1, 2)).any()
+                ):
+                    continue
+                if count == len(matrices):
+                    matrices = np.concatenate((matrices, np.empty_like(matrices)))
+                matrices[count] = t.transform
+                stacks[key] = (matrices, count + 1)
+            elif dedup == "name":
+                if t.name is not None and t.name in self.coll_dict:
+                    continue
+            elif dedup == "pose":
+                if keys[i] in seen:
+                    continue
+                seen.add(keys[i])
+
+            self.collection.append(t)
+            bucket.append(t)
+            self.__keys.setdefault(id(t), []).append(key)
+            if t.name is not None:
+                self.coll_dict[t.name] = t
+            added.append(t)
+
+        if dedup != "pose" and added:
+            self.__pose_index = None
+        if self.__spatial is not None and added:
+            self.__spatial.add([t.transform[:3, 3] for t in added])
+        return added
+
+    def remove(self, transform):
+        """
+        Removes a transform, given by name or by object, and returns it
+        """
+        target = self.__named(transform) if isinstance(transform, str) else transform
+        position = self.__position(target)
+        del self.collection[position]
+
+        self.__unindex(target)
+        self.__pose_index = None
+        self.__spatial = None
+        return target
+
+    def replace(self, name, transform):
+        """
+        Replaces the named transform with a new one in the same position, returns the old transform
+        """
+        target = self.__named(name)
+        position = self.__position(target)
+        self.collection[position] = transform
+
+        self.__unindex(target)
+        key = (transform.name, transform.parent, transform.child)
+        self.__buckets.setdefault(key, []).append(transform)
+        self.__keys.setdefault(id(transform), []).append(key)
+        if transform.name is not None:
+            self.coll_dict[transform.name] = transform
+        self.__pose_index = None
+        self.__spatial = None
+        return target
+
+    @property
+    def spatial_index(self):
+        """
+        KDTree over the origins of the transforms in collection order, built on first use and extended by add and add_many. Transforms moved in place are only seen after remove, replace or rebuild_spatial_index
+        """
+        if self.__spatial is None:
+            origins = [t.transform[:3, 3] for t in self.collection]
+            self.__spatial = KDTree(np.reshape(origins, (-1, 3)))
+        return self.__spatial
+
+    def rebuild_spatial_index(self):
+        """
+        Drops the spatial index so it is rebuilt from the current origins on the next query
+        """
+        self.__spatial = None
+
+    def nearest(self, points, k=1):
+        """
+        Distances and collection indices of the k transforms whose origins are nearest to each point, see KDTree.query
+        """
+        return self.spatial_index.query(points, k=k)
+
+    def within(self, points, radius):
+        """
+        Collection indices of the transforms whose origins lie within radius of each point, see KDTree.query_radius
+        """
+        return self.spatial_index.query_radius(points, radius)
+
+    def __named(self, name):
+        """
+        Transform with the given name, raising a KeyError even when no transform has a name
+        """
+        if name not in self.coll_dict:
+            raise KeyError("{0} is not in the RigidCollection!".format(name))
+        return self.coll_dict[name]
+
+    def __position(self, target):
+        """
+        Index of a transform in the collection by identity, avoiding the allclose comparisons of list.index
+        """
+        for i, t in enumerate(self.collection):
+            if t is target:
+                return i
+        raise KeyError("{0} is not in the RigidCollection!".format(target.name))
+
+    def __unindex(self, target):
+        """
+        Drops one entry of a transform that left the collection from the name index and its bucket, found by the name and frames it was added with since it may have been renamed since
+        """
+        keys = self.__keys[id(target)]
+        key = keys.pop()
+        if not keys:
+            del self.__keys[id(target)]
+        bucket = self.__buckets[key]
+        del bucket[next(i for i, t in enumerate(bucket) if t is target)]
+        if not bucket:
+            del self.__buckets[key]
+
+        name = key[0]
+        if name is not None and self.coll_dict.get(name) is target:
+            del self.coll_dict[name]
+            # an earlier transform with the same name takes its place, like the full rebuild
+            for t in reversed(self.collection):
+                if t.name == name:
+                    self.coll_dict[name] = t
+                    break
+
+    @staticmethod
+    def __stack(transforms):
+        """
+        (capacity, 4, 4) buffer holding the matrices of the transforms, and their count
+        """
+        matrices = np.empty((max(2 * len(transforms), 8), 4, 4))
+        if transforms:
+            matrices[: len(transforms)] = [t.transform for t in transforms]
+        return matrices, len(transforms)
+
+    @staticmethod
+    def __pose_keys(transforms, tolerance):
+        """
+        Hashable keys of the frames and the quantized matrix of every transform
+        """
+        if len(transforms) == 0:
+            return []
+        matrices = np.stack([t.transform[:3] for t in transforms])
+        quantized = np.round(matrices / tolerance).astype(np.int64)
+        return [(t.parent, t.child, q.tobytes()) for t, q in zip(transforms, quantized)]
+
     def plot(
         self,
         axes_lim=5,
@@ -111,11 +296,22 @@ class RigidCollection:
         Assembles a hash table of transforms that uses the transform's name as the key for quick searches
         """
         self.coll_dict = {}
+        # transforms grouped by name and frames, equal transforms share a group
+        self.__buckets = {}
+        # the bucket keys every transform was added with, by identity
+        self.__keys = {}
+        # quantized pose keys, built on the first pose dedup
+        self.__pose_index = None
+        # KDTree over the origins, built on the first spatial query
+        self.__spatial = None
         # traverse the list and create a dictionary
         for t in self.collection:
             name = t.name
             if name is not None:
                 self.coll_dict[t.name] = t
+            key = (t.name, t.parent, t.child)
+            self.__buckets.setdefault(key, []).append(t)
+            self.__keys.setdefault(id(t), []).append(key)
 
     def status(self):
         print("_" * 10)
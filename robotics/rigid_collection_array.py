@@ -0,0 +1,195 @@
+import numpy as np
+from .transform import Transform
+from .transform_array import TransformArray
+
+
+def _grow(column, capacity, size):
+    """
+    Copies the first size entries of an object column into a larger one
+    """
+    grown = np.empty(capacity, dtype=object)
+    grown[:size] = column[:size]
+    return grown
+
+
+class RigidCollectionArray:
+    """
+    A columnar collection of transforms, poses live in one (N, 4, 4) array next to arrays of names, parents and children. Indexing returns Transform views into the array, so vectorized queries never loop over Python objects
+
+    Args:
+
+            transforms - list of Transform objects, RigidCollection or (N, 4, 4) array
+            names - names of the transforms when given as an array
+            parents - parent frames of the transforms when given as an array
+            children - child frames of the transforms when given as an array
+            name - name of the collection
+    """
+
+    def __init__(
+        self, transforms=None, names=None, parents=None, children=None, name=None
+    ):
+        self.name = name
+        self.__size = 0
+        self.__buffer = np.zeros((0, 4, 4))
+        self.__names = np.empty(0, dtype=object)
+        self.__parents = np.empty(0, dtype=object)
+        self.__children = np.empty(0, dtype=object)
+        self.index = {}
+
+        if transforms is not None:
+            self.add_many(transforms, names=names, parents=parents, children=children)
+
+    @classmethod
+    def from_collection(cls, collection):
+        """
+        Copies a RigidCollection into columnar storage
+        """
+        return cls(collection.collection, name=collection.name)
+
+    def to_collection(self):
+        """
+        RigidCollection of Transform views into this collection
+        """
+        from .rigid_collection import RigidCollection
+
+        return RigidCollection(list(self), name=self.name)
+
+    def __len__(self):
+        return self.__size
+
+    def __iter__(self):
+        for i in range(self.__size):
+            yield self[i]
+
+    def __getitem__(self, index):
+        # integers and names return a Transform viewing into the pose array
+        if isinstance(index, str):
+            return self.lookup(index)
+        if isinstance(index, (int, np.integer)):
+            if not -self.__size <= index < self.__size:
+                raise IndexError("RigidCollectionArray index out of range!")
+            index = index % self.__size
+            return Transform(
+                transform=self.__buffer[index],
+                parent=self.__parents[index],
+                child=self.__children[index],
+                name=self.__names[index],
+            )
+
+        return RigidCollectionArray(
+            self.transforms[index],
+            names=self.names[index],
+            parents=self.parents[index],
+            children=self.children[index],
+            name=self.name,
+        )
+
+    def __repr__(self):
+        return "RigidCollectionArray(n={0}, name='{1}')".format(len(self), self.name)
+
+    @property
+    def transforms(self):
+        """
+        (N, 4, 4) view of the poses
+        """
+        return self.__buffer[: self.__size]
+
+    @property
+    def origins(self):
+        """
+        (N, 3) view of the translations
+        """
+        return self.__buffer[: self.__size, :3, 3]
+
+    @property
+    def rotations(self):
+        """
+        (N, 3, 3) view of the rotation blocks
+        """
+        return self.__buffer[: self.__size, :3, :3]
+
+    @property
+    def names(self):
+        return self.__names[: self.__size]
+
+    @property
+    def parents(self):
+        return self.__parents[: self.__size]
+
+    @property
+    def children(self):
+        return self.__children[: self.__size]
+
+    def add(self, *transforms):
+        """
+        Adds Transform objects to the collection
+        """
+        self.add_many(transforms)
+
+    def add_many(self, transforms, names=None, parents=None, children=None):
+        """
+        Appends transforms in bulk, either Transform objects or an (M, 4, 4) array with optional name, parent and child arrays. Growing the storage moves the pose array, so Transform views taken earlier stop following the collection
+        """
+        if hasattr(transforms, "collection"):
+            transforms = transforms.collection
+
+        if isinstance(transforms, (list, tuple)):
+            transforms = list(transforms)
+            names = [t.name for t in transforms]
+            parents = [t.parent for t in transforms]
+            children = [t.child for t in transforms]
+        matrices = TransformArray(transforms).transforms
+
+        count = len(matrices)
+        start, end = self.__size, self.__size + count
+        self.__reserve(end)
+        self.__buffer[start:end] = matrices
+        for column, values in (
+            (self.__names, names),
+            (self.__parents, parents),
+            (self.__children, children),
+        ):
+            column[start:end] = None if values is None else list(values)
+        self.__size = end
+
+        for i in range(start, end):
+            if self.__names[i] is not None:
+                self.index[self.__names[i]] = i
+
+    def __reserve(self, size):
+        """
+        Grows the storage geometrically so repeated appends stay amortized O(1)
+        """
+        capacity = len(self.__buffer)
+        if size <= capacity:
+            return
+
+        capacity = max(size, 2 * capacity, 16)
+        buffer = np.zeros((capacity, 4, 4))
+        buffer[: self.__size] = self.__buffer[: self.__size]
+        self.__buffer = buffer
+        self.__names = _grow(self.__names, capacity, self.__size)
+        self.__parents = _grow(self.__parents, capacity, self.__size)
+        self.__children = _grow(self.__children, capacity, self.__size)
+
+    def lookup(self, name):
+        """
+        Uses the name index to return a Transform view of the named transform
+        """
+        try:
+            return self[self.index[name]]
+        except KeyError:
+            raise KeyError("{0} is not in the RigidCollectionArray!".format(name))
+
+    def within(self, point, radius):
+        """
+        Transforms whose origin lies within radius of a point
+        """
+        distance = np.linalg.norm(self.origins - np.asarray(point, dtype=float), axis=1)
+        return self[np.flatnonzero(distance <= radius)]
+
+    def poses(self):
+        """
+        (N, 6) array of x, y, z, roll, pitch, yaw of every transform
+        """
+        return TransformArray(self.transforms).inverse_pose()
@@ -0,0 +1,180 @@
+import hashlib
+import os
+import tempfile
+import zipfile
+import xml.etree.ElementTree as ElementTree
+
+import numpy as np
+from .transform_array import TransformArray
+from .joint import FIXED, REVOLUTE, PRISMATIC
+from .kinematic_tree import KinematicTree
+from .kinematic_topology import KinematicTopology
+
+URDF_JOINT_TYPES = {
+    "fixed": FIXED,
+    "revolute": REVOLUTE,
+    "continuous": REVOLUTE,
+    "prismatic": PRISMATIC,
+}
+
+
+def _vector(element, attribute, default):
+    """
+    Reads a space separated vector attribute from an optional xml element
+    """
+    if element is None or element.get(attribute) is None:
+        return np.array(default, dtype=float)
+    return np.array(element.get(attribute).split(), dtype=float)
+
+
+def compile_urdf(source):
+    """
+    Compiles URDF text into flat arrays, frames are ordered parents first with the root link at index 0. Offsets follow the URDF convention of xyz then fixed axis roll, pitch, yaw, which matches Transform
+    """
+    robot = ElementTree.fromstring(source)
+    joints = robot.findall("joint")
+
+    children = {}
+    child_links = set()
+    for joint in joints:
+        joint_type = joint.get("type")
+        if joint_type not in URDF_JOINT_TYPES:
+            raise ValueError(
+                "Joint '{0}' has the unsupported type '{1}'!".format(
+                    joint.get("name"), joint_type
+                )
+            )
+        parent = joint.find("parent").get("link")
+        child = joint.find("child").get("link")
+        children.setdefault(parent, []).append(joint)
+        child_links.add(child)
+
+    links = [link.get("name") for link in robot.findall("link")]
+    roots = [link for link in links if link not in child_links]
+    if len(roots) != 1:
+        raise ValueError(
+            "The robot description needs exactly one root link, found {0}!".format(
+                roots
+            )
+        )
+
+    # parents first ordering of the links
+    frames, parent_index, joint_names, joint_types = [roots[0]], [-1], [""], [FIXED]
+    poses, axes, limits = [np.zeros(6)], [np.zeros(3)], [(-np.inf, np.inf)]
+    for i, frame in enumerate(frames):
+        for joint in children.get(frame, []):
+            origin = joint.find("origin")
+            limit = joint.find("limit")
+            joint_type = joint.get("type")
+
+            frames.append(joint.find("child").get("link"))
+            parent_index.append(i)
+            joint_names.append(joint.get("name"))
+            joint_types.append(URDF_JOINT_TYPES[joint_type])
+            poses.append(
+                np.concatenate(
+                    (
+                        _vector(origin, "xyz", [0, 0, 0]),
+                        _vector(origin, "rpy", [0, 0, 0]),
+                    )
+                )
+            )
+            axes.append(_vector(joint.find("axis"), "xyz", [1, 0, 0]))
+            if joint_type in ("revolute", "prismatic") and limit is not None:
+                limits.append(
+                    (
+                        float(limit.get("lower", -np.inf)),
+                        float(limit.get("upper", np.inf)),
+                    )
+                )
+            else:
+                limits.append((-np.inf, np.inf))
+
+    return {
+        "name": np.array(robot.get("name", "")),
+        "frames": np.array(frames),
+        "parent_index": np.array(parent_index),
+        "joint_names": np.array(joint_names),
+        "joint_types": np.array(joint_types),
+        "offsets": TransformArray.from_poses(np.array(poses)).transforms,
+        "axes": np.array(axes),
+        "limits": np.array(limits, dtype=float),
+    }
+
+
+def tree_from_arrays(compiled, debug=False):
+    """
+    Builds a KinematicTree from compiled arrays without creating edge objects, the tree holds its own copy of the offsets
+    """
+    return KinematicTree.from_topology(
+        topology_from_arrays(compiled), compiled["offsets"], debug=debug
+    )
+
+
+def topology_from_arrays(compiled):
+    """
+    Builds the KinematicTopology described by compiled arrays, trees of the same robot can share it
+    """
+    joint_names = [str(name) for name in compiled["joint_names"]]
+    return KinematicTopology(
+        compiled["frames"],
+        compiled["parent_index"],
+        edge_names=[None] + joint_names[1:],
+        joint_types=compiled["joint_types"],
+        joint_axes=compiled["axes"],
+        joint_limits=compiled["limits"],
+    )
+
+
+def _write_cache(cache_path, digest, compiled):
+    """
+    Writes the compiled arrays to a temporary file next to the cache and moves it into place, so readers never see a partial cache
+    """
+    handle, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(cache_path)), suffix=".npz.tmp"
+    )
+    try:
+        with os.fdopen(handle, "wb") as temp_file:
+            np.savez(temp_file, hash=np.array(digest), **compiled)
+        os.replace(temp_path, cache_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def load_urdf(path, cache=True, debug=False):
+    """
+    Loads a URDF file into a KinematicTree. The compiled arrays are cached as an .npz file next to the source and reused while the content hash matches
+    """
+    with open(path, "rb") as source_file:
+        source = source_file.read()
+    digest = hashlib.sha256(source).hexdigest()
+    cache_path = os.fspath(path) + ".npz"
+
+    compiled = None
+    if cache and os.path.exists(cache_path):
+        try:
+            with np.load(cache_path) as cached:
+                if str(cached["hash"]) == digest:
+                    compiled = dict(cached)
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            # a truncated or foreign file is treated as a stale cache
+            compiled = None
+        if debug:
+            print(
+                "[URDF] cache {0}: {1}".format(
+                    "hit" if compiled else "stale", cache_path
+                )
+            )
+
+    if compiled is None:
+        compiled = compile_urdf(source)
+        if cache:
+            try:
+                _write_cache(cache_path, digest, compiled)
+            except OSError:
+                # the cache is only an optimization, read only locations still load
+                if debug:
+                    print("[URDF] could not write cache {0}".format(cache_path))
+
+    return tree_from_arrays(compiled, debug=debug)
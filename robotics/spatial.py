@@ -0,0 +1,444 @@
+import numpy as np
+
+
+def _merge_nearest(best_d, best_i, rows, candidate_d, candidate_i, k):
+    """
+    Keeps the k smallest squared distances per row of best_d / best_i after adding flat candidates for the given rows
+    """
+    if len(rows) == 0:
+        return
+    touched, local = np.unique(rows, return_inverse=True)
+    n_touched = len(touched)
+
+    # lay the candidates of every row out next to its current best in a padded matrix
+    order = np.argsort(local, kind="stable")
+    local = local[order]
+    counts = np.bincount(local, minlength=n_touched)
+    slot = np.arange(len(local)) - (np.cumsum(counts) - counts)[local]
+    distance = np.full((n_touched, k + counts.max()), np.inf)
+    index = np.zeros(distance.shape, dtype=best_i.dtype)
+    distance[:, :k], index[:, :k] = best_d[touched], best_i[touched]
+    distance[local, k + slot] = candidate_d[order]
+    index[local, k + slot] = candidate_i[order]
+
+    nearest = np.argpartition(distance, k - 1, axis=1)[:, :k]
+    distance = np.take_along_axis(distance, nearest, axis=1)
+    index = np.take_along_axis(index, nearest, axis=1)
+    ranked = np.argsort(distance, axis=1)
+    best_d[touched] = np.take_along_axis(distance, ranked, axis=1)
+    best_i[touched] = np.take_along_axis(index, ranked, axis=1)
+
+
+class KDTree:
+    """
+    Balanced KD-tree over points for batched nearest neighbour and radius queries, written in NumPy. The tree is implicit, node i has children 2i + 1 and 2i + 2 and every leaf bucket holds at most leaf_size points. Points added after construction are searched linearly until there are enough of them to rebuild
+
+    Args:
+
+            points - (N, d) array of points
+            leaf_size - maximum number of points per leaf
+    """
+
+    # number of queries searched together
+    query_block = 8192
+
+    def __init__(self, points=None, leaf_size=16):
+        self.leaf_size = leaf_size
+        points = np.zeros((0, 3)) if points is None else points
+        self.__build(np.asarray(points, dtype=float))
+
+    def __len__(self):
+        return len(self.__points) + len(self.__pending)
+
+    def __repr__(self):
+        return "KDTree(n={0}, depth={1}, leaf_size={2})".format(
+            len(self), self.__depth, self.leaf_size
+        )
+
+    @property
+    def data(self):
+        """
+        (N, d) points in the order of the indices returned by queries
+        """
+        if len(self.__pending):
+            return np.concatenate((self.__points, self.__pending))
+        return self.__points
+
+    def add(self, points):
+        """
+        Adds points, they get the next indices. The tree is rebuilt once the points searched linearly outnumber a quarter of the tree
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, self.__points.shape[1])
+        self.__pending = np.concatenate((self.__pending, points))
+        if len(self.__pending) > max(self.leaf_size, len(self.__points) // 4):
+            self.__build(self.data)
+
+    def __build(self, points):
+        """
+        Splits the points at the median of the widest axis of every node, parents first
+        """
+        assert points.ndim == 2, "Points must be an (N, d) array!"
+        n_points, dim = points.shape
+        self.__points = points
+        self.__pending = np.zeros((0, dim))
+
+        depth = 0
+        while n_points > self.leaf_size * 2**depth:
+            depth += 1
+        self.__depth = depth
+
+        n_internal = 2**depth - 1
+        self.__split_dim = np.zeros(n_internal, dtype=int)
+        self.__split_value = np.zeros(n_internal)
+
+        # nodes of one level cover contiguous [start, end) ranges of the permutation, none of
+        # them empty, and are split together
+        order = np.arange(n_points)
+        starts, ends = np.zeros(1, dtype=int), np.full(1, n_points)
+        for level in range(depth):
+            ordered = np.take(points, order, axis=0)
+            spread = np.maximum.reduceat(ordered, starts) - np.minimum.reduceat(
+                ordered, starts
+            )
+            split_dim = np.argmax(spread, axis=1)
+            lengths = ends - starts
+
+            # padded (n_nodes, width) rows of the permutation and its coordinate on the split axis
+            slots, valid = self.__slots(starts, ends)
+            values = np.full(slots.shape, np.inf)
+            values[valid] = ordered.ravel()[
+                np.arange(n_points) * dim + np.repeat(split_dim, lengths)
+            ]
+            segment = np.zeros(slots.shape, dtype=int)
+            segment[valid] = order
+
+            # node sizes differ by at most one, so a few shared kth positions put every
+            # median in place and keep the padding behind the real entries
+            kth = np.unique(np.append(lengths // 2, lengths[lengths < slots.shape[1]]))
+            part = np.argpartition(values, kth, axis=1)
+            order = np.take_along_axis(segment, part, axis=1)[valid]
+
+            nodes = np.arange(2**level - 1, 2 ** (level + 1) - 1)
+            mids = (starts + ends) // 2
+            self.__split_dim[nodes] = split_dim
+            self.__split_value[nodes] = points[order[mids], split_dim]
+            starts = np.stack((starts, mids), axis=1).ravel()
+            ends = np.stack((mids, ends), axis=1).ravel()
+
+        # padded leaf buckets, -1 marks an empty slot
+        slots, valid = self.__slots(starts, ends)
+        leaves = np.full(slots.shape, -1)
+        leaves[valid] = order
+        self.__leaves = leaves
+
+        # bounding boxes of every node, leaves first then merged upwards
+        n_nodes = n_internal + len(leaves)
+        self.__box_min = np.full((n_nodes, dim), np.inf)
+        self.__box_max = np.full((n_nodes, dim), -np.inf)
+        if n_points:
+            padded = np.take(points, np.maximum(leaves, 0), axis=0)
+            empty = (leaves < 0)[:, :, None]
+            self.__box_min[n_internal:] = np.where(empty, np.inf, padded).min(axis=1)
+            self.__box_max[n_internal:] = np.where(empty, -np.inf, padded).max(axis=1)
+            for level in range(depth - 1, -1, -1):
+                nodes = np.arange(2**level - 1, 2 ** (level + 1) - 1)
+                self.__box_min[nodes] = np.minimum(
+                    self.__box_min[2 * nodes + 1], self.__box_min[2 * nodes + 2]
+                )
+                self.__box_max[nodes] = np.maximum(
+                    self.__box_max[2 * nodes + 1], self.__box_max[2 * nodes + 2]
+                )
+
+    @staticmethod
+    def __slots(starts, ends):
+        """
+        (n_nodes, width) permutation positions of each [start, end) range padded to the widest one, and the mask of positions inside the range
+        """
+        width = max(int((ends - starts).max()), 1)
+        slots = starts[:, None] + np.arange(width)
+        return slots, slots < ends[:, None]
+
+    def __box_distance(self, queries, nodes):
+        """
+        Squared distance from each query to the bounding box of its paired node
+        """
+        gap = np.maximum(self.__box_min[nodes] - queries, 0.0)
+        gap = np.maximum(gap, queries - self.__box_max[nodes])
+        return np.einsum("ij,ij->i", gap, gap)
+
+    def __leaf_candidates(self, queries, query_rows, leaves):
+        """
+        Flattened (row, point index, squared distance) of every point in the paired leaves
+        """
+        indices = self.__leaves[leaves]
+        diff = self.__points[np.maximum(indices, 0)] - queries[query_rows, None, :]
+        distance = np.einsum("ijk,ijk->ij", diff, diff)
+        valid = indices >= 0
+        rows = np.broadcast_to(query_rows[:, None], indices.shape)
+        return rows[valid], indices[valid], distance[valid]
+
+    def __descend(self, queries):
+        """
+        Leaf that each query falls in
+        """
+        node = np.zeros(len(queries), dtype=int)
+        for _ in range(self.__depth):
+            split_dim = self.__split_dim[node]
+            right = (
+                queries[np.arange(len(queries)), split_dim] > self.__split_value[node]
+            )
+            node = 2 * node + 1 + right
+        return node - (2**self.__depth - 1)
+
+    def query(self, points, k=1):
+        """
+        k nearest neighbours of every query point. Returns distances and indices, (Q, k) arrays for (Q, d) queries or (k,) arrays for one point, sorted by distance. Missing neighbours have an infinite distance and the index len(tree)
+        """
+        queries = np.asarray(points, dtype=float)
+        single = queries.ndim == 1
+        queries = queries.reshape(-1, self.__points.shape[1])
+        n_queries = len(queries)
+
+        best_d = np.full((n_queries, k), np.inf)
+        best_i = np.full((n_queries, k), len(self))
+        if len(self.__points):
+            # blocks of queries keep the search frontier small
+            for start in range(0, n_queries, self.query_block):
+                block = slice(start, start + self.query_block)
+                self.__query_tree(queries[block], best_d[block], best_i[block], k)
+
+        if len(self.__pending):
+            # points added since the last build are compared directly
+            diff = self.__pending[None, :, :] - queries[:, None, :]
+            distance = np.einsum("ijk,ijk->ij", diff, diff)
+            rows = np.repeat(np.arange(n_queries), len(self.__pending))
+            indices = np.tile(np.arange(len(self.__pending)), n_queries)
+            _merge_nearest(
+                best_d, best_i, rows, distance.ravel(), indices + len(self.__points), k
+            )
+
+        distances = np.sqrt(best_d)
+        if single:
+            return distances[0], best_i[0]
+        return distances, best_i
+
+    def __query_tree(self, queries, best_d, best_i, k):
+        """
+        Fills best_d / best_i with the k nearest squared distances and indices of the built tree
+        """
+        n_queries = len(queries)
+        n_internal = 2**self.__depth - 1
+
+        # the smallest subtree around each query's leaf holding k points gives a first bound
+        counts = np.count_nonzero(self.__leaves >= 0, axis=1)
+        lift = 0
+        while lift < self.__depth and counts.min() * 2**lift < k:
+            lift += 1
+        home = self.__descend(queries) >> lift
+        rows = np.repeat(np.arange(n_queries), 2**lift)
+        leaves = (np.repeat(home, 2**lift) << lift) + np.tile(
+            np.arange(2**lift), n_queries
+        )
+        rows, indices, distance = self.__leaf_candidates(queries, rows, leaves)
+        _merge_nearest(best_d, best_i, rows, distance, indices, k)
+
+        # pruned breadth first search over (query, node) pairs
+        rows = np.arange(n_queries)
+        nodes = np.zeros(n_queries, dtype=int)
+        while len(rows):
+            keep = self.__box_distance(queries[rows], nodes) < best_d[rows, -1]
+            rows, nodes = rows[keep], nodes[keep]
+            leaf = nodes >= n_internal
+            if leaf.any():
+                leaf_rows, leaf_nodes = rows[leaf], nodes[leaf] - n_internal
+                fresh = (leaf_nodes >> lift) != home[leaf_rows]
+                candidates = self.__leaf_candidates(
+                    queries, leaf_rows[fresh], leaf_nodes[fresh]
+                )
+                _merge_nearest(
+                    best_d, best_i, candidates[0], candidates[2], candidates[1], k
+                )
+            rows, nodes = rows[~leaf], nodes[~leaf]
+            rows = np.repeat(rows, 2)
+            nodes = 2 * np.repeat(nodes, 2) + 1 + np.tile([0, 1], len(nodes))
+
+    def query_radius(self, points, radius, return_distance=False):
+        """
+        Indices of the points within radius of every query point, sorted by distance. Returns a list of arrays for (Q, d) queries or a single array for one point, with matching distance arrays when return_distance is set
+        """
+        queries = np.asarray(points, dtype=float)
+        single = queries.ndim == 1
+        queries = queries.reshape(-1, self.__points.shape[1])
+        n_queries = len(queries)
+        limit = radius**2
+
+        found_rows, found_indices, found_distance = [], [], []
+        if len(self.__points):
+            n_internal = 2**self.__depth - 1
+            rows = np.arange(n_queries)
+            nodes = np.zeros(n_queries, dtype=int)
+            while len(rows):
+                keep = self.__box_distance(queries[rows], nodes) <= limit
+                rows, nodes = rows[keep], nodes[keep]
+                leaf = nodes >= n_internal
+                if leaf.any():
+                    candidates = self.__leaf_candidates(
+                        queries, rows[leaf], nodes[leaf] - n_internal
+                    )
+                    inside = candidates[2] <= limit
+                    found_rows.append(candidates[0][inside])
+                    found_indices.append(candidates[1][inside])
+                    found_distance.append(candidates[2][inside])
+                rows, nodes = rows[~leaf], nodes[~leaf]
+                rows = np.repeat(rows, 2)
+                nodes = 2 * np.repeat(nodes, 2) + 1 + np.tile([0, 1], len(nodes))
+
+        if len(self.__pending):
+            diff = self.__pending[None, :, :] - queries[:, None, :]
+            distance = np.einsum("ijk,ijk->ij", diff, diff)
+            rows, indices = np.nonzero(distance <= limit)
+            found_rows.append(rows)
+            found_indices.append(indices + len(self.__points))
+            found_distance.append(distance[rows, indices])
+
+        rows = np.concatenate(found_rows + [np.zeros(0, dtype=int)])
+        indices = np.concatenate(found_indices + [np.zeros(0, dtype=int)])
+        distance = np.concatenate(found_distance + [np.zeros(0)])
+
+        # group by query, nearest first
+        order = np.lexsort((distance, rows))
+        rows, indices, distance = rows[order], indices[order], np.sqrt(distance[order])
+        splits = np.searchsorted(rows, np.arange(1, n_queries))
+        indices = np.split(indices, splits)
+        distances = np.split(distance, splits)
+
+        if single:
+            indices, distances = indices[0], distances[0]
+        if return_distance:
+            return indices, distances
+        return indices
+
+
+def grid_neighbours(points, cell, max_entries=2**22, rows=None):
+    """
+    Hashes (N, 3) points into cubic cells of size cell and yields (rows, candidates, valid) blocks covering every query row once, all points by default. candidates is a (len(rows), width) array of the indices of all points in the 27 cells around the cell of each row, padded with -1 where valid is False. Blocks hold about max_entries candidates. Yields nothing when the grid is too large to hash
+    """
+    voxels = np.floor(points / cell).astype(np.int64)
+    if len(voxels) == 0:
+        return
+    # one empty cell of margin on every side keeps neighbour keys from wrapping
+    low = voxels.min(axis=0) - 1
+    span = voxels.max(axis=0) - low + 2
+    if np.prod(span.astype(float)) >= 2**62:
+        return
+    shifted = voxels - low
+    keys = (shifted[:, 0] * span[1] + shifted[:, 1]) * span[2] + shifted[:, 2]
+
+    order = np.argsort(keys, kind="stable")
+    cells, starts, counts = np.unique(
+        keys[order], return_index=True, return_counts=True
+    )
+    if rows is None:
+        rows = np.arange(len(points))
+    query_order = rows[np.argsort(keys[rows], kind="stable")]
+    query_cells, query_starts, query_counts = np.unique(
+        keys[query_order], return_index=True, return_counts=True
+    )
+
+    steps = np.array([-1, 0, 1])
+    offsets = (
+        (steps[:, None, None] * span[1] + steps[None, :, None]) * span[2]
+        + steps[None, None, :]
+    ).ravel()
+
+    # start and length of every cell around a query cell in the sorted points, 0 when empty
+    around = query_cells[:, None] + offsets
+    found = np.minimum(np.searchsorted(cells, around), len(cells) - 1)
+    present = cells[found] == around
+    around_starts = np.where(present, starts[found], 0)
+    around_counts = np.where(present, counts[found], 0)
+    totals = around_counts.sum(axis=1)
+
+    # query cells with similar candidate counts share a block to keep the padding small
+    by_total = np.argsort(totals, kind="stable")
+    sizes = np.cumsum(query_counts[by_total])
+    first = 0
+    while first < len(query_cells):
+        done = sizes[first - 1] if first else 0
+        fits = (sizes[first:] - done) * totals[by_total[first:]] <= max_entries
+        last = first + max(int(np.argmin(fits)) if not fits.all() else len(fits), 1)
+        block = by_total[first:last]
+        first = last
+
+        # padded candidates of every query cell in the block
+        lengths = around_counts[block].ravel()
+        width = max(int(totals[block].max()), 1)
+        segment = np.repeat(np.arange(len(lengths)), lengths)
+        within = np.arange(len(segment)) - np.repeat(
+            np.cumsum(lengths) - lengths, lengths
+        )
+        block_totals = totals[block]
+        column = np.arange(len(segment)) - np.repeat(
+            np.cumsum(block_totals) - block_totals, block_totals
+        )
+        candidates = np.full((len(block), width), -1)
+        candidates[segment // len(offsets), column] = order[
+            around_starts[block].ravel()[segment] + within
+        ]
+
+        # every query row of the block's cells, split so no yield exceeds max_entries
+        row_counts = query_counts[block]
+        row_cell = np.repeat(np.arange(len(block)), row_counts)
+        row_within = np.arange(len(row_cell)) - np.repeat(
+            np.cumsum(row_counts) - row_counts, row_counts
+        )
+        block_rows = query_order[query_starts[block][row_cell] + row_within]
+        step = max(max_entries // width, 1)
+        for start in range(0, len(block_rows), step):
+            picked = candidates[row_cell[start : start + step]]
+            yield block_rows[start : start + step], picked, picked >= 0
+
+
+def grid_nearest(points, k, cell, max_entries=2**22, passes=3):
+    """
+    k nearest neighbours of every point of an (N, 3) cloud among the cloud itself, found in the 27 grid cells around each point. Points whose k-th neighbour may lie outside those cells are searched again with cells twice as large, up to passes times. Returns (N, k) distances and indices sorted by distance and a mask of the rows that are still unsure
+    """
+    n_points = len(points)
+    distances = np.full((n_points, k), np.inf)
+    indices = np.full((n_points, k), n_points)
+    unsure = np.ones(n_points, dtype=bool)
+    # one axis at a time, flat gathers from contiguous columns are much faster than row gathers
+    columns = np.ascontiguousarray(points.T)
+    for _ in range(passes):
+        queries = np.flatnonzero(unsure)
+        if len(queries) == 0:
+            break
+        for rows, candidates, valid in grid_neighbours(
+            points, cell, max_entries, queries
+        ):
+            gather = np.maximum(candidates, 0)
+            squared = np.zeros(candidates.shape)
+            for column in columns:
+                diff = column.take(gather)
+                diff -= column[rows, None]
+                diff *= diff
+                squared += diff
+            squared[~valid] = np.inf
+
+            if squared.shape[1] > k:
+                nearest = np.argpartition(squared, k - 1, axis=1)[:, :k]
+                squared = np.take_along_axis(squared, nearest, axis=1)
+                candidates = np.take_along_axis(candidates, nearest, axis=1)
+            ranked = np.argsort(squared, axis=1)
+            width = ranked.shape[1]
+            distances[rows, :width] = np.sqrt(
+                np.take_along_axis(squared, ranked, axis=1)
+            )
+            indices[rows, :width] = np.take_along_axis(candidates, ranked, axis=1)
+
+            # anything closer than the gap to the edge of the 3 x 3 x 3 block was seen
+            inside = points[rows] - np.floor(points[rows] / cell) * cell
+            margin = cell + np.minimum(inside, cell - inside).min(axis=1)
+            unsure[rows] = ~(distances[rows, -1] <= margin)
+        cell *= 2.0
+    return distances, indices, unsure
@@ -0,0 +1,83 @@
+import pytest
+import robotics
+import numpy as np
+
+
+@pytest.fixture
+def arm():
+    """
+    A six joint arm with limits on the last joint
+    """
+    edges = [robotics.Transform(name="base_link")]
+    specs = [
+        ((0, 0, 1), dict(z=0.3)),
+        ((0, 1, 0), dict(z=0.1)),
+        ((0, 1, 0), dict(x=0.5)),
+        ((1, 0, 0), dict(x=0.4)),
+        ((0, 1, 0), dict(x=0.1)),
+        ((1, 0, 0), dict(x=0.1)),
+    ]
+    parent = "base_link"
+    for i, (axis, offset) in enumerate(specs):
+        child = "link{0}".format(i + 1)
+        limits = (-2.5, 2.5) if i == 5 else None
+        edges.append(
+            robotics.Joint(
+                "revolute",
+                axis,
+                parent=parent,
+                child=child,
+                name="joint{0}".format(i + 1),
+                limits=limits,
+                **offset
+            )
+        )
+        parent = child
+    edges.append(robotics.Transform(x=0.05, parent=parent, child="tool", name="tool"))
+    return robotics.KinematicTree(edges)
+
+
+def test_solve_batch(arm):
+    """
+    Reachable targets are solved together from nearby seeds
+    """
+    rng = np.random.default_rng(0)
+    q_true = rng.uniform(-1.0, 1.0, (25, 6))
+    tool = arm.frames.index("tool")
+    targets = robotics.TransformArray(
+        arm.forward(q_true)[:, tool], parent="base_link", child="tool"
+    )
+
+    solver = robotics.InverseKinematics(arm, "tool")
+    seeds = q_true + rng.uniform(-0.3, 0.3, q_true.shape)
+    q, success = solver.solve(targets, seeds=seeds)
+    assert q.shape == (25, 6)
+    assert np.all(success)
+    assert np.allclose(arm.forward(q)[:, tool], targets.transforms, atol=1e-5)
+    # lanes stop independently
+    assert solver.iterations.min() < solver.iterations.max()
+
+
+def test_warm_start(arm):
+    """
+    A second solve starts from the previous solution and converges immediately
+    """
+    tool = arm.frames.index("tool")
+    q_true = np.array([0.2, -0.4, 0.6, 0.1, -0.3, 0.2])
+    target = robotics.Transform(
+        transform=arm.forward(q_true)[tool], parent="base_link", child="tool"
+    )
+
+    solver = robotics.InverseKinematics(arm, "tool")
+    q, success = solver.solve(target, seeds=q_true + 0.1)
+    assert success and q.shape == (6,)
+    q_again, success = solver.solve(target)
+    assert success
+    assert np.all(solver.iterations == 0)
+    assert np.allclose(q, q_again)
+
+
+def test_joint_limits(arm):
+    solver = robotics.InverseKinematics(arm, "tool", max_iterations=5)
+    q, success = solver.solve(np.eye(4), seeds=np.full(6, 3.0))
+    assert np.all(np.abs(q[:, 5]) <= 2.5)
@@ -167,3 +167,421 @@ def test_complex_root(complicated):
     multiply = complicated["link1"] * complicated["link3"] * complicated["link5"]
     get = complicated["tree"].get("chassis", "link5")
     assert test == get == multiply
+
+
+def test_get_matches_chain(complicated):
+    """
+    Cached root products give the same result as multiplying the chain of edges
+    """
+    chain = complicated["link3"] * complicated["link4"]
+    get = complicated["tree"].get("link1", "link4")
+    assert get.parent == "link1" and get.child == "link4"
+    assert np.allclose(get.transform, chain.transform)
+
+    identity = complicated["tree"].get("link4", "link4")
+    assert np.allclose(identity.transform, np.eye(4))
+
+
+def test_get_against_edge_direction():
+    """
+    Frames that are only reachable against an edge's direction are still found by search
+    """
+    base_link = robotics.Transform(name="base_link")
+    arm = robotics.Transform(x=0.5, parent="base_link", child="arm", name="arm")
+    camera = robotics.Transform(
+        y=0.2, psi=0.3, parent="camera", child="arm", name="camera"
+    )
+    tree = robotics.KinematicTree([base_link, arm, camera])
+    path = tree.get("base_link", "camera")
+    compare = arm * camera.inv()
+    assert np.allclose(path.transform, compare.transform)
+
+    with pytest.raises(KeyError):
+        tree.get("base_link", "not_a_frame")
+
+
+def test_update_edge(complicated):
+    """
+    Updating an edge refreshes the frames below it and matches a freshly built tree
+    """
+    tree = complicated["tree"]
+    before_link2 = tree.get("chassis", "link2")
+    tree.update_edge("3To1", psi=0.1, x=0.4)
+    edge = complicated["link3"]
+    assert np.isclose(edge.psi, 0.1) and np.isclose(edge.x, 0.4)
+    assert np.isclose(edge.theta, np.pi)
+
+    rebuilt = robotics.KinematicTree(
+        [robotics.Transform(name="chassis")]
+        + [complicated[n] for n in ["link1", "link2", "link3", "link4", "link5"]],
+        root_name="chassis",
+    )
+    for frame in ["link3", "link4", "link5"]:
+        assert np.allclose(
+            tree.get("chassis", frame).transform,
+            rebuilt.get("chassis", frame).transform,
+        )
+    # frames outside the subtree are untouched
+    assert tree.get("chassis", "link2") == before_link2
+    # the rooted frames see the update as well
+    assert np.allclose(
+        tree.root()["link5"].transform, rebuilt.root()["link5"].transform
+    )
+
+
+def test_update_deep_edges():
+    """
+    Updates at several depths between reads refresh every level they dirtied
+    """
+    edges = [robotics.Transform(name="f0")] + [
+        robotics.Transform(
+            x=0.1,
+            psi=0.05,
+            parent="f{0}".format(i),
+            child="f{0}".format(i + 1),
+            name="e{0}".format(i + 1),
+        )
+        for i in range(12)
+    ]
+    tree = robotics.KinematicTree(edges, root_name="f0")
+
+    for depths in ([9], [11, 4], [12], [2, 7, 2]):
+        for depth in depths:
+            tree.update_edge("e{0}".format(depth), theta=0.1 * depth, z=0.01)
+        for frame in (3, 6, 12):
+            expected = np.linalg.multi_dot(
+                [np.eye(4)] + [edge.transform for edge in edges[1 : frame + 1]]
+            )
+            assert np.allclose(tree.get("f0", "f{0}".format(frame)).transform, expected)
+            assert np.allclose(tree.root()["f{0}".format(frame)].transform, expected)
+
+
+def test_update_edge_matrix(fixture):
+    new_edge = robotics.Transform(0.3, 0.0, 0.1, 0.0, 0.2, 0.0)
+    fixture.update_edge("4To3", new_edge)
+    compare = fixture.get("base_link", "link3") * new_edge
+    assert np.allclose(fixture.get("base_link", "link4").transform, compare.transform)
+
+    with pytest.raises(KeyError):
+        fixture.update_edge("not_an_edge", x=1.0)
+
+
+@pytest.fixture
+def arm():
+    """
+    A small arm with revolute and prismatic joints plus a fixed sensor frame
+    """
+    base_link = robotics.Transform(name="base_link")
+    shoulder = robotics.Joint(
+        "revolute", (0, 0, 1), z=0.3, parent="base_link", child="link1", name="shoulder"
+    )
+    elbow = robotics.Joint(
+        "revolute",
+        (0, 1, 0),
+        x=0.5,
+        theta=0.2,
+        parent="link1",
+        child="link2",
+        name="elbow",
+    )
+    camera = robotics.Transform(
+        0.1, 0.0, 0.05, 0.0, 0.3, 0.0, parent="link1", child="camera", name="camera"
+    )
+    slide = robotics.Joint(
+        "prismatic",
+        (1, 0, 0),
+        x=0.4,
+        psi=0.1,
+        parent="link2",
+        child="tool",
+        name="slide",
+    )
+    return robotics.KinematicTree([base_link, shoulder, elbow, camera, slide])
+
+
+def test_joint_edges(arm):
+    """
+    Moving a joint through update_edge moves every frame below it
+    """
+    assert arm.joints == ("shoulder", "elbow", "slide")
+    arm.update_edge("shoulder", position=np.pi / 2)
+    arm.update_edge("slide", position=0.25)
+    tool = arm.get("base_link", "tool")
+    compare = (
+        robotics.Transform(z=0.3, psi=np.pi / 2)
+        * robotics.Transform(x=0.5, theta=0.2)
+        * robotics.Transform(x=0.4, psi=0.1)
+        * robotics.Transform(x=0.25)
+    )
+    assert np.allclose(tool.transform, compare.transform)
+
+    with pytest.raises(ValueError):
+        arm.update_edge("elbow", x=0.2)
+
+
+def test_forward_batch(arm):
+    """
+    Batched forward kinematics matches moving the joints one configuration at a time
+    """
+    q = np.random.default_rng(0).uniform(-1, 1, (6, 3))
+    poses = arm.forward(q)
+    assert poses.shape == (6, len(arm.frames), 4, 4)
+    for b in range(len(q)):
+        for name, value in zip(arm.joints, q[b]):
+            arm.update_edge(name, position=value)
+        rooted = arm.root()
+        for i, frame in enumerate(arm.frames):
+            assert np.allclose(poses[b, i], rooted[frame].transform)
+
+    assert arm.forward(q[0]).shape == (len(arm.frames), 4, 4)
+    with pytest.raises(ValueError):
+        arm.forward(np.zeros(2))
+
+
+def test_jacobian(arm):
+    """
+    The geometric jacobian matches finite differences of forward kinematics
+    """
+    q = np.array([0.3, -0.7, 0.2])
+    tool = arm.frames.index("tool")
+    jacobian = arm.jacobian(q, "tool")
+    assert jacobian.shape == (6, 3)
+
+    eps = 1e-6
+    pose = arm.forward(q)[tool]
+    for j in range(3):
+        dq = np.zeros(3)
+        dq[j] = eps
+        moved = arm.forward(q + dq)[tool]
+        linear = (moved[:3, 3] - pose[:3, 3]) / eps
+        skew = (moved[:3, :3] - pose[:3, :3]) / eps @ pose[:3, :3].T
+        angular = np.array([skew[2, 1], skew[0, 2], skew[1, 0]])
+        assert np.allclose(jacobian[:3, j], linear, atol=1e-5)
+        assert np.allclose(jacobian[3:, j], angular, atol=1e-5)
+
+    # joints that do not move the camera have empty columns
+    assert np.allclose(arm.jacobian(q, "camera")[:, 1:], 0.0)
+
+
+def test_jacobian_batch(arm):
+    q = np.random.default_rng(2).uniform(-1, 1, (5, 3))
+    batch = arm.jacobian(q, "tool", reference_frame="link1")
+    assert batch.shape == (5, 6, 3)
+    for b in range(5):
+        rot = arm.forward(q[b])[arm.frames.index("link1"), :3, :3]
+        compare = arm.jacobian(q[b], "tool")
+        assert np.allclose(batch[b, :3], rot.T @ compare[:3])
+        assert np.allclose(batch[b, 3:], rot.T @ compare[3:])
+
+
+def test_shared_topology(arm):
+    """
+    Trees built on one topology share it and keep their own copies of the offsets
+    """
+    topology, offsets, _ = robotics.KinematicTopology.from_edges(
+        arm.rigid_collection.collection
+    )
+    q = np.array([0.4, -0.7, 0.15])
+    first = robotics.KinematicTree.from_topology(topology, offsets, positions=q)
+    second = robotics.KinematicTree.from_topology(topology, offsets, positions=q)
+    assert first.topology is second.topology
+    assert first.frames == arm.frames
+
+    # joint motion is applied on top of the fixed offsets
+    for name, value in zip(arm.joints, q):
+        arm.update_edge(name, position=value)
+    assert np.allclose(first.edge_poses, arm.edge_poses)
+    assert np.allclose(first.root().transforms, arm.root().transforms)
+
+    original = offsets.copy()
+    first.update_edge("camera", x=0.3)
+    first.update_edge("shoulder", position=0.5)
+    assert np.allclose(first.get("link1", "camera").transform[:3, 3], [0.3, 0, 0.05])
+    assert np.allclose(second.get("link1", "camera").transform[:3, 3], [0.1, 0, 0.05])
+    assert np.array_equal(offsets, original)
+
+    # edge objects are created on demand and follow later updates
+    camera = first.rigid_collection.lookup("camera")
+    assert np.isclose(camera.x, 0.3)
+    first.update_edge("elbow", position=0.2)
+    assert first.rigid_collection.lookup("elbow").position == 0.2
+    assert np.isclose(first.rigid_collection.lookup("slide").position, 0.15)
+    assert np.allclose(
+        first.get("link2", "base_link").transform,
+        first.get("base_link", "link2").inv().transform,
+    )
+
+
+def test_fleet_root(arm):
+    """
+    Stacked edge poses of many trees are rooted in one pass
+    """
+    topology, offsets, _ = robotics.KinematicTopology.from_edges(
+        arm.rigid_collection.collection
+    )
+    q = np.random.default_rng(3).uniform(-1, 1, (4, 3))
+    trees = [
+        robotics.KinematicTree.from_topology(topology, offsets, positions=values)
+        for values in q
+    ]
+
+    fleet = topology.root(np.stack([tree.edge_poses for tree in trees]))
+    assert np.allclose(fleet, arm.forward(q))
+    for tree, rooted in zip(trees, fleet):
+        assert np.allclose(tree.get("base_link", "tool").transform, rooted[-1])
+
+
+def test_snapshot(arm):
+    """
+    Snapshots keep their values while the tree keeps changing
+    """
+    before = arm.snapshot()
+    tool = before.get("base_link", "tool").transform.copy()
+    arm.update_edge("shoulder", position=1.0)
+    after = arm.snapshot()
+
+    assert np.allclose(before.get("base_link", "tool").transform, tool)
+    assert np.allclose(
+        after.get("base_link", "tool").transform, arm.get("base_link", "tool").transform
+    )
+    assert after.version == before.version + 1
+    assert not before.rooted.flags.writeable
+    poses = arm.forward(before.positions)
+    link1 = robotics.Transform(transform=poses[arm.frames.index("link1")])
+    assert np.allclose(
+        before.root("link1")["tool"].transform, link1.inv().transform @ poses[-1]
+    )
+    with pytest.raises(KeyError):
+        after.get("base_link", "missing")
+
+
+def test_snapshot_threads(arm):
+    """
+    Readers on other threads always see rooted frames matching the joint values
+    """
+    import threading
+
+    tool = arm.frames.index("tool")
+    done = threading.Event()
+    errors = []
+
+    def read():
+        while not done.is_set():
+            view = arm.snapshot()
+            if not np.allclose(view.rooted[tool], arm.forward(view.positions)[tool]):
+                errors.append(view.version)
+
+    readers = [threading.Thread(target=read) for _ in range(3)]
+    for reader in readers:
+        reader.start()
+    for value in np.linspace(-1, 1, 300):
+        arm.update_edge("shoulder", position=value)
+        arm.update_edge("slide", position=value / 2)
+    done.set()
+    for reader in readers:
+        reader.join()
+    assert not errors
+
+
+def test_get_threads(arm):
+    """
+    get never returns a pose torn between two updates, and edge_poses is a copy
+    """
+    import threading
+
+    poses = []
+    for value in (0.0, 1.0):
+        arm.update_edge("shoulder", position=value)
+        poses.append(arm.get("base_link", "tool").transform)
+    done = threading.Event()
+    errors = []
+
+    def read():
+        while not done.is_set():
+            pose = arm.get("base_link", "tool").transform
+            if not any(np.allclose(pose, known) for known in poses):
+                errors.append(pose)
+
+    readers = [threading.Thread(target=read) for _ in range(3)]
+    for reader in readers:
+        reader.start()
+    for step in range(600):
+        arm.update_edge("shoulder", position=float(step % 2))
+    done.set()
+    for reader in readers:
+        reader.join()
+    assert not errors
+
+    edge_poses = arm.edge_poses
+    edge_poses[:] = 0.0
+    assert np.allclose(arm.edge_poses[0], np.eye(4))
+
+
+def test_root_view(arm):
+    """
+    Rooting returns a mapping over one array that later updates do not change
+    """
+    rooted = arm.root()
+    assert isinstance(rooted, robotics.RootedFrames)
+    assert rooted.transforms.shape == (len(arm.frames), 4, 4)
+    tool = rooted["tool"].transform.copy()
+    arm.update_edge("shoulder", position=0.7)
+    assert np.allclose(rooted["tool"].transform, tool)
+
+    camera = arm.root(destination="camera")
+    assert set(camera) == set(arm.frames) and camera.destination == "camera"
+    for frame in arm.frames:
+        compare = arm.get("camera", frame)
+        assert np.allclose(camera[frame].transform, compare.transform)
+        assert camera[frame].parent == "camera" and camera[frame].child == frame
+    assert np.allclose(camera.origins[arm.frames.index("camera")], 0.0)
+
+
+def test_nearest_frames(arm):
+    """
+    Spatial queries over frame origins follow edge updates
+    """
+    tool = arm.frames.index("tool")
+    origin = arm.get("base_link", "tool").transform[:3, 3]
+    assert arm.nearest(origin)[1][0] == tool
+
+    arm.update_edge("shoulder", position=np.pi)
+    moved = arm.get("base_link", "tool").transform[:3, 3]
+    distances, indices = arm.nearest(moved, k=2)
+    assert indices[0] == tool and np.isclose(distances[0], 0.0)
+    assert tool in arm.within(moved, 0.01)
+
+
+def test_plot_collection(fixture):
+    """
+    All frame axes are one collection that can be moved without replotting
+    """
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure()
+    axis = fig.add_subplot(111, projection="3d")
+    artist = fixture.plot(detached=True, axis_obj=axis, rgb_xyz=["r", "g:", "b--"])
+    assert len(axis.collections) == 1 and len(artist._segments3d) == 18
+
+    origins = fixture.root().origins
+    segments = np.asarray(artist._segments3d)
+    assert np.allclose(segments[::3, 0], origins)
+    assert artist.get_linestyles()[1] != artist.get_linestyles()[0]
+
+    # markers are dropped and plain color names are kept whole
+    assert robotics.kinematic_tree._line_style("ro") == ("r", "-")
+    assert robotics.kinematic_tree._line_style("b.--") == ("b", "--")
+    assert robotics.kinematic_tree._line_style("C2:") == ("C2", ":")
+    assert robotics.kinematic_tree._line_style("red") == ("red", "-")
+    assert robotics.kinematic_tree._line_style("red--") == ("red", "--")
+    with pytest.raises(ValueError):
+        robotics.kinematic_tree._line_style("rq")
+
+    fixture.update_edge(
+        "bTo1",
+        robotics.Transform(1.0, 0, 0, 0, 0, 0, parent="base_link", child="link1"),
+    )
+    assert fixture.plot(detached=True, axis_obj=axis, artist=artist) is artist
+    assert len(axis.collections) == 1
+    assert np.allclose(np.asarray(artist._segments3d)[::3, 0], fixture.root().origins)
+    plt.close(fig)
@@ -0,0 +1,92 @@
+import pytest
+import robotics
+import numpy as np
+
+
+@pytest.fixture
+def wall():
+    """
+    A floor with a wall across x = 2 that has a gap near y = 4
+    """
+    rng = np.random.default_rng(0)
+    floor = np.column_stack(
+        (rng.uniform(0, 5, 2000), rng.uniform(0, 5, 2000), np.zeros(2000))
+    )
+    y = rng.uniform(0, 5, 3000)
+    y = y[(y < 3.5) | (y > 4.5)]
+    wall = np.column_stack((np.full(len(y), 2.05), y, rng.uniform(0, 1, len(y))))
+    return robotics.PointCloud(np.vstack((floor, wall)), frame="base_link")
+
+
+def test_rasterize(wall):
+    """
+    Counts and heights match a per point loop and the floor is filtered by height
+    """
+    grid = robotics.OccupancyGrid(
+        (10, 10), 0.5, min_height=0.1, max_height=2.0, frame="base_link"
+    )
+    grid.insert(wall)
+
+    counts = np.zeros((10, 10), dtype=int)
+    heights = np.full((10, 10), np.nan)
+    for x, y, z in wall.cloud:
+        if 0.1 <= z <= 2.0:
+            i, j = int(x // 0.5), int(y // 0.5)
+            counts[i, j] += 1
+            heights[i, j] = np.fmax(heights[i, j], z)
+    assert np.array_equal(grid.counts, counts)
+    assert np.allclose(grid.height_map(), heights, equal_nan=True)
+    assert np.array_equal(grid.occupancy(), (counts > 0).astype(np.uint8))
+    assert grid.costs(max_cost=3).max() == 3
+
+    with pytest.raises(AssertionError):
+        grid.insert(robotics.PointCloud(wall.cloud, frame="lidar"))
+
+
+def test_from_pointcloud(wall):
+    grid = robotics.OccupancyGrid.from_pointcloud(wall, 0.25, min_height=0.1)
+    assert np.allclose(grid.origin, wall.cloud[wall.cloud[:, 2] >= 0.1, :2].min(0))
+    assert grid.counts.sum() == np.count_nonzero(wall.cloud[:, 2] >= 0.1)
+
+
+def test_plan_through_gap(wall):
+    """
+    The rasterized grid plugs straight into the planners
+    """
+    grid = robotics.OccupancyGrid((10, 10), 0.5, min_height=0.1, frame="base_link")
+    grid.insert(wall)
+    planner = robotics.BreadthFirstSearch(grid.occupancy())
+    path = planner.search(grid.cell(0.2, 0.2), grid.cell(4.8, 0.2))
+    assert path is not None
+    assert all(grid.occupancy()[node.x, node.y] == 0 for node in path)
+    # the only way past the wall is the gap
+    assert any(node.x == 4 and node.y in (7, 8) for node in path)
+
+
+def test_plan_on_costs():
+    """
+    The weighted searches pay the hit counts of a cost grid and avoid lethal cells
+    """
+    grid = robotics.OccupancyGrid((5, 7), 1.0)
+    # a band of light clutter across x = 2, heavy on the straight line between start and goal
+    clutter = [[2.5, y + 0.5, 0.0] for y in range(7) for _ in range(1 + 9 * (y == 3))]
+    grid.insert(np.array(clutter))
+
+    def plan(search, costs):
+        start, goal = grid.cell(0.5, 3.5), grid.cell(4.5, 3.5)
+        return search(costs, validity_check="cost").search(start, goal)
+
+    for search in (robotics.DijkstraSearch, robotics.AStarSearch):
+        # the detour through light clutter is cheaper than the heavy cell
+        path = plan(search, grid.costs())
+        assert path is not None and (2, 3) not in [(node.x, node.y) for node in path]
+        # once clipped the straight line is cheapest
+        assert [node.y for node in plan(search, grid.costs(max_cost=1))] == [3] * 4
+        # lethal cells are walls whatever their clipped cost
+        path = plan(search, grid.costs(max_cost=1, lethal=5))
+        assert (2, 3) not in [(node.x, node.y) for node in path]
+
+    walls = grid.costs(lethal=1)
+    assert np.isinf(walls[2]).all()
+    assert plan(robotics.DijkstraSearch, walls) is None
+    assert plan(robotics.AStarSearch, walls) is None
@@ -0,0 +1,78 @@
+import pytest
+import robotics
+import numpy as np
+
+
+@pytest.fixture
+def frames():
+    """
+    A tree with a lidar mounted on base_link and a few scans in the lidar frame
+    """
+    mount = robotics.Transform(
+        0.2, 0.0, 0.5, 0.3, 0.0, 0.0, parent="base_link", child="lidar", name="mount"
+    )
+    tree = robotics.KinematicTree([robotics.Transform(name="base_link"), mount])
+    rng = np.random.default_rng(0)
+    scans = [
+        robotics.PointCloud(rng.uniform(-2, 2, size=(500, 3)), frame="lidar")
+        for _ in range(6)
+    ]
+    return tree, mount, scans
+
+
+def test_run(frames):
+    """
+    Stages run lazily and in order, the thread pool keeps the input order
+    """
+    tree, mount, scans = frames
+    pipeline = robotics.Pipeline().transform(tree).crop([-1, -1, -1], [1, 1, 1])
+
+    seen = []
+    lazy = pipeline.map(lambda cloud: seen.append(cloud) or cloud).run(iter(scans))
+    assert seen == []
+    first = next(lazy)
+    assert len(seen) == 1 and first.frame == "base_link"
+
+    expected = scans[0].transform("lidar", "base_link", mount).cloud
+    inside = np.all(np.abs(expected) <= 1, axis=1)
+    assert np.allclose(first.cloud, expected[inside])
+
+    serial = list(pipeline.run(scans))
+    threaded = list(robotics.Pipeline(pipeline.stages, workers=3).run(scans))
+    assert len(serial) == len(threaded) == len(scans)
+    for a, b in zip(serial, threaded):
+        assert np.array_equal(a.cloud, b.cloud)
+
+
+def test_drop_frames(frames):
+    """
+    A stage returning None drops the frame
+    """
+    _, _, scans = frames
+    pipeline = robotics.Pipeline(workers=2).map(
+        lambda cloud: cloud if cloud is not scans[2] else None
+    )
+    assert len(list(pipeline(scans))) == len(scans) - 1
+
+
+def test_accumulate(frames):
+    """
+    Accumulation with a voxel size keeps one point per voxel across all frames
+    """
+    tree, _, scans = frames
+    pipeline = robotics.Pipeline().transform(tree)
+
+    merged = pipeline.accumulate(scans)
+    assert merged.frame == "base_link" and len(merged.cloud) == 500 * len(scans)
+
+    fused = pipeline.accumulate(scans, voxel_size=0.5, flush_size=1000)
+    expected = merged.voxel_downsample(0.5, reduce="first")
+    assert len(fused.cloud) == len(expected.cloud)
+    keys = np.unique(np.floor(fused.cloud / 0.5), axis=0)
+    assert len(keys) == len(fused.cloud)
+
+    # without the transform stage a lidar scan cannot join a base_link cloud
+    mixed = [merged] + scans
+    with pytest.raises(ValueError):
+        robotics.Pipeline().accumulate(mixed)
+    assert len(pipeline.accumulate(mixed).cloud) == 2 * len(merged.cloud)
@@ -0,0 +1,183 @@
+import pytest
+import robotics
+import numpy as np
+
+
+@pytest.fixture
+def cloud():
+    """
+    A random cloud and a transform between two frames
+    """
+    points = np.random.default_rng(0).normal(size=(1000, 3))
+    transform = robotics.Transform(
+        0.5, -1.0, 2.0, 0.1, -0.4, 1.2, parent="map", child="lidar"
+    )
+    return robotics.PointCloud(points, frame="lidar"), transform
+
+
+def test_transform(cloud):
+    """
+    Chunked transforms match the homogeneous product
+    """
+    points, transform = cloud
+    homog = np.hstack((points.cloud, np.ones((len(points.cloud), 1))))
+    expected = (transform.transform @ homog.T).T[:, :3]
+
+    moved = points.transform("lidar", "map", transform, chunk_size=128)
+    assert moved.frame == "map" and points.frame == "lidar"
+    assert np.allclose(moved.cloud, expected)
+
+    buffer = np.empty_like(points.cloud)
+    result = points.transform("lidar", "map", transform.transform, out=buffer)
+    assert result.cloud is buffer and np.allclose(buffer, expected)
+
+
+def test_transform_in_place(cloud):
+    points, transform = cloud
+    expected = points.transform("lidar", "map", transform).cloud
+    single = robotics.PointCloud(points.cloud.astype(np.float32), frame="lidar")
+    original = single.cloud
+
+    result = single.transform("lidar", "map", transform, in_place=True, chunk_size=100)
+    assert result is single and single.cloud is original
+    assert single.cloud.dtype == np.float32 and single.frame == "map"
+    assert np.allclose(single.cloud, expected, atol=1e-5)
+
+    # integer buffers would truncate the rotation
+    grid = robotics.PointCloud(np.arange(12).reshape(4, 3), frame="lidar")
+    with pytest.raises(TypeError):
+        grid.transform("lidar", "map", transform, in_place=True)
+    with pytest.raises(TypeError):
+        points.transform("lidar", "map", transform, out=np.empty((1000, 3), dtype=int))
+    assert grid.transform("lidar", "map", transform).cloud.dtype == float
+
+
+def test_voxel_downsample():
+    """
+    Every reduction keeps one point per occupied voxel
+    """
+    points = np.array(
+        [[0.1, 0.1, 0.1], [0.3, 0.2, 0.4], [1.2, 0.1, 0.1], [-0.2, 0.1, 0.1]]
+    )
+    cloud = robotics.PointCloud(points, frame="map")
+
+    centroids = cloud.voxel_downsample(0.5)
+    assert centroids.frame == "map" and len(centroids.cloud) == 3
+    assert np.allclose(np.sort(centroids.cloud[:, 0]), [-0.2, 0.2, 1.2])
+
+    first = cloud.voxel_downsample(0.5, reduce="first")
+    assert any(np.allclose(p, points[0]) for p in first.cloud)
+    assert not any(np.allclose(p, points[1]) for p in first.cloud)
+
+    centres, counts = cloud.voxel_counts(0.5)
+    assert counts.sum() == 4 and centres.frame == "map"
+    assert np.allclose(centres.cloud[np.argmax(counts)], [0.25, 0.25, 0.25])
+
+    with pytest.raises(ValueError):
+        cloud.voxel_downsample(0.5, reduce="median")
+    for size in (0.0, -0.5):
+        with pytest.raises(ValueError):
+            cloud.voxel_downsample(size)
+        with pytest.raises(ValueError):
+            cloud.voxel_counts(size)
+
+
+def test_voxel_downsample_large():
+    rng = np.random.default_rng(1)
+    points = rng.uniform(-10, 10, (20000, 3)).astype(np.float32)
+    downsampled = robotics.PointCloud(points).voxel_downsample(1.0)
+    assert downsampled.cloud.dtype == np.float32
+    assert len(downsampled.cloud) == len(np.unique(np.floor(points), axis=0))
+
+
+def test_spatial_index(cloud):
+    """
+    The index is reused between queries and rebuilt when the points change
+    """
+    points, transform = cloud
+    index = points.spatial_index
+    distances, indices = points.nearest(points.cloud[:5], k=2)
+    assert np.array_equal(indices[:, 0], np.arange(5))
+    assert np.allclose(distances[:, 0], 0.0)
+    assert points.spatial_index is index
+
+    near = points.within(points.cloud[0], 0.5)
+    expected = np.linalg.norm(points.cloud - points.cloud[0], axis=1) <= 0.5
+    assert set(near) == set(np.flatnonzero(expected))
+
+    points.cloud = points.cloud[:100]
+    assert points.spatial_index is not index
+    assert len(points.spatial_index) == 100
+
+    index = points.spatial_index
+    points.transform("lidar", "map", transform, in_place=True)
+    assert points.spatial_index is not index
+    assert points.nearest(points.cloud[7])[1][0] == 7
+
+
+def test_estimate_normals():
+    """
+    Points on a tilted plane get the plane normal, facing the viewpoint
+    """
+    rng = np.random.default_rng(2)
+    points = rng.uniform(-1, 1, (2000, 3))
+    points[:, 2] = 0.5 * points[:, 0] + 2.0
+    normal = np.array([-0.5, 0.0, 1.0]) / np.linalg.norm([-0.5, 0.0, 1.0])
+    cloud = robotics.PointCloud(points, frame="camera")
+
+    for normals in (cloud.estimate_normals(k=12), cloud.estimate_normals(radius=0.2)):
+        assert normals.shape == points.shape
+        assert np.allclose(normals, -normal, atol=1e-6)
+    assert cloud.normals is normals
+
+    # normals turn with the cloud and are dropped with new points
+    turn = robotics.Transform(psi=np.pi / 2)
+    moved = cloud.transform("camera", "map", turn)
+    assert np.allclose(moved.normals, normals @ turn.transform[:3, :3].T)
+    cloud.cloud = points[:10]
+    assert cloud.normals is None
+
+
+def test_remove_outliers():
+    rng = np.random.default_rng(3)
+    points = np.vstack((rng.normal(scale=0.1, size=(500, 3)), [[5, 5, 5], [-4, 6, 0]]))
+    filtered, keep = robotics.PointCloud(points, frame="map").remove_outliers(
+        k=8, std_ratio=2.0
+    )
+    assert not keep[-1] and not keep[-2]
+    assert keep[:500].mean() > 0.95
+    assert len(filtered.cloud) == keep.sum() and filtered.frame == "map"
+
+    # the hashed neighbours give the same statistics as the spatial index
+    distances, _ = robotics.KDTree(points).query(points, k=9)
+    mean_distance = distances[:, 1:].mean(axis=1)
+    limit = mean_distance.mean() + 2.0 * mean_distance.std()
+    assert np.array_equal(keep, mean_distance <= limit)
+
+    # too few points to compare, the cloud comes back unchanged
+    for size in (0, 1):
+        single = robotics.PointCloud(points[:size], frame="map")
+        filtered, keep = single.remove_outliers()
+        assert keep.shape == (size,) and keep.all()
+        assert np.array_equal(filtered.cloud, points[:size])
+
+
+def test_plot_lod(cloud):
+    """
+    Large clouds are thinned for display and the scatter is updated in place
+    """
+    import matplotlib.pyplot as plt
+
+    points, transform = cloud
+    fig = plt.figure()
+    axis = fig.add_subplot(111, projection="3d")
+    artist = points.plot(detached=True, axis_obj=axis, max_points=300)
+    assert 250 <= len(artist.get_offsets()) <= 300
+
+    coarse = points.plot(detached=True, axis_obj=axis, voxel_size=1.0, max_points=None)
+    assert len(coarse.get_offsets()) == len(points.voxel_downsample(1.0).cloud)
+
+    moved = points.transform("lidar", "map", transform)
+    assert moved.plot(artist=artist, max_points=None) is artist
+    assert np.allclose(artist.get_offsets(), moved.cloud[:, :2])
+    plt.close(fig)
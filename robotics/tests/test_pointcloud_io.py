@@ -0,0 +1,114 @@
+import pytest
+import robotics
+import numpy as np
+
+
+@pytest.mark.parametrize("extension", [".npy", ".ply", ".pcd"])
+def test_write_and_map(tmp_path, extension):
+    """
+    Streamed clouds read back as views of the file
+    """
+    rng = np.random.default_rng(0)
+    scans = [rng.normal(size=(n, 3)).astype(np.float32) for n in (100, 7, 250)]
+    path = tmp_path / ("sweep" + extension)
+    with robotics.PointCloudWriter(path) as writer:
+        ranges = [writer.write(robotics.PointCloud(scan)) for scan in scans]
+    assert ranges[1] == (100, 107)
+
+    loaded = robotics.load_pointcloud(path, frame="lidar")
+    assert loaded.frame == "lidar"
+    assert loaded.cloud.shape == (357, 3) and loaded.cloud.dtype == np.float32
+    assert np.array_equal(loaded.cloud, np.vstack(scans))
+    assert not loaded.cloud.flags.owndata
+    start, end = ranges[2]
+    assert np.array_equal(loaded.cloud[start:end], scans[2])
+
+
+def test_ply_extra_properties(tmp_path):
+    """
+    Interleaved properties are skipped by the strided view
+    """
+    records = np.zeros(
+        4, dtype=[("x", "<f4"), ("y", "<f4"), ("z", "<f4"), ("intensity", "u1")]
+    )
+    records["x"], records["z"] = np.arange(4), -np.arange(4)
+    header = (
+        "ply\nformat binary_little_endian 1.0\ncomment scan\nelement vertex 4\n"
+        "property float x\nproperty float y\nproperty float z\nproperty uchar intensity\n"
+        "end_header\n"
+    )
+    path = tmp_path / "scan.ply"
+    path.write_bytes(header.encode("ascii") + records.tobytes())
+
+    cloud = robotics.load_pointcloud(path).cloud
+    assert np.array_equal(cloud[:, 0], np.arange(4)) and np.array_equal(
+        cloud[:, 2], -np.arange(4)
+    )
+    assert not cloud.flags.owndata
+
+    path.write_bytes(header.replace("binary_little_endian", "ascii").encode("ascii"))
+    with pytest.raises(ValueError):
+        robotics.load_pointcloud(path)
+    with pytest.raises(ValueError):
+        robotics.load_pointcloud(tmp_path / "scan.xyz")
+
+
+@pytest.mark.parametrize("extension", [".npy", ".ply", ".pcd"])
+def test_load_frames(tmp_path, extension):
+    """
+    The frame index written on close splits the file back into its clouds
+    """
+    rng = np.random.default_rng(1)
+    scans = [rng.normal(size=(n, 3)) for n in (5, 0, 12)]
+    path = tmp_path / ("sweep" + extension)
+    with robotics.PointCloudWriter(path, dtype=np.float64) as writer:
+        for scan in scans:
+            writer.write(scan)
+
+    frames = robotics.load_frames(path, frame="lidar")
+    assert len(frames) == 3
+    for loaded, scan in zip(frames, scans):
+        assert loaded.frame == "lidar" and np.array_equal(loaded.cloud, scan)
+        assert not loaded.cloud.flags.owndata
+
+    # without an index the whole file is one cloud
+    (tmp_path / ("sweep" + extension + ".frames.npy")).unlink()
+    (single,) = robotics.load_frames(path)
+    assert single.cloud.shape == (17, 3)
+
+
+def test_writer_types(tmp_path):
+    """
+    Only float32 and float64 coordinates are written, and x, y, z of mixed types are not viewed
+    """
+    for dtype in (np.float16, np.int32, np.complex64):
+        with pytest.raises(ValueError):
+            robotics.PointCloudWriter(tmp_path / "sweep.ply", dtype=dtype)
+
+    header = (
+        "ply\nformat binary_little_endian 1.0\nelement vertex 2\n"
+        "property float x\nproperty float y\nproperty double z\nend_header\n"
+    )
+    records = np.zeros(2, dtype=[("x", "<f4"), ("y", "<f4"), ("z", "<f8")])
+    path = tmp_path / "mixed.ply"
+    path.write_bytes(header.encode("ascii") + records.tobytes())
+    with pytest.raises(ValueError):
+        robotics.load_pointcloud(path)
+
+
+def test_ply_split_fields(tmp_path):
+    """
+    Fields with another property between them cannot be viewed and are not quietly copied
+    """
+    header = (
+        "ply\nformat binary_little_endian 1.0\nelement vertex 3\n"
+        "property float x\nproperty uchar intensity\nproperty float y\nproperty float z\n"
+        "end_header\n"
+    )
+    records = np.zeros(
+        3, dtype=[("x", "<f4"), ("intensity", "u1"), ("y", "<f4"), ("z", "<f4")]
+    )
+    path = tmp_path / "split.ply"
+    path.write_bytes(header.encode("ascii") + records.tobytes())
+    with pytest.raises(ValueError):
+        robotics.load_pointcloud(path)
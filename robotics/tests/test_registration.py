@@ -0,0 +1,61 @@
+import pytest
+import robotics
+import numpy as np
+
+
+@pytest.fixture
+def scene():
+    """
+    Points on three walls of a box seen from two poses, with the normals of the walls
+    """
+    rng = np.random.default_rng(0)
+    walls, normals = [], []
+    for axis in range(3):
+        wall = rng.uniform(-1, 1, (800, 3))
+        wall[:, axis] = -1.0
+        normal = np.zeros((800, 3))
+        normal[:, axis] = 1.0
+        walls.append(wall)
+        normals.append(normal)
+    target = robotics.PointCloud(np.vstack(walls), frame="map")
+
+    truth = robotics.Transform(0.05, -0.04, 0.03, 0.03, -0.02, 0.05)
+    source = target.transform("map", "scan", truth.inv())
+    return source, target, np.vstack(normals), truth
+
+
+@pytest.mark.parametrize("method", ["point_to_point", "point_to_plane"])
+def test_icp(scene, method):
+    """
+    Both methods recover the transform between the scans
+    """
+    source, target, normals, truth = scene
+    estimate, info = robotics.icp(
+        source, target, method=method, target_normals=normals, max_iterations=50
+    )
+    assert estimate.parent == "map" and estimate.child == "scan"
+    assert np.allclose(estimate.transform, truth.transform, atol=1e-3)
+    assert info["converged"] and info["rmse"] < 1e-3
+    assert info["fitness"] == 1.0
+
+
+def test_icp_pyramid(scene):
+    source, target, normals, truth = scene
+    estimate, info = robotics.icp(
+        source, target, voxel_sizes=[0.2, 0.1, None], max_iterations=50
+    )
+    assert [level["voxel_size"] for level in info["levels"]] == [0.2, 0.1, None]
+    assert info["iterations"] == sum(level["iterations"] for level in info["levels"])
+    assert np.allclose(estimate.transform, truth.transform, atol=1e-3)
+
+
+def test_icp_estimated_normals(scene):
+    """
+    Point to plane ICP estimates the target normals when none are given
+    """
+    source, target, normals, truth = scene
+    estimate, info = robotics.icp(source, target, method="point_to_plane")
+    assert target.normals is not None
+    assert np.allclose(estimate.transform, truth.transform, atol=1e-3)
+    with pytest.raises(ValueError):
+        robotics.icp(source, target, method="plane_to_plane")
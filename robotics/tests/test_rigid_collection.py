@@ -16,3 +16,91 @@ def test_add_transform(fixture_collection):
     transform = robotics.Transform()
     fixture_collection.add(transform)
     assert len(fixture_collection.collection) == 1
+
+
+def test_add_many_dedup(fixture_collection):
+    """
+    Bulk adds skip duplicates according to the dedup mode
+    """
+    first = robotics.Transform(1, 0, 0, 0, 0, 0, parent="a", child="b", name="t1")
+    same = robotics.Transform(1, 0, 0, 0, 0, 0, parent="a", child="b", name="t1")
+    renamed = robotics.Transform(1, 0, 0, 0, 0, 1e-9, parent="a", child="b", name="t2")
+    added = fixture_collection.add_many([first, same, renamed])
+    assert added == [first, renamed]
+
+    assert fixture_collection.add_many([renamed], dedup="name") == []
+    assert fixture_collection.add_many(
+        [robotics.Transform(parent="a", child="b", name="t3")], dedup="pose"
+    )
+    moved = robotics.Transform(1, 0, 0, 0, 0, 0, parent="a", child="b", name="t4")
+    assert fixture_collection.add_many([moved], dedup="pose") == []
+    assert len(fixture_collection.collection) == 3
+    with pytest.raises(ValueError):
+        fixture_collection.add_many([moved], dedup="fuzzy")
+
+    # unnamed transforms between two frames share one bucket, within and across calls
+    rng = np.random.default_rng(0)
+    poses = rng.normal(size=(300, 6))
+    cameras = [robotics.Transform(*pose, parent="world", child="cam") for pose in poses]
+    copies = [robotics.Transform(*pose, parent="world", child="cam") for pose in poses]
+    assert len(fixture_collection.add_many(cameras + copies[:100])) == 300
+    assert fixture_collection.add_many(copies[100:]) == []
+    nudged = robotics.Transform(*(poses[0] + 1e-3), parent="world", child="cam")
+    assert fixture_collection.add(nudged)[-1] is nudged
+
+
+def test_remove_replace(fixture_collection):
+    transforms = [robotics.Transform(x=i, name="t{0}".format(i)) for i in range(5)]
+    fixture_collection.add_many(transforms)
+
+    assert fixture_collection.remove("t2") is transforms[2]
+    assert len(fixture_collection.collection) == 4
+    with pytest.raises(KeyError):
+        fixture_collection.lookup("t2")
+
+    new = robotics.Transform(x=10, name="t3")
+    assert fixture_collection.replace("t3", new) is transforms[3]
+    assert fixture_collection.lookup("t3") is new
+    assert fixture_collection.collection[2] is new
+
+    # the old transform can be added again once it has been replaced
+    fixture_collection.add(transforms[3])
+    assert len(fixture_collection.collection) == 5
+
+    # a transform renamed after it was added is removed with the name it was added under
+    renamed = robotics.Transform(x=20, name="foo")
+    fixture_collection.add(renamed)
+    renamed.name, renamed.parent = "bar", "map"
+    assert fixture_collection.remove(renamed) is renamed
+    assert len(fixture_collection.collection) == 5
+    with pytest.raises(KeyError):
+        fixture_collection.lookup("foo")
+    # and it can be added again under its new name
+    assert fixture_collection.add_many([renamed]) == [renamed]
+    assert fixture_collection.lookup("bar") is renamed
+
+    # unknown names raise even when no transform has a name
+    unnamed = robotics.RigidCollection([robotics.Transform(x=1.0)])
+    with pytest.raises(KeyError):
+        unnamed.remove("x")
+    with pytest.raises(KeyError):
+        unnamed.replace("x", robotics.Transform(name="x"))
+
+
+def test_nearest(fixture_collection):
+    """
+    Spatial queries follow transforms added after the index was built
+    """
+    fixture_collection.add_many(
+        [robotics.Transform(x=i, name="t{0}".format(i)) for i in range(50)]
+    )
+    distances, indices = fixture_collection.nearest([[3.2, 0, 0], [10.9, 0, 0]])
+    assert np.array_equal(indices[:, 0], [3, 11])
+
+    fixture_collection.add(robotics.Transform(x=3.25, name="close"))
+    distances, indices = fixture_collection.nearest([3.2, 0, 0], k=2)
+    assert fixture_collection.collection[indices[0]].name == "close"
+    assert set(fixture_collection.within([3.2, 0, 0], 0.5)) == {3, 50}
+
+    fixture_collection.remove("close")
+    assert fixture_collection.nearest([3.2, 0, 0])[1][0] == 3
@@ -0,0 +1,67 @@
+import pytest
+import robotics
+import numpy as np
+
+
+@pytest.fixture
+def frames():
+    """
+    A collection of named frames spread along the x axis
+    """
+    return [
+        robotics.Transform(
+            i * 0.5,
+            0.0,
+            0.1,
+            0.0,
+            0.0,
+            0.1 * i,
+            parent="world",
+            child="f{0}".format(i),
+            name="t{0}".format(i),
+        )
+        for i in range(10)
+    ]
+
+
+def test_views(frames):
+    """
+    Lookups return Transform views and the columns share the pose array
+    """
+    columns = robotics.RigidCollectionArray(frames)
+    assert len(columns) == 10
+    single = columns.lookup("t3")
+    assert single == frames[3]
+    assert np.shares_memory(single.transform, columns.transforms)
+    assert np.shares_memory(columns.origins, columns.transforms)
+    assert np.allclose(columns.origins[:, 0], np.arange(10) * 0.5)
+    assert columns[-1].child == "f9"
+    with pytest.raises(KeyError):
+        columns.lookup("missing")
+
+
+def test_bulk_queries(frames):
+    columns = robotics.RigidCollectionArray.from_collection(
+        robotics.RigidCollection(frames)
+    )
+    near = columns.within([1.0, 0.0, 0.0], 0.6)
+    assert list(near.names) == ["t1", "t2", "t3"]
+    assert np.allclose(columns.poses()[4], np.ravel(frames[4].pose()))
+    assert columns.to_collection().lookup("t5") == frames[5]
+
+
+def test_add_many_array():
+    """
+    Raw arrays can be appended with their name columns, growing the storage
+    """
+    columns = robotics.RigidCollectionArray()
+    poses = robotics.TransformArray.from_poses(
+        np.random.default_rng(0).normal(size=(40, 6))
+    )
+    names = ["p{0}".format(i) for i in range(40)]
+    columns.add_many(poses.transforms, names=names, parents=["map"] * 40)
+    columns.add(robotics.Transform(name="extra"))
+    assert len(columns) == 41
+    assert np.allclose(columns.transforms[:40], poses.transforms)
+    assert columns["p7"].parent == "map" and columns["p7"].child is None
+    assert len(columns[columns.names == "extra"]) == 1
@@ -0,0 +1,152 @@
+import os
+
+import pytest
+import robotics
+import numpy as np
+
+URDF = """<?xml version="1.0"?>
+<robot name="arm">
+  <link name="base_link"/>
+  <link name="link1"/>
+  <link name="link2"/>
+  <link name="camera"/>
+  <joint name="shoulder" type="revolute">
+    <parent link="base_link"/>
+    <child link="link1"/>
+    <origin xyz="0 0 0.3" rpy="0 0 0"/>
+    <axis xyz="0 0 1"/>
+    <limit lower="-1.5" upper="1.5" effort="1" velocity="1"/>
+  </joint>
+  <joint name="elbow" type="continuous">
+    <parent link="link1"/>
+    <child link="link2"/>
+    <origin xyz="0.5 0 0" rpy="0.2 0 0"/>
+    <axis xyz="0 1 0"/>
+  </joint>
+  <joint name="camera_mount" type="fixed">
+    <parent link="link1"/>
+    <child link="camera"/>
+    <origin xyz="0.1 0 0.05" rpy="0 0.3 0"/>
+  </joint>
+</robot>
+"""
+
+
+@pytest.fixture
+def urdf_path(tmp_path):
+    path = tmp_path / "arm.urdf"
+    path.write_text(URDF)
+    return path
+
+
+def test_load_urdf(urdf_path):
+    """
+    The loaded tree matches one assembled by hand
+    """
+    tree = robotics.load_urdf(urdf_path)
+    assert tree.frames[0] == "base_link"
+    assert tree.joints == ("shoulder", "elbow")
+    assert np.allclose(tree.joint_limits[0], [-1.5, 1.5])
+    assert np.all(np.isinf(tree.joint_limits[1]))
+
+    compare = robotics.KinematicTree(
+        [
+            robotics.Transform(name="base_link"),
+            robotics.Joint(
+                "revolute",
+                (0, 0, 1),
+                z=0.3,
+                parent="base_link",
+                child="link1",
+                name="shoulder",
+            ),
+            robotics.Joint(
+                "revolute",
+                (0, 1, 0),
+                x=0.5,
+                theta=0.2,
+                parent="link1",
+                child="link2",
+                name="elbow",
+            ),
+            robotics.Transform(
+                0.1,
+                0,
+                0.05,
+                0,
+                0.3,
+                0,
+                parent="link1",
+                child="camera",
+                name="camera_mount",
+            ),
+        ]
+    )
+    q = np.array([[0.4, -0.8], [1.0, 0.3]])
+    poses = tree.forward(q)
+    compare_poses = compare.forward(q)
+    for i, frame in enumerate(tree.frames):
+        assert np.allclose(poses[:, i], compare_poses[:, compare.frames.index(frame)])
+
+
+def test_urdf_cache(urdf_path):
+    """
+    The compiled arrays are cached next to the file and rebuilt when the content changes
+    """
+    cache_path = str(urdf_path) + ".npz"
+    robotics.load_urdf(urdf_path)
+    assert os.path.exists(cache_path)
+    stamp = os.path.getmtime(cache_path)
+
+    cached = robotics.load_urdf(urdf_path)
+    assert os.path.getmtime(cache_path) == stamp
+    assert np.allclose(
+        cached.get("base_link", "camera").transform[:3, 3], [0.1, 0, 0.35]
+    )
+
+    urdf_path.write_text(URDF.replace('xyz="0.1 0 0.05"', 'xyz="0.2 0 0.05"'))
+    changed = robotics.load_urdf(urdf_path)
+    assert np.allclose(
+        changed.get("base_link", "camera").transform[:3, 3], [0.2, 0, 0.35]
+    )
+
+
+def test_corrupt_cache(urdf_path):
+    """
+    A truncated cache is recompiled and replaced instead of failing the load
+    """
+    cache_path = str(urdf_path) + ".npz"
+    robotics.load_urdf(urdf_path)
+    with open(cache_path, "rb") as cache_file:
+        data = cache_file.read()
+    with open(cache_path, "wb") as cache_file:
+        cache_file.write(data[: len(data) // 2])
+
+    tree = robotics.load_urdf(urdf_path)
+    assert np.allclose(tree.get("base_link", "camera").transform[:3, 3], [0.1, 0, 0.35])
+    with np.load(cache_path) as cached:
+        assert "hash" in cached
+    assert not [name for name in os.listdir(urdf_path.parent) if ".tmp" in name]
+
+
+def test_unsupported_joint(tmp_path):
+    path = tmp_path / "floating.urdf"
+    path.write_text(URDF.replace('type="fixed"', 'type="floating"'))
+    with pytest.raises(ValueError):
+        robotics.load_urdf(path, cache=False)
+
+
+def test_joint_axes(urdf_path, tmp_path):
+    """
+    URDF axes are normalized like Joint axes and zero length axes are rejected
+    """
+    scaled = tmp_path / "scaled.urdf"
+    scaled.write_text(URDF.replace('<axis xyz="0 0 1"/>', '<axis xyz="0 0 2"/>'))
+    poses = robotics.load_urdf(scaled, cache=False).forward([0.7, -0.4])
+    rot = poses[:, :3, :3]
+    assert np.allclose(rot @ np.swapaxes(rot, -1, -2), np.eye(3))
+    assert np.allclose(poses, robotics.load_urdf(urdf_path).forward([0.7, -0.4]))
+
+    scaled.write_text(URDF.replace('<axis xyz="0 1 0"/>', '<axis xyz="0 0 0"/>'))
+    with pytest.raises(ValueError):
+        robotics.load_urdf(scaled, cache=False)
@@ -0,0 +1,108 @@
+import pytest
+import robotics
+import numpy as np
+
+
+@pytest.fixture
+def points():
+    """
+    Random points and queries with brute force distances between them
+    """
+    rng = np.random.default_rng(0)
+    data = rng.normal(size=(3000, 3))
+    queries = rng.normal(size=(200, 3))
+    distances = np.linalg.norm(queries[:, None] - data[None], axis=2)
+    return data, queries, distances
+
+
+def test_query(points):
+    """
+    Nearest neighbours match a brute force search
+    """
+    data, queries, distances = points
+    tree = robotics.KDTree(data)
+    found, indices = tree.query(queries, k=5)
+    assert found.shape == indices.shape == (200, 5)
+    assert np.allclose(found, np.sort(distances, axis=1)[:, :5])
+    assert np.array_equal(indices, np.argsort(distances, axis=1)[:, :5])
+
+    single, index = tree.query(queries[0], k=2)
+    assert single.shape == (2,) and index[0] == indices[0, 0]
+
+    # asking for more neighbours than points pads with infinite distances
+    small, small_index = robotics.KDTree(data[:3]).query(queries, k=4)
+    assert np.all(np.isinf(small[:, 3])) and np.all(small_index[:, 3] == 3)
+
+
+def test_query_radius(points):
+    data, queries, distances = points
+    tree = robotics.KDTree(data, leaf_size=8)
+    found, found_distances = tree.query_radius(queries, 0.3, return_distance=True)
+    assert len(found) == len(queries)
+    for i in range(len(queries)):
+        assert set(found[i]) == set(np.flatnonzero(distances[i] <= 0.3))
+        assert np.all(np.diff(found_distances[i]) >= 0)
+
+
+def test_add(points):
+    """
+    Points added later are found before and after the tree rebuilds
+    """
+    data, queries, distances = points
+    tree = robotics.KDTree(data[:2000])
+    for chunk in np.array_split(data[2000:], 20):
+        tree.add(chunk)
+        count = len(tree)
+        found, indices = tree.query(queries, k=3)
+        assert np.array_equal(indices, np.argsort(distances[:, :count], axis=1)[:, :3])
+    assert len(tree) == len(data)
+
+
+def test_query_more_than_leaf(points):
+    """
+    Asking for more neighbours than a leaf holds still gives the exact neighbours
+    """
+    data, queries, distances = points
+    found, indices = robotics.KDTree(data, leaf_size=4).query(queries, k=12)
+    assert np.allclose(found, np.sort(distances, axis=1)[:, :12])
+
+
+def test_build_sizes():
+    """
+    Level by level splits give exact neighbours for any size, leaf size and duplicate points
+    """
+    rng = np.random.default_rng(2)
+    for n_points in (1, 2, 7, 33, 130, 1000):
+        data = rng.normal(size=(n_points, 3))
+        data[::4] = data[0]
+        distances = np.linalg.norm(data[:, None] - data[None], axis=2)
+        for leaf_size in (1, 3, 16):
+            tree = robotics.KDTree(data, leaf_size=leaf_size)
+            k = min(4, n_points)
+            found, _ = tree.query(data, k=k)
+            assert np.allclose(found, np.sort(distances, axis=1)[:, :k])
+
+
+def test_grid_nearest():
+    """
+    Hashed neighbours match the tree, rows the cells can not settle are flagged
+    """
+    rng = np.random.default_rng(4)
+    # a dense cluster next to a sparse one
+    data = np.vstack(
+        (rng.normal(scale=0.05, size=(2000, 3)), rng.uniform(2, 6, (300, 3)))
+    )
+    expected, _ = robotics.KDTree(data).query(data, k=6)
+
+    found, indices, unsure = robotics.spatial.grid_nearest(data, 6, 0.02, passes=1)
+    assert unsure[2000:].all() and not unsure.all()
+    assert np.allclose(found[~unsure], expected[~unsure])
+    assert np.allclose(
+        np.linalg.norm(data[indices[~unsure]] - data[~unsure, None], axis=2),
+        found[~unsure],
+    )
+
+    found, _, unsure = robotics.spatial.grid_nearest(
+        data, 6, 0.02, max_entries=5000, passes=8
+    )
+    assert not unsure.any() and np.allclose(found, expected)
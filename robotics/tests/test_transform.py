@@ -238,6 +238,64 @@ def test_updating_one_variable():
     assert test.psi == 10
 
 
+def test_lazy_pose_from_matrix():
+    """
+    Transforms built from a matrix only decompose their pose when it is read
+    """
+    source = robotics.Transform(0.2, -0.4, 1.1, 0.3, -0.2, 1.2)
+    test = robotics.Transform(transform=source.transform)
+    assert test._pose is None
+    assert np.allclose(test.pose(), source.pose())
+    assert test._pose is not None
+
+
+def test_multiply_keeps_product():
+    """
+    Composition keeps the exact matrix product instead of rebuilding it from euler angles
+    """
+    one = robotics.Transform(0.1, 0.2, 0.3, 0.4, -1.2, 2.9, parent="a", child="b")
+    two = robotics.Transform(-0.5, 0.7, 0.1, 2.1, 0.3, -0.6, parent="b", child="c")
+    result = one * two
+    assert np.array_equal(result.transform, one.transform @ two.transform)
+    assert result.parent == "a" and result.child == "c"
+
+
+def test_slots():
+    test = robotics.Transform()
+    with pytest.raises(AttributeError):
+        test.not_an_attribute = 1
+
+
+def test_multiply_points():
+    """
+    Single points and (N, 3) / (N, 4) arrays are all transformed
+    """
+    test = robotics.Transform(0.5, -0.2, 1.0, 0.3, 0.1, -0.7)
+    points = np.random.default_rng(0).normal(size=(50, 3))
+    homog = np.hstack((points, np.ones((50, 1))))
+    compare = (test.transform @ homog.T).T
+
+    assert np.allclose(test * points[0], compare[0, :3])
+    assert np.allclose(test * homog[0], compare[0].reshape(-1, 1))
+    assert np.allclose(test * points, compare[:, :3])
+    assert np.allclose(test * homog, compare)
+    # strided views work without copies
+    assert np.allclose(test * homog[:, :3], compare[:, :3])
+
+
+def test_apply_out_buffer():
+    test = robotics.Transform(0.5, -0.2, 1.0, 0.3, 0.1, -0.7)
+    points = np.random.default_rng(1).normal(size=(20, 3))
+    compare = test * points
+    out = np.empty_like(points)
+    result = test.apply(points, out=out)
+    assert result is out
+    assert np.allclose(out, compare)
+    # in place
+    test.apply(points, out=points)
+    assert np.allclose(points, compare)
+
+
 if __name__ == "__main__":
     one = robotics.Transform(x=0.5)
     two = robotics.Transform(x=0.5)
@@ -0,0 +1,81 @@
+import pytest
+import robotics
+import numpy as np
+
+
+@pytest.fixture
+def poses():
+    """
+    Prepare a batch of random poses and their Transform objects
+    """
+    rng = np.random.default_rng(0)
+    poses = np.hstack(
+        (rng.uniform(-2, 2, (20, 3)), rng.uniform(-np.pi / 2.2, np.pi / 2.2, (20, 3)))
+    )
+    transforms = [robotics.Transform(*p) for p in poses]
+    return poses, transforms
+
+
+def test_from_poses(poses):
+    """
+    Vectorized construction should match the per-transform construction
+    """
+    pose_array, transforms = poses
+    batch = robotics.TransformArray.from_poses(pose_array)
+    compare = robotics.TransformArray(transforms)
+    assert len(batch) == len(transforms)
+    assert np.allclose(batch.transforms, compare.transforms)
+
+
+def test_inverse_pose(poses):
+    pose_array, transforms = poses
+    batch = robotics.TransformArray(transforms)
+    assert np.allclose(batch.inverse_pose(), pose_array)
+    assert batch.pose().shape == (len(transforms), 6, 1)
+
+
+def test_compose_and_inverse(poses):
+    """
+    Composing with the inverse gives the identity, and matches looping over Transform
+    """
+    pose_array, transforms = poses
+    batch = robotics.TransformArray(transforms, parent="world", child="body")
+    identity = batch @ batch.inv()
+    assert np.allclose(identity.transforms, np.eye(4))
+
+    offset = robotics.Transform(
+        0.3, -0.2, 0.1, 0.1, 0.2, 0.3, parent="body", child="tool"
+    )
+    composed = batch @ offset
+    assert composed.parent == "world" and composed.child == "tool"
+    for i, t in enumerate(transforms):
+        assert np.allclose(composed.transforms[i], (t * offset).transform)
+
+    # the transform can also be on the left
+    left = offset * batch
+    assert np.allclose(left.transforms[3], (offset * transforms[3]).transform)
+
+
+def test_apply(poses):
+    pose_array, transforms = poses
+    batch = robotics.TransformArray(transforms)
+    point = np.array([0.5, -1.0, 2.0])
+    assert np.allclose(batch.apply(point)[4], transforms[4] * point)
+
+    points = np.random.default_rng(1).normal(size=(7, 3))
+    moved = batch @ points
+    assert moved.shape == (len(transforms), 7, 3)
+    assert np.allclose(moved[2, 5], transforms[2] * points[5])
+
+
+def test_indexing_views(poses):
+    """
+    Indexing returns Transform objects sharing memory with the batch
+    """
+    pose_array, transforms = poses
+    batch = robotics.TransformArray(transforms, parent="world", child="body")
+    single = batch[3]
+    assert isinstance(single, robotics.Transform)
+    assert single.parent == "world"
+    assert np.shares_memory(single.transform, batch.transforms)
+    assert len(batch[2:5]) == 3
@@ -0,0 +1,98 @@
+import pytest
+import robotics
+import numpy as np
+
+
+@pytest.fixture
+def buffer():
+    """
+    A static mount on a tree plus a moving base with stamped poses
+    """
+    base_link = robotics.Transform(name="base_link")
+    lidar = robotics.Transform(
+        0.2, 0.0, 0.5, 0.0, 0.1, 0.0, parent="base_link", child="lidar", name="lidar"
+    )
+    tree = robotics.KinematicTree([base_link, lidar])
+    buffer = robotics.TransformBuffer(tree, capacity=8, max_age=5.0)
+    for stamp in range(6):
+        buffer.set(
+            robotics.Transform(
+                x=stamp, psi=0.2 * stamp, parent="odom", child="base_link"
+            ),
+            stamp,
+        )
+    return buffer
+
+
+def test_interpolated_lookup(buffer):
+    """
+    Lookups between stamps interpolate translation linearly and rotation along the shortest arc
+    """
+    edge = buffer.lookup_edge("base_link", 2.5)
+    compare = robotics.Transform(x=2.5, psi=0.5)
+    assert np.allclose(edge, compare.transform)
+
+    # composing through the static lidar mount
+    lidar = buffer.get("odom", "lidar", 3.25)
+    compare = robotics.Transform(x=3.25, psi=0.65) * robotics.Transform(
+        0.2, 0.0, 0.5, 0.0, 0.1, 0.0
+    )
+    assert lidar.parent == "odom" and lidar.child == "lidar"
+    assert np.allclose(lidar.transform, compare.transform)
+
+    inverse = buffer.get("lidar", "odom", 3.25)
+    assert np.allclose(inverse.transform @ lidar.transform, np.eye(4))
+
+    batch = buffer.lookup_edge("base_link", np.array([0.5, 1.5, 4.0]))
+    assert batch.shape == (3, 4, 4)
+    assert np.allclose(batch[1], robotics.Transform(x=1.5, psi=0.3).transform)
+
+
+def test_eviction(buffer):
+    """
+    The ring keeps a bounded number of stamps and drops those that are too old
+    """
+    for stamp in range(6, 12):
+        buffer.set(
+            robotics.Transform(
+                x=stamp, psi=0.2 * stamp, parent="odom", child="base_link"
+            ),
+            stamp,
+        )
+    # stamps older than 11 - 5 were evicted, the ring wrapped around
+    with pytest.raises(ValueError):
+        buffer.lookup_edge("base_link", 5.5)
+    edge = buffer.lookup_edge("base_link", 9.75)
+    assert np.allclose(edge, robotics.Transform(x=9.75, psi=1.95).transform)
+
+    # no extrapolation into the future and no stamps out of order
+    with pytest.raises(ValueError):
+        buffer.lookup_edge("base_link", 12.5)
+    with pytest.raises(ValueError):
+        buffer.set(robotics.Transform(parent="odom", child="base_link"), 3.0)
+
+
+def test_unknown_frames(buffer):
+    with pytest.raises(KeyError):
+        buffer.get("odom", "camera", 1.0)
+    with pytest.raises(ValueError):
+        buffer.set(robotics.Transform(parent="map", child="base_link"), 7.0)
+
+
+def test_loops(buffer):
+    """
+    Edges closing a loop are rejected and lookups keep working
+    """
+    with pytest.raises(ValueError):
+        buffer.set(robotics.Transform(parent="lidar", child="odom"), 1.0)
+    with pytest.raises(ValueError):
+        buffer.set(robotics.Transform(parent="map", child="map"), 1.0)
+
+    buffer.set(robotics.Transform(parent="a", child="b"), 1.0)
+    with pytest.raises(ValueError):
+        buffer.set(robotics.Transform(parent="b", child="a"), 1.0)
+    assert np.allclose(buffer.get("a", "b", 1.0).transform, np.eye(4))
+    assert np.allclose(
+        buffer.get("odom", "base_link", 2.0).transform,
+        robotics.Transform(x=2, psi=0.4).transform,
+    )
@@ -1,12 +1,41 @@
+import math
 import numpy as np
 import matplotlib.pyplot as plt
 
 
+def _lazy_pose_property(index, doc):
+    """
+    Property for one of x, y, z, theta, phi, psi that is only decomposed from the matrix when read
+    """
+
+    def getter(self):
+        return self._lazy_pose()[index]
+
+    def setter(self, value):
+        self._lazy_pose()[index] = value
+
+    return property(getter, setter, doc=doc)
+
+
 class Transform:
     """
     Transform class for rigid transforms, theta, phi, psi = roll, pitch, yaw
     """
 
+    __slots__ = (
+        "child",
+        "parent",
+        "name",
+        "transform_first",
+        "transform",
+        "x_axis",
+        "y_axis",
+        "z_axis",
+        "origin",
+        "_pose",
+        "__forward",
+    )
+
     def __str__(self):
         return str(self.transform)
 
@@ -38,6 +67,8 @@ class Transform:
     ):
         """
         Transform class for rigid transforms, theta, phi, psi = roll, pitch, yaw
+
+        When a 4x4 transform is given it is used as is (no copy) and the pose is only decomposed on first read
         """
         self.child, self.parent, self.name = child, parent, name
 
@@ -47,42 +78,68 @@ class Transform:
             self.update_transform(x, y, z, theta, phi, psi)
         else:
             self.transform_first = True
-            self.transform = transform
-            self.x_axis = self.transform[:3, 0]
-            self.y_axis = self.transform[:3, 1]
-            self.z_axis = self.transform[:3, 2]
-            self.origin = self.transform[:3, 3]
-            self.x, self.y, self.z, self.theta, self.phi, self.psi = self.inverse_pose()
+            self.__set_matrix(transform)
+            # x, y, z, theta, phi, psi are recovered lazily
+            self._pose = None
 
         # for graph traversal
         self.__forward = True
 
+    x = _lazy_pose_property(0, "x translation")
+    y = _lazy_pose_property(1, "y translation")
+    z = _lazy_pose_property(2, "z translation")
+    theta = _lazy_pose_property(3, "roll angle")
+    phi = _lazy_pose_property(4, "pitch angle")
+    psi = _lazy_pose_property(5, "yaw angle")
+
+    @property
+    def rot(self):
+        """
+        rotation block of the transform
+        """
+        return self.transform[:3, :3]
+
+    def _lazy_pose(self):
+        """
+        Returns the pose list, decomposing the matrix the first time it is needed
+        """
+        if self._pose is None:
+            self._pose = list(self.inverse_pose())
+        return self._pose
+
+    def __set_matrix(self, transform):
+        """
+        Stores the matrix and the axis views used for plotting
+        """
+        self.transform = transform
+        self.x_axis = transform[:3, 0]
+        self.y_axis = transform[:3, 1]
+        self.z_axis = transform[:3, 2]
+        self.origin = transform[:3, 3]
+
     # overload multiplication
     def __mul__(self, other):
         if isinstance(other, Transform):
+            # the product is used directly, no round trip through euler angles
             result = self.transform @ other.transform
-            result_tran = Transform(transform=result)
-            # calculate pose from transform
-            output = result_tran.inverse_pose()
-            x, y, z, theta, phi, psi = output
 
             if self.child == other.parent is not None:
-                source = self.child
-                source_other = other.child
-                dest = self.parent
-                dest_other = other.parent
                 return Transform(
-                    x, y, z, theta, phi, psi, parent=dest, child=source_other
+                    transform=result, parent=self.parent, child=other.child
                 )
 
+            # frames not specified
+            return Transform(transform=result)
+
         elif isinstance(other, np.ndarray):
             if other.shape == (4,):
+                # a single homogeneous point is returned as a column
                 return self.transform @ other.reshape(-1, 1)
-            elif other.shape == (3,):
-                return (self.transform @ np.array(list(other) + [1]))[:3]
+            elif other.ndim in (1, 2) and other.shape[-1] in (3, 4):
+                return self.apply(other)
 
-        # frames not specified
-        return Transform(x, y, z, theta, phi, psi)
+        # let batched types such as TransformArray handle the product
+        return NotImplemented
 
     def __eq__(self, other):
         # overload equal sign to work with other transform objects and numpy arrays
@@ -106,62 +163,50 @@ class Transform:
     def get_forward(self):
         return self.__forward
 
+    def apply(self, points, out=None):
+        """
+        Applies the transform to a (3,) point, (N, 3) points or (N, 4) homogeneous points, optionally writing into a preallocated out array
+        """
+        points = np.asarray(points)
+        size = points.shape[-1]
+        assert points.ndim in (1, 2) and size in (3, 4), "Wrong size points!"
+
+        if size == 4:
+            return np.matmul(points, self.transform.T, out=out)
+
+        # rotate and translate directly, without homogeneous copies
+        out = np.matmul(points, self.transform[:3, :3].T, out=out)
+        out += self.transform[:3, 3]
+        return out
+
+    def update_matrix(self, transform):
+        """
+        replaces the 4x4 matrix of the transform, the pose is recovered lazily
+        """
+        self.__set_matrix(transform)
+        self._pose = None
+
     def update_transform(self, x=0, y=0, z=0, theta=0, phi=0, psi=0):
         """
         updates the transform according to the entered values
         """
         # translation vector
-        self.x, self.y, self.z, self.theta, self.phi, self.psi = (
-            x,
-            y,
-            z,
-            theta,
-            phi,
-            psi,
-        )
+        self._pose = [x, y, z, theta, phi, psi]
+
+        ct, st = math.cos(theta), math.sin(theta)
+        cp, sp = math.cos(phi), math.sin(phi)
+        cy, sy = math.cos(psi), math.sin(psi)
 
+        # closed form of tran @ rotZ @ rotY @ rotX, yaw about z, pitch about y, roll about x
         # fmt:off
-        self.tran = np.array([
-            [1, 0, 0, x], 
-            [0, 1, 0, y], 
-            [0, 0, 1, z], 
-            [0, 0, 0, 1]
-        ])
-
-        # roll rotation about x axis
-        self.rotX = np.array([
-            [1  , 0              , 0              , 0]  ,
-            [0  , np.cos(theta)  , -np.sin(theta) , 0]  ,
-            [0  , np.sin(theta)  , np.cos(theta)  , 0]  ,
-            [0  , 0              , 0              , 1]
-        ])
-
-        # pitch rotation about y axis
-        self.rotY = np.array([
-            [np.cos(phi)   , 0  , np.sin(phi) , 0 ]  ,
-            [0             , 1  , 0           , 0 ]  ,
-            [-np.sin(phi)  , 0  , np.cos(phi) , 0 ]  ,
-            [0             , 0  , 0           , 1]
-        ])
-
-        # yaw rotation about z axis
-        self.rotZ = np.array([
-            [np.cos(psi)  , -np.sin(psi)  , 0  , 0]  ,
-            [np.sin(psi)  , np.cos(psi)   , 0  , 0]  ,
-            [0            , 0             , 1  , 0]  ,
-            [0            , 0             , 0  , 1]
-        ])
+        self.__set_matrix(np.array([
+            [cy * cp , cy * sp * st - sy * ct , cy * sp * ct + sy * st , x],
+            [sy * cp , sy * sp * st + cy * ct , sy * sp * ct - cy * st , y],
+            [-sp     , cp * st                , cp * ct                , z],
+            [0.0     , 0.0                    , 0.0                    , 1.0]
+        ], dtype=float))
         # fmt: on
 
-        self.rot = (self.rotZ @ self.rotY @ self.rotX)[:3, :3]
-        self.transform = self.tran @ self.rotZ @ self.rotY @ self.rotX
-
-        # recover the axes for plotting
-        self.x_axis = self.transform[:3, 0]
-        self.y_axis = self.transform[:3, 1]
-        self.z_axis = self.transform[:3, 2]
-        self.origin = self.transform[:3, 3]
-
     def inverse_pose(self, transform=None):
         """
         recovers x,y,z,r,p,y from a given transformation
@@ -200,9 +245,7 @@ class Transform:
         """
         return pose associated with the transform
         """
-        return np.array(
-            [self.x, self.y, self.z, self.theta, self.phi, self.psi]
-        ).reshape(-1, 1)
+        return np.array(self._lazy_pose()).reshape(-1, 1)
 
     def plot(
         self,
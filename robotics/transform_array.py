@@ -0,0 +1,226 @@
+import numpy as np
+from .transform import Transform
+
+
+def invert_transforms(transforms):
+    """
+    Rigid inverse of a (..., 4, 4) array of transforms
+    """
+    rot_t = np.swapaxes(transforms[..., :3, :3], -1, -2)
+
+    inverse = np.zeros(np.shape(transforms))
+    inverse[..., :3, :3] = rot_t
+    inverse[..., :3, 3] = -(rot_t @ transforms[..., :3, 3, None])[..., 0]
+    inverse[..., 3, 3] = 1.0
+    return inverse
+
+
+class TransformArray:
+    """
+    A batch of rigid transforms stored in one contiguous (N, 4, 4) array, theta, phi, psi = roll, pitch, yaw
+
+    Args:
+
+            transforms - (N, 4, 4) array, single (4, 4) array or list of Transform objects
+            parent - frame the transforms are expressed in
+            child - frame the transforms describe
+            name - name shared by the batch
+    """
+
+    def __init__(self, transforms=None, parent=None, child=None, name=None):
+        self.child, self.parent, self.name = child, parent, name
+
+        if transforms is None:
+            transforms = np.zeros((0, 4, 4))
+        elif isinstance(transforms, TransformArray):
+            transforms = transforms.transforms
+        elif isinstance(transforms, (list, tuple)):
+            if len(transforms) == 0:
+                transforms = np.zeros((0, 4, 4))
+            else:
+                transforms = np.stack(
+                    [t.transform if isinstance(t, Transform) else t for t in transforms]
+                )
+
+        transforms = np.ascontiguousarray(transforms, dtype=float)
+        if transforms.shape == (4, 4):
+            transforms = transforms.reshape(1, 4, 4)
+
+        shape = transforms.shape
+        assert len(shape) == 3 and shape[1:] == (4, 4), "Wrong size transformations!"
+
+        self.transforms = transforms
+
+    @classmethod
+    def from_poses(cls, poses, parent=None, child=None, name=None):
+        """
+        Builds the batch from an (N, 6) array of x, y, z, roll, pitch, yaw
+        """
+        poses = np.asarray(poses, dtype=float).reshape(-1, 6)
+        theta, phi, psi = poses[:, 3], poses[:, 4], poses[:, 5]
+        ct, st = np.cos(theta), np.sin(theta)
+        cp, sp = np.cos(phi), np.sin(phi)
+        cy, sy = np.cos(psi), np.sin(psi)
+
+        # same convention as Transform, rotZ @ rotY @ rotX
+        transforms = np.zeros((poses.shape[0], 4, 4))
+        transforms[:, 0, 0] = cy * cp
+        transforms[:, 0, 1] = cy * sp * st - sy * ct
+        transforms[:, 0, 2] = cy * sp * ct + sy * st
+        transforms[:, 1, 0] = sy * cp
+        transforms[:, 1, 1] = sy * sp * st + cy * ct
+        transforms[:, 1, 2] = sy * sp * ct - cy * st
+        transforms[:, 2, 0] = -sp
+        transforms[:, 2, 1] = cp * st
+        transforms[:, 2, 2] = cp * ct
+        transforms[:, :3, 3] = poses[:, :3]
+        transforms[:, 3, 3] = 1.0
+
+        return cls(transforms, parent=parent, child=child, name=name)
+
+    def __len__(self):
+        return self.transforms.shape[0]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, index):
+        # integers return a Transform viewing into the underlying buffer
+        if isinstance(index, (int, np.integer)):
+            return Transform(
+                transform=self.transforms[index],
+                parent=self.parent,
+                child=self.child,
+                name=self.name,
+            )
+
+        return TransformArray(
+            self.transforms[index], parent=self.parent, child=self.child, name=self.name
+        )
+
+    def __str__(self):
+        return str(self.transforms)
+
+    def __repr__(self):
+        return "TransformArray(n={0}, parent='{1}', child='{2}', name='{3}')".format(
+            len(self), self.parent, self.child, self.name
+        )
+
+    @property
+    def rotations(self):
+        """
+        (N, 3, 3) view of the rotation blocks
+        """
+        return self.transforms[:, :3, :3]
+
+    @property
+    def origins(self):
+        """
+        (N, 3) view of the translations
+        """
+        return self.transforms[:, :3, 3]
+
+    def __matmul__(self, other):
+        if isinstance(other, TransformArray):
+            result = np.matmul(self.transforms, other.transforms)
+            return self.__compose_frames(result, self, other)
+        elif isinstance(other, Transform):
+            result = np.matmul(self.transforms, other.transform)
+            return self.__compose_frames(result, self, other)
+        elif isinstance(other, np.ndarray):
+            return self.apply(other)
+
+        return NotImplemented
+
+    def __rmatmul__(self, other):
+        if isinstance(other, Transform):
+            result = np.matmul(other.transform, self.transforms)
+            return self.__compose_frames(result, other, self)
+
+        return NotImplemented
+
+    # keep the same operator as Transform
+    __mul__ = __matmul__
+    __rmul__ = __rmatmul__
+
+    @staticmethod
+    def __compose_frames(result, first, second):
+        """
+        Wraps a composed batch and propagates the frames when they chain
+        """
+        if first.child == second.parent is not None:
+            return TransformArray(result, parent=first.parent, child=second.child)
+
+        # frames not specified
+        return TransformArray(result)
+
+    def __eq__(self, other):
+        if isinstance(other, TransformArray):
+            return (
+                self.transforms.shape == other.transforms.shape
+                and np.allclose(self.transforms, other.transforms)
+                and self.name == other.name
+                and self.parent == other.parent
+                and self.child == other.child
+            )
+        elif isinstance(other, np.ndarray):
+            return np.allclose(self.transforms, other)
+
+    def apply(self, points):
+        """
+        Applies every transform to points, (3,) gives (N, 3), (M, 3) gives (N, M, 3) and (N, M, 3) is applied pairwise. Homogeneous points of size 4 are also accepted.
+        """
+        points = np.asarray(points)
+        size = points.shape[-1]
+        assert size in (3, 4), "Points must have 3 or 4 coordinates!"
+
+        if size == 4:
+            operator = self.transforms
+            if points.ndim == 1:
+                return np.einsum("nij,j->ni", operator, points)
+            return np.matmul(points, operator.transpose(0, 2, 1))
+
+        rot = self.rotations
+        tran = self.origins
+        if points.ndim == 1:
+            return np.einsum("nij,j->ni", rot, points) + tran
+
+        return np.matmul(points, rot.transpose(0, 2, 1)) + tran[:, None, :]
+
+    def inv(self):
+        """
+        compute the inverse of every transform in the batch
+        """
+        inv_transforms = invert_transforms(self.transforms)
+
+        name = self.name + "_inv" if self.name is not None else None
+        return TransformArray(
+            inv_transforms, parent=self.child, child=self.parent, name=name
+        )
+
+    def inverse_pose(self):
+        """
+        recovers an (N, 6) array of x, y, z, r, p, y from the batch
+        """
+        rot = self.rotations
+        # get yaw
+        psi = np.arctan2(rot[:, 1, 0], rot[:, 0, 0])
+        cp, sp = np.cos(psi), np.sin(psi)
+
+        # get pitch
+        phi = np.arctan2(-rot[:, 2, 0], rot[:, 0, 0] * cp + rot[:, 1, 0] * sp)
+        ct, st = np.cos(phi), np.sin(phi)
+
+        theta = np.arctan2(
+            st * (rot[:, 0, 1] * cp + rot[:, 1, 1] * sp) + rot[:, 2, 1] * ct,
+            -rot[:, 0, 1] * sp + rot[:, 1, 1] * cp,
+        )
+
+        return np.column_stack((self.origins, theta, phi, psi))
+
+    def pose(self):
+        """
+        return the poses of the batch as an (N, 6, 1) array, matching Transform.pose for each element
+        """
+        return self.inverse_pose()[:, :, None]
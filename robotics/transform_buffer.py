@@ -0,0 +1,299 @@
+import numpy as np
+from .transform import Transform
+
+
+def _matrix_to_quaternion(rot):
+    """
+    (..., 3, 3) rotations to (..., 4) unit quaternions ordered w, x, y, z
+    """
+    m00, m01, m02 = rot[..., 0, 0], rot[..., 0, 1], rot[..., 0, 2]
+    m10, m11, m12 = rot[..., 1, 0], rot[..., 1, 1], rot[..., 1, 2]
+    m20, m21, m22 = rot[..., 2, 0], rot[..., 2, 1], rot[..., 2, 2]
+    trace = m00 + m11 + m22
+
+    # 4 * w^2, 4 * x^2, 4 * y^2, 4 * z^2, the largest one gives a stable solution
+    squares = np.stack(
+        (
+            1.0 + trace,
+            1.0 + 2.0 * m00 - trace,
+            1.0 + 2.0 * m11 - trace,
+            1.0 + 2.0 * m22 - trace,
+        ),
+        axis=-1,
+    )
+    # each row is proportional to the quaternion when its component is the largest
+    candidates = np.stack(
+        (
+            np.stack((squares[..., 0], m21 - m12, m02 - m20, m10 - m01), axis=-1),
+            np.stack((m21 - m12, squares[..., 1], m10 + m01, m02 + m20), axis=-1),
+            np.stack((m02 - m20, m10 + m01, squares[..., 2], m21 + m12), axis=-1),
+            np.stack((m10 - m01, m02 + m20, m21 + m12, squares[..., 3]), axis=-1),
+        ),
+        axis=-2,
+    )
+    choice = np.argmax(squares, axis=-1)[..., None, None]
+    quat = np.take_along_axis(candidates, choice, axis=-2)[..., 0, :]
+    quat /= np.linalg.norm(quat, axis=-1, keepdims=True)
+    # keep the scalar part positive for a unique representation
+    return quat * np.where(quat[..., :1] < 0.0, -1.0, 1.0)
+
+
+def _quaternion_to_matrix(quat):
+    """
+    (..., 4) unit quaternions ordered w, x, y, z to (..., 3, 3) rotations
+    """
+    w, x, y, z = np.moveaxis(quat, -1, 0)
+    rot = np.empty(quat.shape[:-1] + (3, 3))
+    rot[..., 0, 0] = 1.0 - 2.0 * (y * y + z * z)
+    rot[..., 0, 1] = 2.0 * (x * y - w * z)
+    rot[..., 0, 2] = 2.0 * (x * z + w * y)
+    rot[..., 1, 0] = 2.0 * (x * y + w * z)
+    rot[..., 1, 1] = 1.0 - 2.0 * (x * x + z * z)
+    rot[..., 1, 2] = 2.0 * (y * z - w * x)
+    rot[..., 2, 0] = 2.0 * (x * z - w * y)
+    rot[..., 2, 1] = 2.0 * (y * z + w * x)
+    rot[..., 2, 2] = 1.0 - 2.0 * (x * x + y * y)
+    return rot
+
+
+def _slerp(start, end, fraction):
+    """
+    Spherical linear interpolation between (M, 4) quaternions at (M,) fractions
+    """
+    dot = np.sum(start * end, axis=-1)
+    # take the short way around
+    end = np.where(dot[:, None] < 0.0, -end, end)
+    dot = np.abs(dot)
+
+    angle = np.arccos(np.clip(dot, -1.0, 1.0))
+    sin_angle = np.sin(angle)
+    # fall back to linear interpolation when the quaternions are nearly equal
+    linear = sin_angle < 1e-8
+    safe = np.where(linear, 1.0, sin_angle)
+    w_start = np.where(linear, 1.0 - fraction, np.sin((1.0 - fraction) * angle) / safe)
+    w_end = np.where(linear, fraction, np.sin(fraction * angle) / safe)
+
+    quat = w_start[:, None] * start + w_end[:, None] * end
+    return quat / np.linalg.norm(quat, axis=-1, keepdims=True)
+
+
+class _EdgeRing:
+    """
+    Bounded ring buffer of stamped poses for one edge, stamps are kept in increasing order
+    """
+
+    def __init__(self, capacity):
+        self.stamps = np.empty(capacity)
+        self.translations = np.empty((capacity, 3))
+        self.quaternions = np.empty((capacity, 4))
+        # physical index of the oldest stamp and number of stored stamps
+        self.head = 0
+        self.count = 0
+
+    def __physical(self, logical):
+        return (self.head + logical) % len(self.stamps)
+
+    def newest(self):
+        return self.stamps[self.__physical(self.count - 1)]
+
+    def oldest(self):
+        return self.stamps[self.head]
+
+    def insert(self, stamp, transform, max_age):
+        """
+        Appends a pose, evicting the oldest when full or older than max_age
+        """
+        quat = _matrix_to_quaternion(transform[:3, :3])
+        if self.count:
+            newest = self.newest()
+            if stamp < newest:
+                raise ValueError(
+                    "Stamp {0} is older than the newest stamp {1} of the edge!".format(
+                        stamp, newest
+                    )
+                )
+            # keep neighbouring quaternions in the same hemisphere
+            if np.dot(quat, self.quaternions[self.__physical(self.count - 1)]) < 0.0:
+                quat = -quat
+            if stamp == newest:
+                self.count -= 1
+
+        capacity = len(self.stamps)
+        if self.count == capacity:
+            self.head = (self.head + 1) % capacity
+            self.count -= 1
+
+        index = self.__physical(self.count)
+        self.stamps[index] = stamp
+        self.translations[index] = transform[:3, 3]
+        self.quaternions[index] = quat
+        self.count += 1
+
+        # evict by age, always keeping the newest pose
+        while self.count > 1 and self.stamps[self.head] < stamp - max_age:
+            self.head = (self.head + 1) % capacity
+            self.count -= 1
+
+    def __search(self, stamps):
+        """
+        Logical insertion indices of the stamps, binary searching the one or two sorted segments of the ring
+        """
+        capacity = len(self.stamps)
+        first = min(self.count, capacity - self.head)
+        index = np.searchsorted(self.stamps[self.head : self.head + first], stamps)
+        if first < self.count:
+            second = self.stamps[: self.count - first]
+            wrapped = stamps >= second[0]
+            index[wrapped] = first + np.searchsorted(second, stamps[wrapped])
+        return index
+
+    def interpolate(self, stamps):
+        """
+        (M, 4, 4) poses at (M,) stamps, interpolating translations linearly and rotations with SLERP
+        """
+        oldest, newest = self.oldest(), self.newest()
+        if np.any(stamps < oldest) or np.any(stamps > newest):
+            raise ValueError(
+                "Lookup would require extrapolation, the edge covers [{0}, {1}]!".format(
+                    oldest, newest
+                )
+            )
+
+        after = np.clip(self.__search(stamps), 1, max(self.count - 1, 1))
+        before = after - 1
+        if self.count == 1:
+            after = before
+        before, after = self.__physical(before), self.__physical(after)
+
+        span = self.stamps[after] - self.stamps[before]
+        fraction = np.where(
+            span > 0.0,
+            (stamps - self.stamps[before]) / np.where(span > 0.0, span, 1.0),
+            0.0,
+        )
+
+        poses = np.zeros((len(stamps), 4, 4))
+        poses[:, :3, :3] = _quaternion_to_matrix(
+            _slerp(self.quaternions[before], self.quaternions[after], fraction)
+        )
+        poses[:, :3, 3] = self.translations[before] + fraction[:, None] * (
+            self.translations[after] - self.translations[before]
+        )
+        poses[:, 3, 3] = 1.0
+        return poses
+
+
+class TransformBuffer:
+    """
+    Keeps a bounded history of stamped transforms per edge and answers interpolated lookups between frames, similar to tf
+
+    Args:
+
+            static - optional KinematicTree or RigidCollection whose edges are used when an edge has no stamps
+            capacity - stamps kept per edge
+            max_age - stamps older than the newest stamp of their edge by more than this are evicted
+    """
+
+    def __init__(self, static=None, capacity=100, max_age=10.0):
+        self.capacity = capacity
+        self.max_age = max_age
+        # child frame -> parent frame, and edge transforms keyed by child frame
+        self.__parents = {}
+        self.__static = {}
+        self.__rings = {}
+
+        if static is not None:
+            collection = getattr(static, "rigid_collection", static).collection
+            for edge in collection:
+                if edge.parent is not None and edge.child is not None:
+                    self.__add_edge(edge.parent, edge.child)
+                    self.__static[edge.child] = edge.transform
+
+    def __add_edge(self, parent, child):
+        """
+        Registers an edge in the frame topology, edges closing a loop are rejected so every chain reaches a top frame
+        """
+        known = self.__parents.get(child)
+        if known is not None and known != parent:
+            raise ValueError(
+                "Frame '{0}' already has the parent '{1}', not '{2}'!".format(
+                    child, known, parent
+                )
+            )
+        if known is None:
+            ancestor = parent
+            while ancestor is not None:
+                if ancestor == child:
+                    raise ValueError(
+                        "The edge from '{0}' to '{1}' would close a loop!".format(
+                            parent, child
+                        )
+                    )
+                ancestor = self.__parents.get(ancestor)
+        self.__parents[child] = parent
+
+    def set(self, transform, stamp):
+        """
+        Stores a stamped Transform for the edge from transform.parent to transform.child
+        """
+        if transform.parent is None or transform.child is None:
+            raise ValueError("Stamped transforms need a parent and a child frame!")
+
+        self.__add_edge(transform.parent, transform.child)
+        ring = self.__rings.get(transform.child)
+        if ring is None:
+            ring = self.__rings[transform.child] = _EdgeRing(self.capacity)
+        ring.insert(float(stamp), transform.transform, self.max_age)
+
+    def lookup_edge(self, child, stamps):
+        """
+        Pose of the edge ending at child, (4, 4) for a single stamp or (M, 4, 4) for an array of stamps
+        """
+        single = np.ndim(stamps) == 0
+        stamps = np.atleast_1d(np.asarray(stamps, dtype=float))
+        ring = self.__rings.get(child)
+        if ring is not None:
+            poses = ring.interpolate(stamps)
+        elif child in self.__static:
+            poses = np.broadcast_to(self.__static[child], (len(stamps), 4, 4))
+        else:
+            raise KeyError("{0} has no parent in the TransformBuffer!".format(child))
+
+        return poses[0] if single else poses
+
+    def __chain(self, frame):
+        """
+        Frames from frame up to the top of its tree
+        """
+        chain = [frame]
+        while chain[-1] in self.__parents:
+            chain.append(self.__parents[chain[-1]])
+        return chain
+
+    def get(self, start_frame, end_frame, stamp):
+        """
+        Interpolated transform from start_frame to end_frame at the given time
+        """
+        start_chain = self.__chain(start_frame)
+        end_chain = self.__chain(end_frame)
+        # only edges below the lowest common ancestor are needed
+        end_set = set(end_chain)
+        common = next((f for f in start_chain if f in end_set), None)
+        if common is None:
+            raise KeyError(
+                "No path between '{0}' and '{1}' in the TransformBuffer!".format(
+                    start_frame, end_frame
+                )
+            )
+
+        def from_common(chain):
+            result = np.eye(4)
+            for frame in chain[: chain.index(common)]:
+                result = self.lookup_edge(frame, stamp) @ result
+            return result
+
+        start = Transform(transform=from_common(start_chain))
+        end = from_common(end_chain)
+        return Transform(
+            transform=start.inv().transform @ end, parent=start_frame, child=end_frame
+        )